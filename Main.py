@@ -10,10 +10,19 @@ from datetime import datetime
 import io
 import json
 import base64
+import hashlib
 import tempfile
+import time
 import zipfile
+from pathlib import Path
 from PIL import Image
 
+import boletins
+import grupos
+import historico_db
+import relatorios
+import tabelas
+
 warnings.filterwarnings('ignore')
 
 # --- Verificar dependências ---
@@ -360,15 +369,37 @@ def calculate_reliability(item_results):
         return 0.7
 
 # --- Funções para Gráficos com Tema Escuro ---
+# Acima destes tamanhos os gráficos de dispersão usam WebGL e passam a ser amostrados
+SCATTER_WEBGL_MIN_POINTS = 1_000
+SCATTER_MAX_POINTS = 5_000
+
+def histogram_bins(valores, nbins):
+    """Histograma calculado no servidor: (centros, contagens, largura das classes)
+    
+    Apenas as classes vão para o navegador, qualquer que seja o número de alunos.
+    """
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[np.isfinite(valores)]
+    if len(valores) == 0:
+        return np.array([]), np.array([]), 1.0
+    contagens, bordas = np.histogram(valores, bins=nbins)
+    return (bordas[:-1] + bordas[1:]) / 2, contagens, bordas[1] - bordas[0]
+
+def downsample_positions(n, max_points=SCATTER_MAX_POINTS):
+    """Posições de uma amostra fixa (semente 0) de até max_points pontos, em ordem"""
+    if n <= max_points:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(0).choice(n, max_points, replace=False))
+
 def plot_theta_distribution_dark(student_results):
-    fig = px.histogram(
-        student_results, 
-        x='Proficiencia (θ)', 
-        nbins=20,
-        title='📈 Distribuicao das Proficiencias',
-        labels={'Proficiencia (θ)': 'Proficiencia (θ)', 'count': 'Numero de Alunos'},
-        color_discrete_sequence=['#8B5CF6']
-    )
+    centros, contagens, largura = histogram_bins(student_results['Proficiencia (θ)'], 20)
+    fig = go.Figure(go.Bar(
+        x=centros,
+        y=contagens,
+        width=largura,
+        marker_color='#8B5CF6',
+        hovertemplate='Proficiencia (θ): %{x:.2f}<br>Numero de Alunos: %{y}<extra></extra>'
+    ))
     
     mean_theta = student_results['Proficiencia (θ)'].mean()
     fig.add_vline(x=mean_theta, line_dash="dash", line_color="#10B981", 
@@ -376,6 +407,10 @@ def plot_theta_distribution_dark(student_results):
                   annotation_position="top right")
     
     fig.update_layout(
+        title='📈 Distribuicao das Proficiencias',
+        xaxis_title='Proficiencia (θ)',
+        yaxis_title='Numero de Alunos',
+        bargap=0,
         showlegend=False,
         plot_bgcolor='rgba(30, 41, 59, 0.5)',
         paper_bgcolor='rgba(15, 23, 42, 0)',
@@ -389,8 +424,9 @@ def plot_theta_distribution_dark(student_results):
     return fig
 
 def plot_item_analysis_dark(item_results):
+    amostra = downsample_positions(len(item_results))
     fig = px.scatter(
-        item_results,
+        item_results.iloc[amostra],
         x='Dificuldade (b)',
         y='Discriminacao (a)',
         size='% Acerto',
@@ -403,8 +439,11 @@ def plot_item_analysis_dark(item_results):
             '% Acerto': 'Taxa de Acerto (%)',
             'Correlacao Bisserial': 'Correlacao'
         },
-        color_continuous_scale='Viridis'
+        color_continuous_scale='Viridis',
+        render_mode='webgl' if len(item_results) >= SCATTER_WEBGL_MIN_POINTS else 'auto'
     )
+    if len(amostra) < len(item_results):
+        fig.update_layout(title=f'🎯 Analise Multidimensional das Questoes (amostra de {len(amostra):,} de {len(item_results):,})')
     
     fig.update_layout(
         height=500,
@@ -418,8 +457,9 @@ def plot_item_analysis_dark(item_results):
     
     return fig
 
-def plot_student_progress_dark(detailed_df, aluno_nome):
-    aluno_data = detailed_df[detailed_df['Aluno'] == aluno_nome]
+def plot_student_progress_dark(detailed_df, aluno_nome, linhas=None):
+    # `linhas`: faixa contígua do aluno em detailed_df (ver student_detail_rows)
+    aluno_data = detailed_df.iloc[linhas] if linhas is not None else detailed_df[detailed_df['Aluno'] == aluno_nome]
     
     fig = go.Figure()
     
@@ -482,13 +522,16 @@ def plot_turma_panorama_dark(student_results, item_results):
         horizontal_spacing=0.15
     )
     
-    # Grafico 1: Distribuicao da proficiencia
+    # Grafico 1: Distribuicao da proficiencia (classes calculadas no servidor)
+    centros, contagens, largura = histogram_bins(student_results['Proficiencia (θ)'], 15)
     fig.add_trace(
-        go.Histogram(
-            x=student_results['Proficiencia (θ)'],
+        go.Bar(
+            x=centros,
+            y=contagens,
+            width=largura,
             marker_color='#8B5CF6',
             name='Proficiencia',
-            nbinsx=15
+            hovertemplate='Proficiencia: %{x:.2f}<br>Alunos: %{y}<extra></extra>'
         ),
         row=1, col=1
     )
@@ -519,8 +562,9 @@ def plot_turma_panorama_dark(student_results, item_results):
                  row=1, col=2)
     
     # Grafico 3: Taxa de acerto da turma
+    linha_acerto = go.Scattergl if len(item_results) >= SCATTER_WEBGL_MIN_POINTS else go.Scatter
     fig.add_trace(
-        go.Scatter(
+        linha_acerto(
             x=item_results['Questao'],
             y=item_results['% Acerto'],
             mode='lines+markers',
@@ -575,386 +619,481 @@ def plot_turma_panorama_dark(student_results, item_results):
     
     return fig
 
-def get_top_tutors(student_results, n=10):
-    """Identifica os melhores alunos para serem tutores"""
-    # Alunos com proficiencia alta (θ > 1.0) e bom percentual de acerto (> 70%)
-    potential_tutors = student_results[
-        (student_results['Proficiencia (θ)'] > 1.0) & 
-        (student_results['Percentual de Acerto'] > 70)
-    ].copy()
-    
-    if len(potential_tutors) == 0:
-        # Se nao houver alunos com θ > 1.0, pegar os top n por proficiencia
-        potential_tutors = student_results.nlargest(n, 'Proficiencia (θ)').copy()
-    
-    # Verificar se há dados suficientes para calcular o score
-    if len(potential_tutors) > 0:
-        # Adicionar classificacao de qualidade do tutor
-        # Prevenir divisão por zero se todos os valores forem iguais
-        theta_min = potential_tutors['Proficiencia (θ)'].min()
-        theta_max = potential_tutors['Proficiencia (θ)'].max()
-        acerto_min = potential_tutors['Percentual de Acerto'].min()
-        acerto_max = potential_tutors['Percentual de Acerto'].max()
-        
-        theta_range = theta_max - theta_min
-        acerto_range = acerto_max - acerto_min
-        
-        if theta_range > 0 and acerto_range > 0:
-            potential_tutors['Score_Tutor'] = (
-                (potential_tutors['Proficiencia (θ)'] - theta_min) / theta_range * 0.6 +
-                (potential_tutors['Percentual de Acerto'] - acerto_min) / acerto_range * 0.4
-            )
-        else:
-            # Se todos os valores forem iguais, usar score base 0.5
-            potential_tutors['Score_Tutor'] = 0.5
-        
-        # Ordenar por score
-        potential_tutors = potential_tutors.sort_values('Score_Tutor', ascending=False)
+@st.cache_resource(max_entries=8, show_spinner=False)
+def dashboard_figures(digest, _student_results, _item_results):
+    """Figuras do Dashboard memorizadas por análise (digest)"""
+    return {
+        'panorama': plot_turma_panorama_dark(_student_results, _item_results),
+        'theta': plot_theta_distribution_dark(_student_results),
+        'questoes': plot_item_analysis_dark(_item_results)
+    }
+
+# Critérios padrão de tutor: proficiência e percentual de acerto mínimos
+TUTOR_MIN_THETA = 1.0
+TUTOR_MIN_ACERTO = 70.0
+
+def top_k_positions(valores, k):
+    """Posições dos k maiores valores, em ordem decrescente (empates pela ordem original)
+    
+    Usa seleção parcial (np.partition) em vez de ordenar todos os valores.
+    """
+    valores = np.asarray(valores, dtype=float)
+    if k < len(valores):
+        limiar = np.partition(valores, len(valores) - k)[len(valores) - k]
+        maiores = np.flatnonzero(valores > limiar)
+        empates = np.flatnonzero(valores == limiar)[:k - len(maiores)]
+        selecionados = np.concatenate([maiores, empates])
     else:
-        # Se não houver potenciais tutores, criar DataFrame vazio com colunas
-        potential_tutors = pd.DataFrame(columns=student_results.columns.tolist() + ['Score_Tutor'])
-    
-    # Adicionar posicao
-    if len(potential_tutors) > 0:
-        potential_tutors['Posicao'] = range(1, len(potential_tutors) + 1)
-    
-    return potential_tutors.head(n)
+        selecionados = np.arange(len(valores))
+    return selecionados[np.lexsort((selecionados, -valores[selecionados]))]
 
-# --- Funcao para criar relatorio em texto simples (TXT) ---
-def create_text_report(student_results, item_results, detailed_df, aluno_selecionado=None):
-    """Cria um relatorio em formato de texto simples (.TXT)"""
+def get_top_tutors(student_results, n=10, theta_min=TUTOR_MIN_THETA, acerto_min=TUTOR_MIN_ACERTO):
+    """Identifica os melhores alunos para serem tutores"""
+    theta = student_results['Proficiencia (θ)'].to_numpy(dtype=float)
+    acerto = student_results['Percentual de Acerto'].to_numpy(dtype=float)
     
-    report = []
-    report.append("=" * 70)
-    report.append("RELATORIO DE ANALISE - KAIROS")
-    report.append("=" * 70)
-    report.append(f"Data de geracao: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    report.append(f"Total de alunos: {len(student_results)}")
-    report.append(f"Total de questoes: {len(item_results)}")
-    report.append("")
-    
-    # Explicacao dos parametros TRI
-    report.append("EXPLICACAO DOS PARAMETROS TRI")
-    report.append("-" * 40)
-    report.append("1. DIFICULDADE (b):")
-    report.append("   - Valores negativos: Questao facil")
-    report.append("   - Valores proximos a 0: Dificuldade media")
-    report.append("   - Valores positivos: Questao dificil")
-    report.append("   - Faixa tipica: -3 a +3")
-    report.append("")
-    report.append("2. DISCRIMINACAO (a):")
-    report.append("   - Valores abaixo de 0.3: Discriminacao baixa (questao problematica)")
-    report.append("   - Valores 0.3-0.6: Discriminacao moderada")
-    report.append("   - Valores acima de 0.6: Discriminacao alta (questao excelente)")
-    report.append("   - Valores negativos: Questao funciona inversamente (erro grave)")
-    report.append("")
-    report.append("3. PROFICIENCIA (θ):")
-    report.append("   - Valores abaixo de -1: Proficiencia baixa")
-    report.append("   - Valores entre -1 e +1: Proficiencia media")
-    report.append("   - Valores acima de +1: Proficiencia alta")
-    report.append("   - Escala tipica: -4 a +4 (media 0, desvio padrao 1)")
-    report.append("")
-    
-    report.append("PANORAMA GERAL DA TURMA")
-    report.append("-" * 40)
-    report.append(f"Proficiencia media (θ): {student_results['Proficiencia (θ)'].mean():.3f}")
-    report.append(f"Desvio padrao da proficiencia: {student_results['Proficiencia (θ)'].std():.3f}")
-    report.append(f"Taxa media de acerto: {student_results['Percentual de Acerto'].mean():.1f}%")
-    report.append(f"Dificuldade media das questoes (b): {item_results['Dificuldade (b)'].mean():.3f}")
-    report.append(f"Confiabilidade do teste: {calculate_reliability(item_results):.3f}")
-    report.append("")
-    
-    # Top 10 tutores
-    top_tutors = get_top_tutors(student_results, 10)
-    if len(top_tutors) > 0:
-        report.append("TOP 10 TUTORES DE COLEGAS")
-        report.append("-" * 40)
-        report.append("Pos | Aluno | Proficiencia (θ) | % Acerto | Score Tutor")
-        report.append("-" * 70)
-        for idx, row in top_tutors.iterrows():
-            report.append(f"{row['Posicao']:3d} | {row['Aluno'][:20]:20s} | {row['Proficiencia (θ)']:7.2f} | {row['Percentual de Acerto']:7.1f}% | {row['Score_Tutor']:6.2f}")
-        report.append("")
-        report.append("SUGESTOES PARA GRUPOS DE TUTORIA:")
-        report.append("1. Formar grupos de 3-4 alunos com 1 tutor")
-        report.append("2. Atribuir tutores para temas especificos de dificuldade")
-        report.append("3. Realizar sessoes semanais de reforco")
-        report.append("")
-    
-    if aluno_selecionado:
-        aluno_data = student_results[student_results['Aluno'] == aluno_selecionado].iloc[0]
-        rank = list(student_results.sort_values('Proficiencia (θ)', ascending=False)['Aluno']).index(aluno_selecionado) + 1
-        
-        report.append(f"ANALISE INDIVIDUAL - {aluno_selecionado}")
-        report.append("-" * 40)
-        report.append(f"Proficiencia (θ): {aluno_data['Proficiencia (θ)']:.3f}")
-        report.append(f"Pontuacao: {int(aluno_data['Pontuacao Total'])}/{len(item_results)}")
-        report.append(f"Percentual de acerto: {aluno_data['Percentual de Acerto']:.1f}%")
-        report.append(f"Posicao no ranking: {rank}º de {len(student_results)}")
-        report.append("")
-        
-        # Verificar se e tutor potencial
-        if aluno_selecionado in top_tutors['Aluno'].values:
-            tutor_info = top_tutors[top_tutors['Aluno'] == aluno_selecionado].iloc[0]
-            report.append("🎓 **ESTE ALUNO PODE SER TUTOR DE COLEGAS**")
-            report.append(f"   - Score como tutor: {tutor_info['Score_Tutor']:.2f}")
-            report.append(f"   - Posicao entre tutores: {tutor_info['Posicao']}º")
-            report.append("   - Sugestao: Atribuir para auxiliar 2-3 colegas com dificuldades")
-            report.append("")
-        
-        # Interpretacao da proficiencia do aluno
-        theta = aluno_data['Proficiencia (θ)']
-        if theta < -1.5:
-            report.append("INTERPRETACAO: Proficiencia MUITO BAIXA")
-            report.append("   * Necessita de intervencao pedagogica imediata")
-            report.append("   * Dificuldades significativas na aprendizagem")
-            report.append("   * Sugestao: Acompanhamento individual com tutor")
-        elif theta < -0.5:
-            report.append("INTERPRETACAO: Proficiencia BAIXA")
-            report.append("   * Necessita de reforco escolar")
-            report.append("   * Recomenda-se atendimento individualizado")
-            report.append("   * Sugestao: Participar de grupos de estudo com tutores")
-        elif theta < 0.5:
-            report.append("INTERPRETACAO: Proficiencia MEDIA")
-            report.append("   * Desempenho adequado para o nivel escolar")
-            report.append("   * Manter ritmo de estudos atual")
-            report.append("   * Sugestao: Praticar questoes de maior dificuldade")
-        elif theta < 1.5:
-            report.append("INTERPRETACAO: Proficiencia ALTA")
-            report.append("   * Bom desempenho academico")
-            report.append("   * Pode atuar como tutor de colegas")
-            report.append("   * Sugestao: Desafios adicionais e aprofundamento")
-        else:
-            report.append("INTERPRETACAO: Proficiencia MUITO ALTA")
-            report.append("   * Excelente desempenho")
-            report.append("   * Recomenda-se atividades desafiadoras")
-            report.append("   * Sugestao: Atuar como tutor principal em grupos de estudo")
-        report.append("")
-    
-    report.append("ANALISE DAS QUESTOES")
-    report.append("-" * 40)
-    
-    # Questoes problematicas
-    problematic_items = item_results[
-        (item_results['Discriminacao (a)'] < 0.3) | 
-        (item_results['Correlacao Bisserial'] < 0.1) |
-        (item_results['% Acerto'] < 20) |
-        (item_results['% Acerto'] > 90)
-    ]
+    # Alunos com proficiencia alta (θ > theta_min) e bom percentual de acerto (> acerto_min)
+    candidatos = np.flatnonzero((theta > theta_min) & (acerto > acerto_min))
+    if len(candidatos) == 0:
+        # Se nao houver alunos acima dos criterios, pegar os top n por proficiencia
+        candidatos = top_k_positions(theta, n)
     
-    if len(problematic_items) > 0:
-        report.append(f"Questoes que requerem atencao ({len(problematic_items)}):")
-        for _, item in problematic_items.iterrows():
-            issues = []
-            if item['Discriminacao (a)'] < 0.3:
-                issues.append("baixa discriminacao")
-            if item['Correlacao Bisserial'] < 0.1:
-                issues.append("baixa correlacao")
-            if item['% Acerto'] < 20:
-                issues.append("muito dificil")
-            if item['% Acerto'] > 90:
-                issues.append("muito facil")
-            
-            report.append(f"   * {item['Questao']}: {', '.join(issues)} (Dificuldade: {item['Dificuldade (b)']:.2f}, Acerto: {item['% Acerto']:.1f}%)")
+    if len(candidatos) == 0:
+        # Se não houver potenciais tutores, criar DataFrame vazio com colunas
+        return pd.DataFrame(columns=student_results.columns.tolist() + ['Score_Tutor', 'Posicao'])
+    
+    # Score normalizado entre os candidatos (0.5 se todos os valores forem iguais)
+    theta_c, acerto_c = theta[candidatos], acerto[candidatos]
+    theta_range = np.ptp(theta_c)
+    acerto_range = np.ptp(acerto_c)
+    if theta_range > 0 and acerto_range > 0:
+        score = ((theta_c - theta_c.min()) / theta_range * 0.6 +
+                 (acerto_c - acerto_c.min()) / acerto_range * 0.4)
     else:
-        report.append("Todas as questoes apresentam caracteristicas adequadas.")
-    
-    report.append("")
-    report.append("RECOMENDACOES PEDAGOGICAS")
-    report.append("-" * 40)
-    recommendations = [
-        "1. Revise questoes com discriminacao abaixo de 0.3",
-        "2. Considere reformular questoes muito faceis (>90%) ou dificeis (<20%)",
-        "3. Use questoes com alta discriminacao (>0.6) em futuras avaliacoes",
-        "4. Organize grupos de tutoria com os 10 melhores alunos identificados",
-        "5. Planeje atividades de reforco para alunos com θ < -0.5",
-        "6. Proponha desafios adicionais para alunos com θ > 1.0",
-        "7. Implemente monitoramento continuo com relatorios mensais",
-        "8. Use os dados para personalizacao do ensino"
-    ]
-    
-    for rec in recommendations:
-        report.append(rec)
+        score = np.full(len(candidatos), 0.5)
+    
+    # Apenas os n melhores scores são ordenados
+    melhores = top_k_positions(score, n)
+    top_tutors = student_results.iloc[candidatos[melhores]].copy()
+    top_tutors['Score_Tutor'] = score[melhores]
+    top_tutors['Posicao'] = range(1, len(top_tutors) + 1)
+    return top_tutors
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_top_tutors(digest, n, theta_min, acerto_min, _student_results):
+    """get_top_tutors memorizado por análise (digest) e critérios"""
+    return get_top_tutors(_student_results, n, theta_min, acerto_min)
+
+def analysis_top_tutors(analysis, n=10, theta_min=TUTOR_MIN_THETA, acerto_min=TUTOR_MIN_ACERTO):
+    """Tutores da análise, calculados uma vez para cada combinação de critérios"""
+    return cached_top_tutors(analysis['digest'], n, theta_min, acerto_min, analysis['student_results'])
+
+def build_study_groups(analysis, tamanho=4):
+    """Grupos de estudo de `tamanho` alunos, cada um com um tutor
+    
+    Os tutores são os melhores de get_top_tutors (completados pelo ranking de
+    proficiência quando não há tutores suficientes) e os demais alunos são
+    distribuídos por grupos.formar_grupos. Retorna (integrantes, resumo).
+    """
+    student_results = analysis['student_results']
+    num_grupos = max(1, -(-len(student_results) // tamanho))
+    
+    tutores = student_results.index.get_indexer(analysis_top_tutors(analysis, num_grupos).index)
+    if len(tutores) < num_grupos:
+        restantes = analysis['ranking']['ordem'][~np.isin(analysis['ranking']['ordem'], tutores)]
+        tutores = np.concatenate([tutores, restantes[:num_grupos - len(tutores)]])
+    
+    theta = student_results['Proficiencia (θ)'].to_numpy(dtype=float)
+    acertos = np.asarray(analysis['response_matrix'])
+    grupo = grupos.formar_grupos(theta, acertos, tutores)
+    
+    papel = np.full(len(grupo), 'Membro', dtype=object)
+    papel[tutores] = 'Tutor'
+    integrantes = pd.DataFrame({
+        'Grupo': grupo + 1,
+        'Papel': papel,
+        'Aluno': student_results['Aluno'].to_numpy(),
+        'Proficiencia (θ)': theta.round(3),
+        'Percentual de Acerto': student_results['Percentual de Acerto'].to_numpy(),
+        'Pontos Fracos': student_results['Pontos Fracos'].to_numpy()
+    })
+    integrantes = integrantes.iloc[np.lexsort((papel != 'Tutor', grupo))].reset_index(drop=True)
+    
+    resumo = pd.DataFrame({
+        'Grupo': np.arange(1, num_grupos + 1),
+        'Tutor': student_results['Aluno'].to_numpy()[tutores],
+        'Integrantes': np.bincount(grupo, minlength=num_grupos),
+        'Proficiencia Media': (np.bincount(grupo, weights=theta, minlength=num_grupos) /
+                               np.bincount(grupo, minlength=num_grupos)).round(3),
+        'Cobertura (%)': grupos.cobertura_dos_grupos(grupo, acertos, num_grupos).round(1)
+    })
+    return integrantes, resumo
+
+# --- Relatórios TXT/CSV (modelos pré-compilados em relatorios.py) ---
+def build_report_summary(student_results, item_results):
+    """Totais e médias da turma usados no cabeçalho dos relatórios"""
+    return {
+        'data': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+        'total_alunos': len(student_results),
+        'total_questoes': len(item_results),
+        'theta_media': student_results['Proficiencia (θ)'].mean(),
+        'theta_dp': student_results['Proficiencia (θ)'].std(),
+        'acerto_medio': student_results['Percentual de Acerto'].mean(),
+        'dificuldade_media': item_results['Dificuldade (b)'].mean(),
+        'confiabilidade': calculate_reliability(item_results)
+    }
+
+def build_student_context(student_results, ranking, top_tutors, aluno_selecionado, linha=None):
+    """Dados do aluno selecionado para a seção individual dos relatórios
+    
+    `linha` (posição em student_results) distingue alunos homônimos; sem ela o
+    aluno é localizado pelo nome.
+    """
+    if linha is None:
+        linha = student_row(ranking, aluno_selecionado)
+    aluno_data = student_results.iloc[linha]
+    tutor = top_tutors[top_tutors['Aluno'] == aluno_selecionado]
+    
+    return {
+        'linha': linha,
+        'nome': aluno_selecionado,
+        'theta': aluno_data['Proficiencia (θ)'],
+        'pontuacao': int(aluno_data['Pontuacao Total']),
+        'percentual': aluno_data['Percentual de Acerto'],
+        'posicao': ranking['posicao'][linha],
+        'percentil': ranking['percentil'][linha],
+        'classificacao': aluno_data['Classificacao'],
+        'pontos_fracos': aluno_data['Pontos Fracos'] or '-',
+        'tutor': ({'score': tutor['Score_Tutor'].iloc[0], 'posicao': tutor['Posicao'].iloc[0]}
+                  if len(tutor) > 0 else None)
+    }
+
+def create_text_report(student_results, item_results, detailed_df, aluno_selecionado=None, ranking=None, top_tutors=None, linha_aluno=None):
+    """Cria um relatorio em formato de texto simples (.TXT)"""
+    if ranking is None:
+        ranking = build_ranking_index(student_results)
+    if top_tutors is None:
+        top_tutors = get_top_tutors(student_results, 10)
     
-    report.append("")
-    report.append("=" * 70)
-    report.append("Fim do relatorio")
-    report.append("=" * 70)
+    aluno = None
+    if aluno_selecionado is not None or linha_aluno is not None:
+        aluno = build_student_context(student_results, ranking, top_tutors, aluno_selecionado, linha_aluno)
     
-    return "\n".join(report)
+    buffer = io.StringIO()
+    relatorios.escrever_txt(buffer, build_report_summary(student_results, item_results), item_results, top_tutors, aluno)
+    return buffer.getvalue()
 
-# --- Funcao para criar relatorio CSV formatado ---
-def create_csv_report(student_results, item_results, detailed_df, aluno_selecionado=None):
+def create_csv_report(student_results, item_results, detailed_df, aluno_selecionado=None, ranking=None, detail_offsets=None, top_tutors=None, linha_aluno=None):
     """Cria um relatorio formatado em CSV com multiplas secoes"""
+    if ranking is None:
+        ranking = build_ranking_index(student_results)
+    if top_tutors is None:
+        top_tutors = get_top_tutors(student_results, 10)
+    
+    ranking_df = student_results.iloc[ranking['ordem']].copy()
+    ranking_df['Posicao'] = ranking['posicao'][ranking['ordem']]
+    ranking_df['Posicao Densa'] = ranking['posicao_densa'][ranking['ordem']]
+    ranking_df['Percentil'] = ranking['percentil'][ranking['ordem']].round(1)
+    
+    aluno = None
+    if aluno_selecionado is not None or linha_aluno is not None:
+        aluno = build_student_context(student_results, ranking, top_tutors, aluno_selecionado, linha_aluno)
+        if detail_offsets is not None:
+            aluno['detalhado'] = detailed_df.iloc[student_detail_rows(detail_offsets, aluno['linha'])]
+        else:
+            aluno['detalhado'] = detailed_df[detailed_df['Aluno'] == aluno_selecionado]
     
-    # Criar buffer para o CSV
     buffer = io.StringIO()
-    
-    # Secao 1: Metadados
-    buffer.write("=== METADADOS ===\n")
-    buffer.write("Metrica,Valor\n")
-    buffer.write(f"Data de geracao,{datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-    buffer.write(f"Total de alunos,{len(student_results)}\n")
-    buffer.write(f"Total de questoes,{len(item_results)}\n")
-    buffer.write(f"Proficiencia media,{student_results['Proficiencia (θ)'].mean():.3f}\n")
-    buffer.write(f"Desvio padrao da proficiencia,{student_results['Proficiencia (θ)'].std():.3f}\n")
-    buffer.write(f"Dificuldade media das questoes,{item_results['Dificuldade (b)'].mean():.3f}\n")
-    buffer.write(f"Taxa media de acerto,{student_results['Percentual de Acerto'].mean():.1f}%\n")
-    buffer.write(f"Confiabilidade,{calculate_reliability(item_results):.3f}\n")
-    buffer.write("\n")
-    
-    # Secao 2: Explicacao dos parametros TRI
-    buffer.write("=== EXPLICACAO DOS PARAMETROS TRI ===\n")
-    buffer.write("Parametro,Descricao,Interpretacao\n")
-    buffer.write('Dificuldade (b),"Mede o nivel de dificuldade da questao",')
-    buffer.write('"Negativo: facil; Proximo a 0: media; Positivo: dificil"\n')
-    buffer.write('Discriminacao (a),"Capacidade de diferenciar alunos",')
-    buffer.write('"<0.3: baixa; 0.3-0.6: moderada; >0.6: alta; Negativo: problema grave"\n')
-    buffer.write('Proficiencia (θ),"Habilidade do aluno na escala TRI",')
-    buffer.write('"<-1.5: muito baixa; -1.5 a -0.5: baixa; -0.5 a 0.5: media; 0.5 a 1.5: alta; >1.5: muito alta"\n')
-    buffer.write("\n")
-    
-    # Secao 3: Top 10 Tutores
-    top_tutors = get_top_tutors(student_results, 10)
-    if len(top_tutors) > 0:
-        buffer.write("=== TOP 10 TUTORES DE COLEGAS ===\n")
-        buffer.write("Posicao,Aluno,Proficiencia (θ),% Acerto,Score Tutor,Sugestao\n")
-        for idx, row in top_tutors.iterrows():
-            sugestao = f"Tutor para {min(3, len(student_results)//10)} alunos"
-            buffer.write(f"{row['Posicao']},{row['Aluno']},{row['Proficiencia (θ)']:.3f},{row['Percentual de Acerto']:.1f}%,{row['Score_Tutor']:.3f},{sugestao}\n")
-        buffer.write("\n")
-    
-    # Secao 4: Ranking de Alunos
-    buffer.write("=== RANKING DE ALUNOS ===\n")
-    ranking_df = student_results.sort_values('Proficiencia (θ)', ascending=False)
-    ranking_df['Posicao'] = range(1, len(ranking_df) + 1)
-    ranking_df[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto', 'Pontuacao Total']].to_csv(buffer, index=False)
-    buffer.write("\n")
-    
-    # Secao 5: Analise de Questoes
-    buffer.write("=== ANALISE DE QUESTOES ===\n")
-    item_results[['Questao', 'Dificuldade (b)', 'Discriminacao (a)', '% Acerto', 'Correlacao Bisserial']].to_csv(buffer, index=False)
-    buffer.write("\n")
-    
-    # Secao 6: Questoes Problematicas
-    problematic_items = item_results[
-        (item_results['Discriminacao (a)'] < 0.3) | 
-        (item_results['Correlacao Bisserial'] < 0.1) |
-        (item_results['% Acerto'] < 20) |
-        (item_results['% Acerto'] > 90)
-    ]
-    
-    if len(problematic_items) > 0:
-        buffer.write("=== QUESTOES PROBLEMATICAS ===\n")
-        buffer.write("Questao,Problemas,Dificuldade,Discriminacao,% Acerto,Acão Recomendada\n")
-        for _, item in problematic_items.iterrows():
-            issues = []
-            if item['Discriminacao (a)'] < 0.3:
-                issues.append("Baixa discriminacao")
-            if item['Correlacao Bisserial'] < 0.1:
-                issues.append("Baixa correlacao")
-            if item['% Acerto'] < 20:
-                issues.append("Muito dificil")
-            if item['% Acerto'] > 90:
-                issues.append("Muito facil")
+    relatorios.escrever_csv(buffer, build_report_summary(student_results, item_results), item_results, top_tutors, ranking_df, aluno)
+    return buffer.getvalue()
+
+# --- Exportação em blocos, gravada direto em disco (turmas grandes) ---
+EXPORT_CHUNK_ROWS = 50_000                  # linhas serializadas por bloco
+EXCEL_MAX_ROWS = 1_048_576                  # limite de linhas de uma aba do Excel
+STREAMING_EXPORT_MIN_ROWS = 200_000         # a partir daqui o Excel usa o modo streaming
+EXPORT_MAX_AGE_HOURS = 12                   # exportações em disco mais antigas são apagadas
+
+def remove_stale_exports(max_age_hours=EXPORT_MAX_AGE_HOURS):
+    """Apaga do diretório temporário as exportações deixadas por sessões já encerradas"""
+    limite = time.time() - max_age_hours * 3600
+    for path in Path(tempfile.gettempdir()).glob('kairos_*'):
+        try:
+            if path.is_file() and path.stat().st_mtime < limite:
+                path.unlink()
+        except OSError:
+            # Arquivo removido por outra sessão ou sem permissão: ignorar
+            pass
+
+def new_export_path(suffix):
+    """Arquivo temporário (fechado) para uma exportação grande; removido quando sai do cache"""
+    remove_stale_exports()
+    with tempfile.NamedTemporaryFile(prefix='kairos_', suffix=suffix, delete=False) as output:
+        return Path(output.name)
+
+def export_files(value):
+    """Arquivos em disco referenciados por uma exportação em cache"""
+    return [item for item in (value if isinstance(value, tuple) else (value,)) if isinstance(item, Path)]
+
+def remove_export_files(value):
+    """Apaga do disco os arquivos de uma exportação descartada do cache"""
+    for path in export_files(value):
+        path.unlink(missing_ok=True)
+
+def render_file_download(path, label, file_name, mime, key):
+    """Botão de download de uma exportação gravada em disco
+    
+    O arquivo só é lido no rerun em que o usuário pede o download; nos demais
+    reruns do fragment nenhum byte da exportação é carregado em memória.
+    """
+    if st.button(label, key=f"{key}_baixar", use_container_width=True):
+        with open(path, 'rb') as arquivo:
+            st.download_button(
+                label="💾 **Salvar arquivo**",
+                data=arquivo,
+                file_name=file_name,
+                mime=mime,
+                type="primary",
+                use_container_width=True,
+                key=f"{key}_salvar"
+            )
+
+def write_excel_streaming(output, sheets, report_rows):
+    """Grava as abas com um workbook write-only do openpyxl, bloco a bloco.
+    
+    Abas que passam do limite de linhas do Excel continuam em 'Nome (2)', 'Nome (3)'...
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    
+    for sheet_name, _, df in sheets:
+        header = [str(c) for c in df.columns]
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(header)
+        part, written = 1, 1
+        
+        for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+            chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+            # Células vazias no lugar de NaN, como no to_excel do pandas
+            chunk = chunk.astype(object).where(chunk.notna(), None)
             
-            acao = "Revisar questao" if len(issues) > 0 else "Manter"
-            buffer.write(f"{item['Questao']},{';'.join(issues)},{item['Dificuldade (b)']:.3f},{item['Discriminacao (a)']:.3f},{item['% Acerto']:.1f}%,{acao}\n")
-        buffer.write("\n")
-    
-    # Secao 7: Analise Individual (se aluno selecionado)
-    if aluno_selecionado:
-        aluno_data = student_results[student_results['Aluno'] == aluno_selecionado].iloc[0]
-        rank = list(student_results.sort_values('Proficiencia (θ)', ascending=False)['Aluno']).index(aluno_selecionado) + 1
-        
-        buffer.write(f"=== ANALISE INDIVIDUAL: {aluno_selecionado} ===\n")
-        buffer.write("Metrica,Valor\n")
-        buffer.write(f"Proficiencia (θ),{aluno_data['Proficiencia (θ)']:.3f}\n")
-        buffer.write(f"Pontuacao,{int(aluno_data['Pontuacao Total'])}/{len(item_results)}\n")
-        buffer.write(f"Percentual de acerto,{aluno_data['Percentual de Acerto']:.1f}%\n")
-        buffer.write(f"Posicao no ranking,{rank}º de {len(student_results)}\n")
-        
-        # Verificar se e tutor
-        if aluno_selecionado in top_tutors['Aluno'].values:
-            tutor_info = top_tutors[top_tutors['Aluno'] == aluno_selecionado].iloc[0]
-            buffer.write(f"E tutor potencial?,Sim\n")
-            buffer.write(f"Score como tutor,{tutor_info['Score_Tutor']:.3f}\n")
-            buffer.write(f"Posicao entre tutores,{tutor_info['Posicao']}º\n")
-        else:
-            buffer.write(f"E tutor potencial?,Nao\n")
-        
-        buffer.write("\n")
-        
-        # Interpretacao da proficiencia
-        theta = aluno_data['Proficiencia (θ)']
-        buffer.write("=== INTERPRETACAO DA PROFICIENCIA ===\n")
-        if theta < -1.5:
-            buffer.write("Classificacao,MUITO BAIXA\n")
-            buffer.write("Recomendacao,Intervencao pedagogica imediata\n")
-            buffer.write("Sugestao,Acompanhamento individual com tutor\n")
-        elif theta < -0.5:
-            buffer.write("Classificacao,BAIXA\n")
-            buffer.write("Recomendacao,Reforco escolar\n")
-            buffer.write("Sugestao,Participar de grupos de estudo\n")
-        elif theta < 0.5:
-            buffer.write("Classificacao,MEDIA\n")
-            buffer.write("Recomendacao,Manter ritmo atual\n")
-            buffer.write("Sugestao,Praticar questoes dificeis\n")
-        elif theta < 1.5:
-            buffer.write("Classificacao,ALTA\n")
-            buffer.write("Recomendacao,Atuar como tutor\n")
-            buffer.write("Sugestao,Desafios adicionais\n")
-        else:
-            buffer.write("Classificacao,MUITO ALTA\n")
-            buffer.write("Recomendacao,Tutor principal\n")
-            buffer.write("Sugestao,Atividades avancadas\n")
-        buffer.write("\n")
+            for row in chunk.itertuples(index=False, name=None):
+                if written >= EXCEL_MAX_ROWS:
+                    part += 1
+                    worksheet = workbook.create_sheet(f"{sheet_name[:24]} ({part})")
+                    worksheet.append(header)
+                    written = 1
+                worksheet.append(row)
+                written += 1
+            
+            report_rows(len(chunk), sheet_name)
         
-        # Detalhamento por questao do aluno
-        aluno_detailed = detailed_df[detailed_df['Aluno'] == aluno_selecionado]
-        buffer.write("=== DETALHAMENTO POR QUESTAO ===\n")
-        aluno_detailed[['Questao', 'Resposta_Aluno', 'Resposta_Correta', 'Acerto', 'Dificuldade_Questao']].to_csv(buffer, index=False)
+        if len(df) == 0:
+            report_rows(0, sheet_name)
     
-    return buffer.getvalue()
+    workbook.save(output)
+
+def write_zip_streaming(output, sheets, report_rows):
+    """Grava cada DataFrame como um CSV comprimido dentro do ZIP, membro a membro e bloco a bloco"""
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for _, file_name, df in sheets:
+            member = zip_file.open(file_name, 'w', force_zip64=True)
+            with io.TextIOWrapper(member, encoding='utf-8', newline='') as csv_stream:
+                for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+                    chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+                    chunk.to_csv(csv_stream, index=False, header=(start == 0))
+                    report_rows(len(chunk), file_name)
 
 # --- Funcao para exportar Excel (com fallback se openpyxl nao disponivel) ---
-def export_to_excel(df_binary, student_results, item_results, detailed_df):
-    """Exporta dados para Excel com fallback para CSV se openpyxl nao estiver disponivel"""
+def export_to_excel(df_binary, student_results, item_results, detailed_df, progress_callback=None, streaming=None, top_tutors=None):
+    """Exporta dados para Excel com fallback para CSV se openpyxl nao estiver disponivel
+    
+    O arquivo é gravado em disco e a função retorna (caminho, mime). Com
+    streaming=True (automático para tabelas detalhadas grandes) as abas são
+    gravadas em blocos por um workbook write-only, então a geração mantém em
+    memória só um bloco de EXPORT_CHUNK_ROWS linhas além das tabelas da análise.
+    Erros na gravação removem o arquivo parcial e são repassados a quem chamou.
+    """
+    
+    if top_tutors is None:
+        top_tutors = get_top_tutors(student_results, 10)
+    sheets = [
+        ('Respostas Binarias', 'respostas_binarias.csv', df_binary),
+        ('Resultados Alunos', 'resultados_alunos.csv', student_results),
+        ('Analise Questoes', 'analise_questoes.csv', item_results),
+        ('Detalhado', 'detalhado.csv', detailed_df)
+    ]
+    if len(top_tutors) > 0:
+        sheets.append(('Top Tutores', 'top_tutores.csv', top_tutors))
+    
+    if streaming is None:
+        streaming = len(detailed_df) >= STREAMING_EXPORT_MIN_ROWS
+    
+    total_rows = sum(max(len(df), 1) for _, _, df in sheets)
+    rows_done = 0
+    
+    def report_rows(n_rows, name):
+        nonlocal rows_done
+        rows_done += max(n_rows, 1)
+        if progress_callback is not None:
+            progress_callback(min(rows_done / total_rows, 1.0), f"Exportando {name} ({rows_done:,}/{total_rows:,} linhas)...")
     
+    # O arquivo vai direto para disco; o cache de exportações guarda só o caminho
     if OPENPYXL_AVAILABLE:
+        path = new_export_path('.xlsx')
         try:
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                df_binary.to_excel(writer, sheet_name='Respostas Binarias', index=False)
-                student_results.to_excel(writer, sheet_name='Resultados Alunos', index=False)
-                item_results.to_excel(writer, sheet_name='Analise Questoes', index=False)
-                detailed_df.to_excel(writer, sheet_name='Detalhado', index=False)
-                
-                # Adicionar aba de tutores
-                top_tutors = get_top_tutors(student_results, 10)
-                if len(top_tutors) > 0:
-                    top_tutors.to_excel(writer, sheet_name='Top Tutores', index=False)
-            
-            return excel_buffer.getvalue(), 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        except Exception as e:
-            st.error(f"Erro ao criar Excel: {str(e)}")
-            # Fallback para CSV
-            return None, None
-    else:
-        # Criar um arquivo ZIP com multiplos CSVs
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-            # Adicionar cada dataframe como CSV separado
-            zip_file.writestr('respostas_binarias.csv', df_binary.to_csv(index=False))
-            zip_file.writestr('resultados_alunos.csv', student_results.to_csv(index=False))
-            zip_file.writestr('analise_questoes.csv', item_results.to_csv(index=False))
-            zip_file.writestr('detalhado.csv', detailed_df.to_csv(index=False))
-            
-            # Adicionar CSV de tutores
-            top_tutors = get_top_tutors(student_results, 10)
-            if len(top_tutors) > 0:
-                zip_file.writestr('top_tutores.csv', top_tutors.to_csv(index=False))
-        
-        return zip_buffer.getvalue(), 'application/zip'
+            with open(path, 'wb') as output:
+                if streaming:
+                    write_excel_streaming(output, sheets, report_rows)
+                else:
+                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                        for sheet_name, _, df in sheets:
+                            df.to_excel(writer, sheet_name=sheet_name, index=False)
+                            report_rows(len(df), sheet_name)
+        except Exception:
+            path.unlink(missing_ok=True)
+            raise
+        return path, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    
+    # Criar um arquivo ZIP com multiplos CSVs
+    path = new_export_path('.zip')
+    try:
+        with open(path, 'wb') as output:
+            write_zip_streaming(output, sheets, report_rows)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return path, 'application/zip'
+
+def export_report_cards(analysis, formatos, progress_callback=None):
+    """Boletins individuais de todos os alunos (TXT/CSV/HTML) em um único ZIP
+    
+    Ranking e tutores são calculados uma vez e compartilhados por todos os
+    boletins; a geração é distribuída entre processos em turmas grandes. O ZIP
+    é gravado em disco e a função retorna o caminho.
+    """
+    student_results = analysis['student_results']
+    dados = boletins.preparar_dados(
+        student_results, analysis['item_results'], analysis['detailed_df'],
+        analysis['ranking'], analysis_top_tutors(analysis)
+    )
+    
+    path = new_export_path('.zip')
+    try:
+        with open(path, 'wb') as output:
+            boletins.gravar_zip(output, dados, formatos, progress_callback)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+# --- Funcoes para exportar JSON estruturado e Parquet (colunar) ---
+def build_export_metadata(analysis):
+    """Metadados da análise compartilhados pelas exportações JSON e Parquet"""
+    student_results = analysis['student_results']
+    item_results = analysis['item_results']
+    
+    return {
+        'data_analise': datetime.now().isoformat(),
+        'total_alunos': len(student_results),
+        'total_questoes': analysis['num_questoes'],
+        'proficiencia_media': float(student_results['Proficiencia (θ)'].mean()),
+        'desvio_padrao_proficiencia': float(student_results['Proficiencia (θ)'].std()),
+        'taxa_acerto_media': float(student_results['Percentual de Acerto'].mean()),
+        'confiabilidade': float(calculate_reliability(item_results))
+    }
+
+def build_json_export(analysis):
+    """Serializa a análise no formato JSON lido pela página de Análise Trimestral"""
+    student_results = analysis['student_results']
+    item_results = analysis['item_results']
+    
+    top_tutors = analysis_top_tutors(analysis)
+    json_data = {
+        'metadata': build_export_metadata(analysis),
+        'gabarito': analysis['gabarito'],
+        'resumo_alunos': student_results.to_dict('records'),
+        'resumo_questoes': item_results.to_dict('records')
+    }
+    
+    if len(top_tutors) > 0:
+        json_data['top_tutores'] = top_tutors.to_dict('records')
+    
+    # Matriz de acertos compacta (uma string de 0/1 por aluno), usada pela calibração concorrente
+    acertos = np.asarray(analysis['response_matrix'], dtype=np.uint8) + ord('0')
+    json_data['respostas'] = {
+        'alunos': student_results['Aluno'].tolist(),
+        'questoes': item_results['Questao'].tolist(),
+        'acertos': [linha.tobytes().decode('ascii') for linha in acertos]
+    }
+    
+    return json.dumps(json_data, indent=2, ensure_ascii=False)
+
+def build_parquet_export(analysis):
+    """Exporta a análise em formato colunar: um ZIP com uma tabela Parquet por seção.
+    
+    As seções usam os mesmos nomes do JSON (resumo_alunos, resumo_questoes,
+    top_tutores, detalhado) e os metadados/gabarito vão em metadata.json, de
+    modo que a página de Análise Trimestral possa ler apenas as colunas que usa.
+    """
+    student_results = analysis['student_results']
+    tables = {
+        'resumo_alunos': student_results,
+        'resumo_questoes': analysis['item_results'],
+        'detalhado': analysis['detailed_df']
+    }
+    top_tutors = analysis_top_tutors(analysis)
+    if len(top_tutors) > 0:
+        tables['top_tutores'] = top_tutors
+    
+    zip_buffer = io.BytesIO()
+    # Parquet já é comprimido internamente; os membros são apenas armazenados
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+        zip_file.writestr('metadata.json', json.dumps({
+            'metadata': build_export_metadata(analysis),
+            'gabarito': analysis['gabarito']
+        }, ensure_ascii=False))
+        for name, df in tables.items():
+            with zip_file.open(f'{name}.parquet', 'w', force_zip64=True) as member:
+                df.to_parquet(member, engine='pyarrow', index=False)
+    
+    return zip_buffer.getvalue()
+
+# --- Cache de exportações (geradas sob demanda) ---
+def get_cached_export(analysis, formato, gerar=None):
+    """Retorna a exportação em cache para (digest da análise, formato).
+    
+    Se ainda não existir e `gerar` for informado, gera o arquivo e guarda no
+    cache da sessão; sem `gerar`, apenas consulta (retorna None se ausente).
+    """
+    cache = st.session_state.setdefault('exports_cache', {})
+    chave = (analysis['digest'], formato)
+    
+    if chave in cache and not all(path.exists() for path in export_files(cache[chave])):
+        # Arquivo apagado pela limpeza de exportações antigas: gerar de novo
+        cache.pop(chave)
+    
+    if chave not in cache and gerar is not None:
+        # Descartar exportações de análises anteriores
+        for antiga in [c for c in cache if c[0] != analysis['digest']]:
+            remove_export_files(cache.pop(antiga))
+        resultado = gerar()
+        # Falhas não ficam em cache: o próximo clique tenta gerar de novo
+        if resultado is None or (isinstance(resultado, tuple) and all(item is None for item in resultado)):
+            return None
+        cache[chave] = resultado
+    
+    return cache.get(chave)
+
+# --- Tabela com os resultados de todos os alunos (exibida paginada) ---
+@st.cache_resource(max_entries=8, show_spinner=False)
+def ranking_table(digest, _student_results, _ranking):
+    """Resultados de todos os alunos na ordem do ranking, com posição e percentil"""
+    columns = ['Aluno', 'ID Aluno'] if 'ID Aluno' in _student_results.columns else ['Aluno']
+    table = _student_results.iloc[_ranking['ordem']][columns + [
+        'Proficiencia (θ)', 'Pontuacao Total', 'Percentual de Acerto', 'Classificacao', 'Pontos Fracos'
+    ]]
+    table.insert(0, 'Posicao', _ranking['posicao'][_ranking['ordem']])
+    table.insert(1, 'Percentil', _ranking['percentil'][_ranking['ordem']])
+    return table.reset_index(drop=True)
 
 # --- Função para criar logo em base64 a partir da imagem ---
 def create_logo_html():
@@ -999,6 +1138,895 @@ def create_logo_html():
         </div>
         '''
 
+# --- Funções para a grade de entrada manual ---
+RESPOSTAS_VALIDAS = ["-", "A", "B", "C", "D", "E"]
+
+def build_answer_grid(num_alunos, num_questoes, grade_anterior=None):
+    """Monta a grade alunos x questões, preservando as respostas já digitadas"""
+    colunas = ['Aluno'] + [f'Q{i+1}' for i in range(num_questoes)]
+    grade = pd.DataFrame('-', index=range(num_alunos), columns=colunas)
+    grade['Aluno'] = [f'Aluno {i + 1}' for i in range(num_alunos)]
+    
+    if isinstance(grade_anterior, pd.DataFrame) and len(grade_anterior) > 0:
+        # Copiar em bloco as linhas/colunas que continuam existindo
+        linhas = min(num_alunos, len(grade_anterior))
+        comuns = [c for c in colunas if c in grade_anterior.columns]
+        posicoes = [grade.columns.get_loc(c) for c in comuns]
+        grade.iloc[:linhas, posicoes] = grade_anterior[comuns].iloc[:linhas].to_numpy()
+    
+    return grade
+
+def answer_grid_column_config(num_questoes):
+    """Configuração das colunas da grade: nome livre e respostas restritas a A-E"""
+    config = {
+        'Aluno': st.column_config.TextColumn("Aluno", required=True, width="medium")
+    }
+    for i in range(num_questoes):
+        config[f'Q{i+1}'] = st.column_config.SelectboxColumn(
+            f'Q{i+1}',
+            options=RESPOSTAS_VALIDAS,
+            required=True,
+            width="small"
+        )
+    return config
+
+# --- Análise completa (handle em cache compartilhado pelas abas) ---
+def build_detailed_df(student_results, item_results, response_matrix, df_original, gabarito):
+    """Monta a tabela longa aluno x questão de forma vetorizada"""
+    n_alunos = len(student_results)
+    questoes = list(gabarito.keys())
+    num_questoes = len(questoes)
+    
+    # Respostas originais (letras); colunas ausentes ficam como 'N/A'
+    respostas = np.full((n_alunos, num_questoes), 'N/A', dtype=object)
+    disponiveis = max(0, min(num_questoes, df_original.shape[1] - 1))
+    respostas[:, :disponiveis] = df_original.iloc[:, 1:disponiveis + 1].to_numpy()
+    
+    return pd.DataFrame({
+        'Aluno': np.repeat(student_results['Aluno'].to_numpy(), num_questoes),
+        'Questao': np.tile(questoes, n_alunos),
+        'Resposta_Aluno': respostas.ravel(),
+        'Resposta_Correta': np.tile([gabarito[q] for q in questoes], n_alunos),
+        'Acerto': response_matrix[:, :num_questoes].ravel(),
+        'Proficiencia_Aluno': np.repeat(student_results['Proficiencia (θ)'].to_numpy(), num_questoes),
+        'Dificuldade_Questao': np.tile(item_results['Dificuldade (b)'].to_numpy()[:num_questoes], n_alunos),
+        'Discriminacao_Questao': np.tile(item_results['Discriminacao (a)'].to_numpy()[:num_questoes], n_alunos)
+    })
+
+# Regras das recomendações pedagógicas (limites de θ de cada faixa, em ordem crescente)
+RECOMMENDATION_LIMITS = (-1.0, 0.0, 1.0)
+RECOMMENDATION_CATEGORIES = ('Atencao Especial', 'Acompanhamento', 'Adequado', 'Excelente')
+CLASSIFICATION_LIMITS = (-1.5, -0.5, 0.5, 1.5)
+CLASSIFICATION_LABELS = ('MUITO BAIXA', 'BAIXA', 'MEDIA', 'ALTA', 'MUITO ALTA')
+# Ponto fraco: questão errada que o modelo esperava que o aluno acertasse
+WEAKNESS_MIN_PROB = 0.5
+WEAKNESS_MAX_ITEMS = 3
+
+def build_recommendations(student_results, item_results, response_matrix,
+                          recommendation_limits=RECOMMENDATION_LIMITS,
+                          classification_limits=CLASSIFICATION_LIMITS,
+                          weakness_min_prob=WEAKNESS_MIN_PROB, weakness_max_items=WEAKNESS_MAX_ITEMS):
+    """Recomendações de todos os alunos de uma vez
+    
+    - Categoria Recomendacao / Classificacao: faixas de θ por np.searchsorted,
+      com as mesmas fronteiras das regras originais: Classificacao usa θ < limite;
+      Recomendacao usa θ < -1, θ < 0 e θ > 1 (θ = 1 ainda é 'Adequado')
+    - Pontos Fracos: até `weakness_max_items` questões erradas com maior
+      probabilidade de acerto esperada pelo modelo 2PL (P >= weakness_min_prob)
+    """
+    theta = student_results['Proficiencia (θ)'].to_numpy(dtype=float)
+    categorias = np.searchsorted(recommendation_limits[:-1], theta, side='right')
+    categorias += theta > recommendation_limits[-1]
+    classificacoes = np.searchsorted(classification_limits, theta, side='right')
+    
+    # Probabilidade esperada de acerto (alunos × questões) apenas nas questões erradas
+    questoes = item_results['Questao'].astype(str).to_numpy()
+    a = item_results['Discriminacao (a)'].to_numpy(dtype=float)
+    b = item_results['Dificuldade (b)'].to_numpy(dtype=float)
+    erros = np.asarray(response_matrix)[:, :len(questoes)] == 0
+    esperado = np.where(erros, 1 / (1 + np.exp(-a * (theta[:, None] - b))), 0.0)
+    
+    k = min(weakness_max_items, len(questoes))
+    if k > 0:
+        candidatas = np.argpartition(-esperado, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(esperado, candidatas, axis=1)
+        ordem = np.argsort(-valores, axis=1, kind='stable')
+        candidatas = np.take_along_axis(candidatas, ordem, axis=1)
+        validas = np.take_along_axis(valores, ordem, axis=1) >= weakness_min_prob
+        nomes = np.where(validas, questoes[candidatas], '')
+        pontos_fracos = [', '.join(filter(None, linha)) for linha in nomes.tolist()]
+    else:
+        pontos_fracos = [''] * len(theta)
+    
+    return pd.DataFrame({
+        'Categoria Recomendacao': np.asarray(RECOMMENDATION_CATEGORIES)[categorias],
+        'Classificacao': np.asarray(CLASSIFICATION_LABELS)[classificacoes],
+        'Pontos Fracos': pontos_fracos
+    }, index=student_results.index)
+
+def build_ranking_index(student_results):
+    """Ranking da turma calculado uma única vez (consultas por aluno em O(1))
+    
+    - ordem: linhas de student_results da maior para a menor proficiência
+    - posicao: posição no ranking de cada linha (1 = maior θ)
+    - posicao_densa: posição com empates compartilhados (1, 2, 2, 3...)
+    - percentil: % da turma com proficiência menor ou igual à do aluno
+    - linha_por_aluno: nome do aluno (como texto) -> linha em student_results;
+      consultar com student_row
+    """
+    theta = student_results['Proficiencia (θ)'].to_numpy(dtype=float)
+    n_alunos = len(theta)
+    
+    ordem = np.argsort(-theta, kind='stable')
+    posicao = np.empty(n_alunos, dtype=int)
+    posicao[ordem] = np.arange(1, n_alunos + 1)
+    
+    valores, inverso = np.unique(theta, return_inverse=True)
+    posicao_densa = len(valores) - inverso
+    percentil = 100 * np.searchsorted(np.sort(theta), theta, side='right') / max(n_alunos, 1)
+    
+    # Nomes repetidos apontam para a primeira ocorrência
+    nomes = student_results['Aluno'].astype(str).to_numpy()
+    linha_por_aluno = {nome: linha for linha, nome in reversed(list(enumerate(nomes)))}
+    
+    return {
+        'ordem': ordem,
+        'posicao': posicao,
+        'posicao_densa': posicao_densa,
+        'percentil': percentil,
+        'linha_por_aluno': linha_por_aluno
+    }
+
+def student_row(ranking, aluno):
+    """Linha em student_results do aluno de nome `aluno` (nomes numéricos ou vazios inclusive)"""
+    return ranking['linha_por_aluno'][str(aluno)]
+
+def student_detail_rows(detail_offsets, linha):
+    """Faixa de detailed_df com as questões do aluno da linha `linha` de student_results"""
+    return slice(detail_offsets[linha], detail_offsets[linha + 1])
+
+def analysis_digest(df_binary, df_original, gabarito, ids_alunos=None, ids_questoes=None):
+    """Identificador estável da análise (respostas em letras e binárias + gabarito), usado como chave de cache"""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(df_binary, index=False).to_numpy().tobytes())
+    # As letras entram nas exportações (Resposta_Aluno): trocar B por C em uma
+    # questão errada não altera df_binary, mas precisa invalidar os arquivos
+    digest.update(pd.util.hash_pandas_object(df_original, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(gabarito, sort_keys=True).encode('utf-8'))
+    if ids_alunos is not None:
+        digest.update(pd.util.hash_pandas_object(ids_alunos, index=False).to_numpy().tobytes())
+    if ids_questoes is not None:
+        digest.update(json.dumps(ids_questoes).encode('utf-8'))
+    return digest.hexdigest()
+
+# Cabeçalhos aceitos para a coluna opcional de identificação do aluno no CSV
+COLUNAS_ID_ALUNO = ('id', 'id aluno', 'matricula', 'matrícula', 'ra', 'codigo', 'código')
+
+def student_id_column(columns):
+    """Coluna opcional de identificação do aluno (a primeira coluna é sempre o nome)"""
+    for coluna in columns[1:]:
+        if str(coluna).strip().casefold() in COLUNAS_ID_ALUNO:
+            return coluna
+    return None
+
+def read_answers_csv(arquivo):
+    """Lê o CSV de respostas com a coluna de ID como texto
+    
+    Uma matrícula numérica com alguma célula vazia seria lida como float
+    ('123.0'), e o mesmo aluno teria identidades diferentes entre avaliações.
+    """
+    coluna_id = student_id_column(pd.read_csv(arquivo, nrows=0).columns)
+    arquivo.seek(0)
+    return pd.read_csv(arquivo, dtype=None if coluna_id is None else {coluna_id: str})
+
+def extract_student_ids(df):
+    """Separa a coluna opcional de identificação do aluno (ID/matrícula) das respostas.
+    
+    Retorna (df sem a coluna, IDs como texto) ou (df, None) quando não há coluna de ID.
+    """
+    coluna = student_id_column(df.columns)
+    if coluna is None:
+        return df, None
+    
+    ids = df[coluna]
+    if pd.api.types.is_float_dtype(ids) and (ids.dropna() % 1 == 0).all():
+        # IDs inteiros lidos como float por causa de células vazias: 123.0 -> '123'
+        ids = ids.astype('Int64')
+    ids = ids.astype('string').str.strip().replace('', pd.NA).reset_index(drop=True)
+    return df.drop(columns=[coluna]), ids.rename('ID Aluno')
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_analysis(df_binary, df_original, gabarito, ids_alunos=None, ids_questoes=None):
+    """Executa a análise TRI e reúne todos os resultados usados pelas abas
+    
+    Cada sessão recebe a sua própria cópia do resultado em cache, então as
+    abas podem alterar os DataFrames sem afetar as análises de outros usuários.
+    """
+    student_results, item_results, cci_df, model_params, response_matrix, df_responses = run_advanced_tri_analysis(df_binary)
+    if ids_alunos is not None:
+        # ID estável do aluno (usado pela Análise Trimestral para juntar avaliações)
+        student_results = student_results.copy()
+        student_results.insert(1, 'ID Aluno', ids_alunos.to_numpy())
+    if ids_questoes is not None:
+        # Código estável da questão (itens comuns entre avaliações na Análise Trimestral)
+        item_results = item_results.copy()
+        item_results.insert(1, 'ID Questao', ids_questoes)
+    # Recomendações pedagógicas de todos os alunos (lidas pelas abas, relatórios e exportações)
+    student_results = pd.concat(
+        [student_results, build_recommendations(student_results, item_results, response_matrix)], axis=1
+    )
+    detailed_df = build_detailed_df(student_results, item_results, response_matrix, df_original, gabarito)
+    
+    return {
+        'digest': analysis_digest(df_binary, df_original, gabarito, ids_alunos, ids_questoes),
+        'student_results': student_results,
+        'item_results': item_results,
+        'cci_df': cci_df,
+        'model_params': model_params,
+        'response_matrix': response_matrix,
+        'df_responses': df_responses,
+        'detailed_df': detailed_df,
+        # build_detailed_df grava as questões de cada aluno em linhas contíguas,
+        # na ordem de student_results: o aluno i ocupa [offsets[i], offsets[i + 1])
+        'detail_offsets': np.arange(len(student_results) + 1) * len(gabarito),
+        'ranking': build_ranking_index(student_results),
+        'df_binary': df_binary,
+        'gabarito': gabarito,
+        'num_questoes': len(gabarito)
+    }
+
+# --- Seções das abas (fragments reexecutados de forma independente) ---
+@st.fragment
+def render_dashboard_tab(analysis):
+    """Aba Dashboard: métricas gerais, gráficos da turma e ranking"""
+    student_results = analysis['student_results']
+    item_results = analysis['item_results']
+    ranking = analysis['ranking']
+    
+    st.markdown('<h2 class="sub-header">📊 Dashboard de Análise</h2>', unsafe_allow_html=True)
+    
+    # Métricas Principais
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("👥 **Alunos**", len(student_results))
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        mean_theta = student_results['Proficiencia (θ)'].mean()
+        st.metric("📈 **Proficiência Média**", f"{mean_theta:.2f}")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        mean_score = student_results['Percentual de Acerto'].mean()
+        st.metric("🎯 **Taxa de Acerto**", f"{mean_score:.1f}%")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        reliability = calculate_reliability(item_results)
+        st.metric("🛡️ **Confiabilidade**", f"{reliability:.3f}")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Panorama Geral da Turma
+    figuras = dashboard_figures(analysis['digest'], student_results, item_results)
+    st.markdown("### 🌟 **Panorama Geral da Turma**")
+    st.plotly_chart(figuras['panorama'], use_container_width=True)
+    
+    # Gráficos adicionais
+    col_graph1, col_graph2 = st.columns(2)
+    
+    with col_graph1:
+        st.plotly_chart(figuras['theta'], use_container_width=True)
+    
+    with col_graph2:
+        st.plotly_chart(figuras['questoes'], use_container_width=True)
+    
+    # Ranking de Alunos
+    st.markdown("### 🏆 **Ranking de Alunos**")
+    
+    col_rank1, col_rank2 = st.columns([3, 2])
+    
+    with col_rank1:
+        # Top 10 alunos
+        top_students = student_results.iloc[ranking['ordem'][:10]].copy()
+        top_students['Posicao'] = ranking['posicao'][ranking['ordem'][:10]]
+        top_students = top_students[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto']]
+        
+        # Exibir DataFrame
+        st.dataframe(top_students, use_container_width=True)
+    
+    with col_rank2:
+        st.markdown("### ⚠️ **Questões Problemáticas**")
+        
+        problematic_items = item_results[
+            (item_results['Discriminacao (a)'] < 0.3) | 
+            (item_results['% Acerto'] < 20) | 
+            (item_results['% Acerto'] > 90)
+        ]
+        
+        if len(problematic_items) > 0:
+            for _, item in problematic_items.head(3).iterrows():
+                issues = []
+                if item['Discriminacao (a)'] < 0.3:
+                    issues.append("📉 Baixa discriminação")
+                if item['% Acerto'] < 20:
+                    issues.append("🔴 Muito difícil")
+                if item['% Acerto'] > 90:
+                    issues.append("🟢 Muito fácil")
+                
+                st.warning(f"**{item['Questao']}**: {', '.join(issues)}")
+        else:
+            st.success("✅ **Todas as questões estão dentro dos parâmetros adequados!**")
+
+    # Resultados completos, paginados no servidor (só a página visível é enviada)
+    with st.expander("📋 **Resultados Completos dos Alunos**"):
+        tabelas.tabela_paginada(
+            ranking_table(analysis['digest'], student_results, ranking),
+            "tabela_alunos", analysis['digest'],
+            colunas_busca=[c for c in ('Aluno', 'ID Aluno', 'Classificacao') if c in student_results.columns],
+            formato={'Percentil': '{:.1f}', 'Proficiencia (θ)': '{:.3f}', 'Percentual de Acerto': '{:.1f}%'},
+            hide_index=True
+        )
+
+    with st.expander("📋 **Resultados das Questões**"):
+        tabelas.tabela_paginada(
+            item_results, "tabela_questoes", analysis['digest'],
+            colunas_busca=['Questao'],
+            hide_index=True
+        )
+
+# Texto exibido na aba Individual para cada categoria de recomendação: (classe da caixa, markdown)
+RECOMMENDATION_BLOCKS = {
+    'Atencao Especial': ('warning-box', """
+            ### 🔴 **Atenção Especial Necessária**
+            - **Proficiência significativamente abaixo** da média
+            - **Recomenda-se:** Atividades de reforço intensivo
+            - **Sugestão:** Tutoria individualizada com aluno-tutor
+            - **Acompanhamento:** Monitoramento constante
+            """),
+    'Acompanhamento': ('warning-box', """
+            ### 🟡 **Acompanhamento Recomendado**
+            - **Proficiência abaixo** da média
+            - **Recomenda-se:** Reforço nos tópicos com dificuldade
+            - **Sugestão:** Grupo de estudos com tutores
+            - **Acompanhamento:** Avaliação periódica
+            """),
+    'Adequado': ('info-box', """
+            ### 🔵 **Desempenho Adequado**
+            - **Proficiência dentro** da média esperada
+            - **Manter:** Ritmo atual de estudos
+            - **Sugestão:** Aprimoramento contínuo
+            - **Acompanhamento:** Regular
+            """),
+    'Excelente': ('info-box', """
+            ### 🟢 **Excelente Desempenho**
+            - **Proficiência significativamente acima** da média
+            - **Recomenda-se:** Desafios adicionais
+            - **Sugestão:** Atuação como tutor de colegas
+            - **Potencial:** Desenvolvimento avançado
+            """)
+}
+
+@st.fragment
+def render_individual_tab(analysis):
+    """Aba Análise Individual: desempenho e recomendações de um aluno"""
+    student_results = analysis['student_results']
+    ranking = analysis['ranking']
+    detailed_df = analysis['detailed_df']
+    num_questoes = analysis['num_questoes']
+    
+    st.markdown('<h2 class="sub-header">👨‍🎓 Análise Individual</h2>', unsafe_allow_html=True)
+    
+    # Seletor de aluno
+    # Opções são posições em student_results: alunos homônimos continuam distintos
+    nomes = student_results['Aluno'].tolist()
+    linha = st.selectbox(
+        "**Selecione um aluno para análise detalhada:**",
+        range(len(nomes)),
+        format_func=lambda posicao: str(nomes[posicao]),
+        help="Clique no nome do aluno para ver seu desempenho completo",
+        key="aluno_selecionado_tab2"
+    )
+    
+    if linha is not None:
+        aluno_selecionado = nomes[linha]
+        aluno_data = student_results.iloc[linha]
+        
+        # Cartões de métricas
+        col_a1, col_a2, col_a3, col_a4 = st.columns(4)
+        
+        with col_a1:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            theta = aluno_data['Proficiencia (θ)']
+            status = "⏫ Acima" if theta > 0 else "⏬ Abaixo"
+            st.metric("🎓 **Proficiência (θ)**", f"{theta:.2f}", delta=status)
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with col_a2:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            score = int(aluno_data['Pontuacao Total'])
+            total = num_questoes
+            st.metric("📝 **Pontuação**", f"{score}/{total}")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with col_a3:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            percent = aluno_data['Percentual de Acerto']
+            st.metric("✅ **% Acerto**", f"{percent:.1f}%")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with col_a4:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            rank = ranking['posicao'][linha]
+            total = len(student_results)
+            st.metric("🏅 **Posição**", f"{rank}º/{total}",
+                      delta=f"Percentil {ranking['percentil'][linha]:.0f}", delta_color="off")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Gráfico de desempenho
+        st.plotly_chart(
+            plot_student_progress_dark(detailed_df, aluno_selecionado,
+                                       student_detail_rows(analysis['detail_offsets'], linha)),
+            use_container_width=True
+        )
+        
+        # Verificar se é tutor potencial
+        top_tutors = analysis_top_tutors(analysis)
+        if len(top_tutors) > 0 and aluno_selecionado in top_tutors['Aluno'].values:
+            tutor_info = top_tutors[top_tutors['Aluno'] == aluno_selecionado].iloc[0]
+            st.markdown('<div class="info-box">', unsafe_allow_html=True)
+            st.markdown(f"### 👨‍🏫 **Potencial Tutor de Colegas**")
+            st.markdown(f"**Score como tutor:** {tutor_info['Score_Tutor']:.2f}")
+            st.markdown(f"**Posição entre tutores:** {tutor_info['Posicao']}º")
+            st.markdown("**Sugestão:** Este aluno pode auxiliar 2-3 colegas com dificuldades")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Dicas pedagógicas
+        st.markdown("### 👨‍🏫 **Recomendações Pedagógicas**")
+        
+        caixa, texto = RECOMMENDATION_BLOCKS[aluno_data['Categoria Recomendacao']]
+        st.markdown(f'<div class="{caixa}">', unsafe_allow_html=True)
+        st.markdown(texto)
+        if aluno_data['Pontos Fracos']:
+            st.markdown(f"**🎯 Questões para reforçar:** {aluno_data['Pontos Fracos']}")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def render_tutors_tab(analysis):
+    """Aba Tutores de Colegas: seleção de tutores e sugestões de grupos"""
+    student_results = analysis['student_results']
+    
+    st.markdown('<h2 class="sub-header">👨‍🏫 Tutores de Colegas</h2>', unsafe_allow_html=True)
+    
+    # Identificar os melhores tutores
+    top_tutors = analysis_top_tutors(analysis)
+    
+    if len(top_tutors) > 0:
+        st.markdown("### 🏆 **Top 10 Alunos com Potencial para Tutoria**")
+        st.markdown(f"""
+        **Critérios para seleção de tutores:**
+        - Proficiência (θ) > {TUTOR_MIN_THETA:g}
+        - Taxa de acerto > {TUTOR_MIN_ACERTO:g}%
+        - Score combinado de desempenho
+        """)
+        
+        # Mostrar tabela de tutores
+        display_tutors = top_tutors[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto', 'Score_Tutor']].copy()
+        display_tutors['Proficiencia (θ)'] = display_tutors['Proficiencia (θ)'].round(2)
+        display_tutors['Percentual de Acerto'] = display_tutors['Percentual de Acerto'].round(1)
+        display_tutors['Score_Tutor'] = display_tutors['Score_Tutor'].round(3)
+        
+        st.dataframe(display_tutors, use_container_width=True)
+        
+        # Sugestões para formação de grupos
+        st.markdown("### 👥 **Sugestões para Formação de Grupos**")
+        
+        col_g1, col_g2 = st.columns(2)
+        
+        with col_g1:
+            st.markdown("#### **Grupos Heterogêneos**")
+            st.markdown("""
+            **Estratégia:** 1 tutor + 2-3 alunos com dificuldades
+            
+            **Vantagens:**
+            - Aprendizagem colaborativa
+            - Desenvolvimento de liderança
+            - Redução da carga do professor
+            - Personalização do ensino
+            """)
+        
+        with col_g2:
+            st.markdown("#### **Plano de Ação**")
+            st.markdown("""
+            **1. Organização:**
+            - Formar grupos semanais
+            - Definir horários fixos
+            
+            **2. Monitoramento:**
+            - Avaliações quinzenais
+            - Feedback dos tutores
+            - Ajuste de grupos
+            
+            **3. Reconhecimento:**
+            - Certificados de mérito
+            - Menções honrosas
+            - Incentivos pedagógicos
+            """)
+        
+        # Formação automática dos grupos (um tutor por grupo, fraquezas complementares)
+        st.markdown("### 🧩 **Formar Grupos de Estudo**")
+        col_f1, col_f2 = st.columns([1, 2])
+        with col_f1:
+            tamanho_grupo = st.number_input("**Alunos por grupo:**", min_value=2, max_value=10, value=4, key="tamanho_grupo")
+        with col_f2:
+            st.caption(
+                "Cada grupo recebe um tutor; os demais alunos são distribuídos para equilibrar a "
+                "proficiência média e cobrir as questões que cada um errou com colegas que as acertaram."
+            )
+        
+        if st.button("👥 **Formar Grupos**", use_container_width=True):
+            with st.spinner("Formando grupos..."):
+                get_cached_export(analysis, ('grupos', tamanho_grupo), lambda: build_study_groups(analysis, tamanho_grupo))
+        
+        grupos_estudo = get_cached_export(analysis, ('grupos', tamanho_grupo))
+        if grupos_estudo is not None:
+            integrantes, resumo_grupos = grupos_estudo
+            col_m1, col_m2, col_m3 = st.columns(3)
+            col_m1.metric("Grupos", len(resumo_grupos))
+            col_m2.metric("Cobertura média", f"{resumo_grupos['Cobertura (%)'].mean():.1f}%")
+            col_m3.metric("Desvio da proficiência média", f"{resumo_grupos['Proficiencia Media'].std(ddof=0):.3f}")
+            st.dataframe(resumo_grupos, hide_index=True, use_container_width=True)
+            with st.expander("📋 Integrantes de cada grupo"):
+                st.dataframe(integrantes, hide_index=True, use_container_width=True)
+        
+        # Botão para exportar lista de tutores
+        st.markdown("### 📋 **Exportar Lista de Tutores**")
+        tutors_csv = top_tutors[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto', 'Score_Tutor']].to_csv(index=False)
+        
+        st.download_button(
+            label="⬇️ **Baixar Lista de Tutores (CSV)**",
+            data=tutors_csv,
+            file_name=f"tutores_colega_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+            type="primary"
+        )
+        
+        if grupos_estudo is not None:
+            st.download_button(
+                label="⬇️ **Baixar Grupos de Estudo (CSV)**",
+                data=grupos_estudo[0].to_csv(index=False),
+                file_name=f"grupos_estudo_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
+        
+        # Visualização gráfica alternativa (sem usar Score_Tutor no size)
+        st.markdown("### 📈 **Distribuição dos Potenciais Tutores**")
+        
+        # Criar gráfico de barras em vez de scatter com size
+        fig_tutors = px.bar(
+            top_tutors,
+            x='Aluno',
+            y='Proficiencia (θ)',
+            color='Percentual de Acerto',
+            title='📊 Perfil dos Tutores Identificados',
+            color_continuous_scale='Viridis',
+            hover_data=['Percentual de Acerto', 'Score_Tutor', 'Posicao']
+        )
+        
+        fig_tutors.update_layout(
+            height=500,
+            plot_bgcolor='rgba(30, 41, 59, 0.5)',
+            paper_bgcolor='rgba(15, 23, 42, 0)',
+            font_color='#F1F5F9',
+            xaxis_tickangle=45
+        )
+        
+        st.plotly_chart(fig_tutors, use_container_width=True)
+        
+    else:
+        st.warning("""
+        ### ⚠️ **Nenhum aluno atende aos critérios para tutoria no momento**
+        
+        **Sugestões:**
+        1. Considere reduzir os critérios (ex: θ > 0.5)
+        2. Realize atividades de nivelamento
+        3. Considere os top 5 alunos por proficiência como tutores provisórios
+        """)
+        
+        # Mostrar top 5 alunos mesmo que não atendam aos critérios
+        top_5 = student_results.nlargest(5, 'Proficiencia (θ)')
+        st.markdown("#### **Top 5 Alunos por Proficiência**")
+        st.dataframe(top_5[['Aluno', 'Proficiencia (θ)', 'Percentual de Acerto']], use_container_width=True)
+
+@st.fragment
+def render_export_tab(analysis):
+    """Aba Exportar Dados: relatórios TXT/CSV, Excel/ZIP e JSON"""
+    student_results = analysis['student_results']
+    item_results = analysis['item_results']
+    detailed_df = analysis['detailed_df']
+    df_binary = analysis['df_binary']
+    
+    st.markdown('<h2 class="sub-header">📝 Exportar Dados e Relatórios</h2>', unsafe_allow_html=True)
+    
+    col_r1, col_r2 = st.columns([2, 1])
+    
+    with col_r1:
+        st.markdown("### 📄 **Gerar Relatórios**")
+        
+        report_type = st.radio(
+            "**Tipo de relatório:**",
+            ["📋 **Relatório Geral da Turma**", "👤 **Relatório Individual**"],
+            key="report_type"
+        )
+        
+        nomes = student_results['Aluno'].tolist()
+        linha_alvo = None
+        if report_type == "👤 **Relatório Individual**":
+            linha_alvo = st.selectbox(
+                "**Selecione o aluno:**",
+                range(len(nomes)),
+                format_func=lambda posicao: str(nomes[posicao]),
+                key="aluno_relatorio"
+            )
+        
+        # Container para os botões de exportação
+        st.markdown("### 📤 **Exportar em Diferentes Formatos**")
+        
+        aluno_alvo = nomes[linha_alvo] if linha_alvo is not None else None
+        if linha_alvo is None:
+            nome_relatorio = f"Relatorio_Turma_TRI_{datetime.now().strftime('%Y%m%d_%H%M')}"
+        else:
+            nome_relatorio = f"Relatorio_{aluno_alvo}_{datetime.now().strftime('%Y%m%d_%H%M')}"
+        
+        # Botão para gerar relatório em texto (TXT)
+        if st.button("📝 **Gerar Relatório (TXT)**", type="primary", use_container_width=True):
+            with st.spinner("📊 Gerando relatório TXT..."):
+                try:
+                    text_report = get_cached_export(
+                        analysis, ('txt', linha_alvo),
+                        lambda: create_text_report(student_results, item_results, detailed_df, aluno_alvo, analysis['ranking'], analysis_top_tutors(analysis), linha_alvo)
+                    )
+                    
+                    # Botão de download TXT
+                    st.download_button(
+                        label="⬇️ **Baixar Relatório TXT**",
+                        data=text_report,
+                        file_name=f"{nome_relatorio}.txt",
+                        mime="text/plain",
+                        type="primary"
+                    )
+                    
+                    st.success("✅ **Relatório TXT gerado com sucesso!**")
+                except Exception as e:
+                    st.error(f"❌ **Erro ao gerar relatório TXT:** {str(e)}")
+        
+        # Botão para gerar relatório em CSV formatado
+        if st.button("📊 **Gerar Relatório (CSV)**", type="secondary", use_container_width=True):
+            with st.spinner("📊 Gerando relatório CSV..."):
+                try:
+                    csv_report = get_cached_export(
+                        analysis, ('csv', linha_alvo),
+                        lambda: create_csv_report(student_results, item_results, detailed_df, aluno_alvo, analysis['ranking'], analysis['detail_offsets'], analysis_top_tutors(analysis), linha_alvo)
+                    )
+                    
+                    # Botão de download CSV
+                    st.download_button(
+                        label="⬇️ **Baixar Relatório CSV**",
+                        data=csv_report,
+                        file_name=f"{nome_relatorio}.csv",
+                        mime="text/csv",
+                        type="secondary"
+                    )
+                    
+                    st.success("✅ **Relatório CSV gerado com sucesso!**")
+                except Exception as e:
+                    st.error(f"❌ **Erro ao gerar relatório CSV:** {str(e)}")
+        
+        # Boletins de todos os alunos (reunião de pais)
+        st.markdown("### 🗂️ **Boletins de Todos os Alunos**")
+        formatos_boletim = st.multiselect(
+            "**Formatos dos boletins:**",
+            list(boletins.FORMATOS),
+            default=['html'],
+            format_func=str.upper,
+            key="formatos_boletim"
+        )
+        
+        if st.button("📦 **Gerar Boletins (ZIP)**", use_container_width=True, disabled=not formatos_boletim):
+            barra = st.progress(0.0, text="Preparando boletins...")
+            try:
+                get_cached_export(
+                    analysis, ('boletins', tuple(formatos_boletim)),
+                    lambda: export_report_cards(
+                        analysis, formatos_boletim,
+                        progress_callback=lambda fracao, texto: barra.progress(fracao, text=texto)
+                    )
+                )
+            except Exception as e:
+                st.error(f"❌ **Erro ao gerar boletins:** {str(e)}")
+            barra.empty()
+        
+        boletins_zip = get_cached_export(analysis, ('boletins', tuple(formatos_boletim)))
+        if boletins_zip is not None:
+            render_file_download(
+                boletins_zip,
+                label=f"⬇️ **Baixar Boletins ({len(student_results)} alunos)**",
+                file_name=f"boletins_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                mime="application/zip",
+                key="boletins"
+            )
+        
+        # Exportar dados completos (arquivos gerados apenas quando solicitados)
+        st.markdown("### 💾 **Exportar Dados Completos**")
+        
+        # CSV básico
+        if st.button("📄 **Preparar CSV Simples**", use_container_width=True):
+            get_cached_export(analysis, 'csv_simples', lambda: df_binary.to_csv(index=False).encode('utf-8'))
+        
+        csv_data = get_cached_export(analysis, 'csv_simples')
+        if csv_data is not None:
+            st.download_button(
+                label="⬇️ **Exportar CSV Simples**",
+                data=csv_data,
+                file_name=f"dados_alunos_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv",
+                type="secondary",
+                use_container_width=True
+            )
+        
+        # Excel completo ou ZIP
+        if st.button("📗 **Exportar Dados Completos**", use_container_width=True):
+            barra = st.progress(0.0, text="Preparando dados para exportação...")
+            try:
+                get_cached_export(
+                    analysis, 'completo',
+                    lambda: export_to_excel(
+                        df_binary, student_results, item_results, detailed_df,
+                        progress_callback=lambda fracao, texto: barra.progress(fracao, text=texto),
+                        top_tutors=analysis_top_tutors(analysis)
+                    )
+                )
+            except Exception as e:
+                st.error(f"❌ **Erro ao exportar dados:** {str(e)}")
+            barra.empty()
+        
+        dados_completos = get_cached_export(analysis, 'completo')
+        if dados_completos is not None:
+            excel_data, mime_type = dados_completos
+            filename = f"dados_completos_tri_{datetime.now().strftime('%Y%m%d')}"
+            
+            if mime_type == 'application/zip':
+                filename += ".zip"
+                label = "📦 **Baixar ZIP (múltiplos CSVs)**"
+            else:
+                filename += ".xlsx"
+                label = "📗 **Baixar Excel Completo**"
+            
+            # O arquivo fica em disco e só é lido quando o download é pedido
+            render_file_download(excel_data, label=label, file_name=filename, mime=mime_type, key="dados_completos")
+        
+        # JSON estruturado
+        if st.button("🧩 **Preparar JSON Estruturado**", use_container_width=True):
+            with st.spinner("Gerando JSON..."):
+                get_cached_export(analysis, 'json', lambda: build_json_export(analysis))
+        
+        json_export = get_cached_export(analysis, 'json')
+        if json_export is not None:
+            st.download_button(
+                label="📄 **Exportar JSON Estruturado**",
+                data=json_export,
+                file_name=f"dados_tri_{datetime.now().strftime('%Y%m%d')}.json",
+                mime="application/json",
+                type="secondary",
+                use_container_width=True
+            )
+        
+        # Parquet (colunar)
+        if st.button("🧱 **Preparar Parquet (colunar)**", use_container_width=True):
+            with st.spinner("Gerando tabelas Parquet..."):
+                get_cached_export(analysis, 'parquet', lambda: build_parquet_export(analysis))
+        
+        parquet_export = get_cached_export(analysis, 'parquet')
+        if parquet_export is not None:
+            st.download_button(
+                label="🧱 **Exportar Parquet (ZIP)**",
+                data=parquet_export,
+                file_name=f"dados_tri_{datetime.now().strftime('%Y%m%d')}.parquet.zip",
+                mime="application/zip",
+                type="secondary",
+                use_container_width=True
+            )
+        
+        # Histórico local (consultado pela página de Análise Trimestral)
+        st.markdown("### 🗄️ **Histórico Local**")
+        with st.form("form_historico"):
+            nome_avaliacao = st.text_input(
+                "**Nome da avaliação:**",
+                value=f"Avaliacao_{datetime.now().strftime('%Y%m%d')}",
+                help="Uma avaliação já salva com o mesmo nome (ou os mesmos dados) é substituída"
+            )
+            salvar = st.form_submit_button("💾 **Salvar no Histórico Local**", use_container_width=True)
+        
+        if salvar:
+            if not nome_avaliacao.strip():
+                st.warning("⚠️ Informe um nome para a avaliação.")
+            else:
+                with st.spinner("Gravando no histórico local..."):
+                    try:
+                        historico_db.salvar_avaliacao(
+                            nome_avaliacao.strip(), analysis['digest'], build_export_metadata(analysis),
+                            student_results, item_results, detailed_df, analysis_top_tutors(analysis)
+                        )
+                        st.success(f"✅ **'{nome_avaliacao.strip()}' salva no histórico local!**")
+                    except Exception as e:
+                        st.error(f"❌ **Erro ao salvar no histórico:** {str(e)}")
+    
+    with col_r2:
+        st.markdown("### 📈 **Informações**")
+        st.info("""
+        **Formatos disponíveis:**
+        
+        **📝 TXT:**
+        - Relatório formatado em texto
+        - Fácil de ler e compartilhar
+        - Inclui análise completa
+        
+        **📊 CSV:**
+        - Dados estruturados
+        - Ideal para análise em planilhas
+        - Múltiplas seções organizadas
+        
+        **📗 Excel/ZIP:**
+        - Múltiplas abas/arquivos
+        - Dados completos organizados
+        - Inclui lista de tutores
+        
+        **📄 JSON:**
+        - Dados estruturados
+        - Ideal para integração com outros sistemas
+        - Formato universal
+        
+        **🧱 Parquet:**
+        - Formato colunar compacto
+        - Carregamento rápido na Análise Trimestral
+        - Inclui a tabela detalhada
+        
+        **🗄️ Histórico Local:**
+        - Banco SQLite no servidor
+        - Consultado pela Análise Trimestral
+        - Filtros por avaliação, período e aluno
+        """)
+        
+        # Explicação dos parâmetros TRI
+        with st.expander("📚 **Explicação dos Parâmetros TRI**", expanded=False):
+            st.markdown("""
+            ### 📊 **Parâmetros da Teoria de Resposta ao Item (TRI)**
+            
+            **1. Dificuldade (b)**
+            - **Valores negativos**: Questão fácil (alunos com baixa proficiência conseguem responder)
+            - **Valores próximos a 0**: Dificuldade média (alunos com proficiência média)
+            - **Valores positivos**: Questão difícil (apenas alunos com alta proficiência)
+            - **Faixa típica**: -3 (muito fácil) a +3 (muito difícil)
+            
+            **2. Discriminação (a)**
+            - **< 0.3**: Discriminação baixa (questão problemática, não diferencia bem os alunos)
+            - **0.3-0.6**: Discriminação moderada (questão aceitável)
+            - **> 0.6**: Discriminação alta (questão excelente, diferencia bem alunos bons e ruins)
+            - **Valores negativos**: Questão funciona inversamente (deve ser revisada)
+            
+            **3. Proficiência (θ)**
+            - **< -1.5**: Proficiência muito baixa (intervenção necessária)
+            - **-1.5 a -0.5**: Proficiência baixa (necessita reforço)
+            - **-0.5 a 0.5**: Proficiência média (desempenho adequado)
+            - **0.5 a 1.5**: Proficiência alta (bom desempenho)
+            - **> 1.5**: Proficiência muito alta (excelente desempenho)
+            - **Escala**: média = 0, desvio padrão = 1
+            """)
+
 # --- Interface Principal ---
 st.markdown('<h1 class="main-header"> KAIROS - Sistema de Análise de Avaliações</h1>', unsafe_allow_html=True)
 st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #94A3B8; font-weight: 500;">Análise psicométrica avançada para educadores</p>', unsafe_allow_html=True)
@@ -1073,6 +2101,24 @@ with st.sidebar:
         gabarito = {}
         num_questoes = 0
     
+    # Códigos estáveis das questões (opcional): identificam itens comuns entre avaliações
+    codigos_questoes = None
+    if num_questoes > 0:
+        codigos_input = st.text_input(
+            "**Códigos das questões (opcional):**",
+            placeholder="Ex: MAT01, MAT02, POR01, ...",
+            help="Um código por questão, separados por vírgula. Questões com o mesmo código em avaliações diferentes são tratadas como itens comuns (linking de escalas na Análise Trimestral)",
+            key="codigos_questoes_input"
+        )
+        if codigos_input.strip():
+            codigos = [codigo.strip() for codigo in codigos_input.split(',')]
+            if len(codigos) != num_questoes or not all(codigos):
+                st.warning(f"⚠️ **Informe {num_questoes} códigos** (um por questão). Os códigos serão ignorados.")
+            elif len(set(codigos)) != len(codigos):
+                st.warning("⚠️ **Códigos de questões duplicados.** Os códigos serão ignorados.")
+            else:
+                codigos_questoes = codigos
+    
     st.markdown("---")
     
     # Modo de entrada
@@ -1095,105 +2141,87 @@ if gabarito and num_questoes > 0:
     if modo_entrada == "✍️ **Inserção Manual**":
         st.markdown("### ✍️ **Inserir Dados dos Alunos**")
         
-        # Controle do número de alunos
-        col_num, col_btn = st.columns([2, 1])
-        with col_num:
-            num_alunos = st.number_input(
-                "**Número de alunos:**",
-                min_value=1,
-                max_value=50,
-                value=5,
-                step=1,
-                key="num_alunos"
-            )
+        # Formulário dinâmico
+        st.markdown("### 📝 **Preencha as Respostas**")
+        st.caption("Edite os nomes e escolha as respostas diretamente na grade. As alterações são aplicadas ao clicar em **Processar Respostas**.")
         
-        with col_btn:
-            if st.button("🔄 Atualizar Formulário", type="primary", use_container_width=True):
-                st.rerun()
+        # Inicializar session state para armazenar a grade de respostas
+        if not isinstance(st.session_state.get('alunos_respostas'), pd.DataFrame):
+            st.session_state.alunos_respostas = None
+        # Tamanho da grade exibida; só muda quando o formulário é enviado
+        st.session_state.setdefault('tamanho_grade', 5)
         
-        # Formulário dinâmico
-        if num_alunos > 0:
-            st.markdown("### 📝 **Preencha as Respostas**")
+        grade_respostas = build_answer_grid(st.session_state.tamanho_grade, num_questoes, st.session_state.alunos_respostas)
+        
+        # O número de alunos e a grade ficam no mesmo formulário: ao redimensionar,
+        # as edições ainda não processadas são enviadas junto e preservadas
+        with st.form("form_respostas"):
+            col_num, col_btn = st.columns([2, 1])
+            with col_num:
+                num_alunos = st.number_input(
+                    "**Número de alunos:**",
+                    min_value=1,
+                    value=st.session_state.tamanho_grade,
+                    step=1,
+                    key="num_alunos"
+                )
             
-            # Inicializar session state para armazenar respostas
-            if 'alunos_respostas' not in st.session_state:
-                st.session_state.alunos_respostas = {}
+            with col_btn:
+                atualizar = st.form_submit_button("🔄 Atualizar Formulário", use_container_width=True)
             
-            # Criar formulário
-            alunos_data = []
+            grade_editada = st.data_editor(
+                grade_respostas,
+                column_config=answer_grid_column_config(num_questoes),
+                hide_index=True,
+                num_rows="fixed",
+                use_container_width=True,
+                key="grade_respostas"
+            )
             
-            for aluno_idx in range(num_alunos):
-                st.markdown(f"---")
-                st.markdown(f"#### 👨‍🎓 **Aluno {aluno_idx + 1}**")
-                
-                # Nome do aluno
-                nome_key = f"nome_{aluno_idx}"
-                nome = st.text_input(
-                    "**Nome do aluno:**",
-                    value=st.session_state.alunos_respostas.get(nome_key, f"Aluno {aluno_idx + 1}"),
-                    key=nome_key
-                )
-                st.session_state.alunos_respostas[nome_key] = nome
-                
-                # Respostas por questão
-                st.markdown("**Respostas:**")
-                
-                # Organizar questões em colunas
-                num_cols = min(5, num_questoes)
-                num_rows = (num_questoes + num_cols - 1) // num_cols
+            processar = st.form_submit_button("✅ **Processar Respostas**", type="primary", use_container_width=True)
+        
+        if atualizar and int(num_alunos) != st.session_state.tamanho_grade:
+            # Guardar as edições antes de recriar a grade com o novo tamanho
+            st.session_state.alunos_respostas = grade_editada.copy()
+            st.session_state.tamanho_grade = int(num_alunos)
+            st.session_state.pop('grade_respostas', None)
+            st.rerun()
+        
+        if processar:
+            st.session_state.alunos_respostas = grade_editada.copy()
+            
+            # Verificar se todos os nomes foram preenchidos
+            nomes = grade_editada['Aluno'].astype(str).str.strip()
+            if (nomes == '').any():
+                st.error("⚠️ **Erro:** Existem alunos sem nome!")
+            elif nomes.duplicated().any():
+                st.error("⚠️ **Erro:** Nomes de alunos duplicados!")
+            else:
+                # Criar DataFrame com os dados
+                df_manual = grade_editada.copy()
+                df_manual['Aluno'] = nomes
                 
-                respostas_aluno = []
-                for row in range(num_rows):
-                    cols = st.columns(num_cols)
-                    for col in range(num_cols):
-                        q_idx = row * num_cols + col
-                        if q_idx < num_questoes:
-                            questao_num = q_idx + 1
-                            with cols[col]:
-                                resposta_key = f"aluno_{aluno_idx}_q_{q_idx}"
-                                resposta = st.selectbox(
-                                    f"**Q{questao_num}**",
-                                    options=["-", "A", "B", "C", "D", "E"],
-                                    index=0,
-                                    key=resposta_key
-                                )
-                                st.session_state.alunos_respostas[resposta_key] = resposta
-                                respostas_aluno.append(resposta)
+                # Converter para binário
+                df_binary = df_manual.copy()
+                for i in range(num_questoes):
+                    questao = f'Q{i+1}'
+                    df_binary[questao] = (df_manual[questao] == gabarito[questao]).astype(int)
                 
-                alunos_data.append([nome] + respostas_aluno)
-            
-            # Botão para processar
-            col_process, col_clear = st.columns(2)
-            with col_process:
-                if st.button("✅ **Processar Respostas**", type="primary", use_container_width=True):
-                    # Verificar se todos os nomes foram preenchidos
-                    nomes = [aluno[0] for aluno in alunos_data]
-                    if len(set(nomes)) != len(nomes):
-                        st.error("⚠️ **Erro:** Nomes de alunos duplicados!")
-                    else:
-                        # Criar DataFrame com os dados
-                        colunas = ['Aluno'] + [f'Q{i+1}' for i in range(num_questoes)]
-                        df_manual = pd.DataFrame(alunos_data, columns=colunas)
-                        
-                        # Converter para binário
-                        df_binary = df_manual.copy()
-                        for i in range(num_questoes):
-                            questao = f'Q{i+1}'
-                            df_binary[questao] = (df_manual[questao] == gabarito[questao]).astype(int)
-                        
-                        st.session_state['df_manual'] = df_manual
-                        st.session_state['df_binary'] = df_binary
-                        st.success(f"✅ **{num_alunos} alunos** processados com sucesso!")
-            
-            with col_clear:
-                if st.button("🗑️ **Limpar Dados**", type="secondary", use_container_width=True):
-                    for key in list(st.session_state.alunos_respostas.keys()):
-                        del st.session_state.alunos_respostas[key]
-                    if 'df_manual' in st.session_state:
-                        del st.session_state['df_manual']
-                    if 'df_binary' in st.session_state:
-                        del st.session_state['df_binary']
-                    st.rerun()
+                st.session_state['df_manual'] = df_manual
+                st.session_state['df_binary'] = df_binary
+                st.session_state.pop('ids_alunos', None)
+                st.success(f"✅ **{len(df_manual)} alunos** processados com sucesso!")
+        
+        if st.button("🗑️ **Limpar Dados**", type="secondary", use_container_width=True):
+            st.session_state.alunos_respostas = None
+            if 'grade_respostas' in st.session_state:
+                del st.session_state['grade_respostas']
+            if 'df_manual' in st.session_state:
+                del st.session_state['df_manual']
+            if 'df_binary' in st.session_state:
+                del st.session_state['df_binary']
+            st.session_state.pop('ids_alunos', None)
+            st.rerun()
     
     # --- UPLOAD DE CSV ---
     elif modo_entrada == "📁 **Upload de CSV**":
@@ -1202,13 +2230,14 @@ if gabarito and num_questoes > 0:
         uploaded_file = st.file_uploader(
             "**Selecione o arquivo CSV com as respostas:**",
             type=['csv'],
-            help="**Formato esperado:** Primeira coluna = Nomes dos alunos, demais colunas = Respostas (A, B, C, D, E)",
+            help="**Formato esperado:** Primeira coluna = Nomes dos alunos, demais colunas = Respostas (A, B, C, D, E). Uma coluna opcional ID/Matrícula identifica o aluno entre avaliações",
             key="file_uploader"
         )
         
         if uploaded_file is not None:
             try:
-                df_upload = pd.read_csv(uploaded_file)
+                df_upload = read_answers_csv(uploaded_file)
+                df_upload, ids_alunos = extract_student_ids(df_upload)
                 
                 # Verificar compatibilidade
                 if df_upload.shape[1] - 1 != num_questoes:
@@ -1227,11 +2256,15 @@ if gabarito and num_questoes > 0:
                     
                     st.session_state['df_manual'] = df_upload
                     st.session_state['df_binary'] = df_binary
+                    st.session_state['ids_alunos'] = ids_alunos
                     
                     st.success(f"✅ **{len(df_upload)} alunos** carregados com sucesso!")
                     
                     with st.expander("📋 **Visualizar Dados Carregados**", expanded=False):
-                        st.dataframe(df_upload.head(), use_container_width=True)
+                        tabelas.tabela_paginada(
+                            df_upload, "preview_dados", hashlib.sha1(uploaded_file.getvalue()).hexdigest(),
+                            colunas_busca=['Aluno']
+                        )
                         
             except Exception as e:
                 st.error(f"❌ **Erro ao processar arquivo:** {str(e)}")
@@ -1241,31 +2274,13 @@ if gabarito and num_questoes > 0:
         df_binary = st.session_state['df_binary']
         df_original = st.session_state.get('df_manual', df_binary)
         
-        # Executar análise TRI
+        # Executar análise TRI (resultado em cache, compartilhado pelas abas)
         with st.spinner('🔍 **Analisando dados...**'):
-            student_results, item_results, cci_df, model_params, response_matrix, df_responses = run_advanced_tri_analysis(df_binary)
-            
-            # Criar análise detalhada
-            detailed_data = []
-            for aluno_idx, aluno in enumerate(student_results['Aluno']):
-                for q_idx in range(num_questoes):
-                    questao = f'Q{q_idx + 1}'
-                    detailed_data.append({
-                        'Aluno': aluno,
-                        'Questao': questao,
-                        'Resposta_Aluno': df_original.iloc[aluno_idx, q_idx + 1] if df_original.shape[1] > q_idx + 1 else 'N/A',
-                        'Resposta_Correta': gabarito[questao],
-                        'Acerto': response_matrix[aluno_idx, q_idx],
-                        'Proficiencia_Aluno': student_results.loc[aluno_idx, 'Proficiencia (θ)'],
-                        'Dificuldade_Questao': item_results.loc[q_idx, 'Dificuldade (b)'],
-                        'Discriminacao_Questao': item_results.loc[q_idx, 'Discriminacao (a)']
-                    })
-            
-            detailed_df = pd.DataFrame(detailed_data)
+            analysis = build_analysis(df_binary, df_original, gabarito, st.session_state.get('ids_alunos'), codigos_questoes)
         
         st.markdown('<div class="success-box">', unsafe_allow_html=True)
         st.markdown(f"### 🎉 **Análise Concluída!**")
-        st.markdown(f"**{len(student_results)} alunos** | **{num_questoes} questões**")
+        st.markdown(f"**{len(analysis['student_results'])} alunos** | **{num_questoes} questões**")
         st.markdown('</div>', unsafe_allow_html=True)
         
         # --- ABAS PRINCIPAIS ---
@@ -1276,491 +2291,19 @@ if gabarito and num_questoes > 0:
             "📝 **Exportar Dados**"
         ])
         
+        # Cada aba é um fragment: interagir com um widget reexecuta apenas a própria aba
         with tab1:
-            st.markdown('<h2 class="sub-header">📊 Dashboard de Análise</h2>', unsafe_allow_html=True)
-            
-            # Métricas Principais
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                st.metric("👥 **Alunos**", len(student_results))
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                mean_theta = student_results['Proficiencia (θ)'].mean()
-                st.metric("📈 **Proficiência Média**", f"{mean_theta:.2f}")
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            with col3:
-                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                mean_score = student_results['Percentual de Acerto'].mean()
-                st.metric("🎯 **Taxa de Acerto**", f"{mean_score:.1f}%")
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            with col4:
-                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                reliability = calculate_reliability(item_results)
-                st.metric("🛡️ **Confiabilidade**", f"{reliability:.3f}")
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Panorama Geral da Turma
-            st.markdown("### 🌟 **Panorama Geral da Turma**")
-            st.plotly_chart(plot_turma_panorama_dark(student_results, item_results), use_container_width=True)
-            
-            # Gráficos adicionais
-            col_graph1, col_graph2 = st.columns(2)
-            
-            with col_graph1:
-                st.plotly_chart(plot_theta_distribution_dark(student_results), use_container_width=True)
-            
-            with col_graph2:
-                st.plotly_chart(plot_item_analysis_dark(item_results), use_container_width=True)
-            
-            # Ranking de Alunos
-            st.markdown("### 🏆 **Ranking de Alunos**")
-            
-            col_rank1, col_rank2 = st.columns([3, 2])
-            
-            with col_rank1:
-                # Top 10 alunos
-                top_students = student_results.sort_values('Proficiencia (θ)', ascending=False).head(10)
-                top_students['Posicao'] = range(1, len(top_students) + 1)
-                top_students = top_students[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto']]
-                
-                # Exibir DataFrame
-                st.dataframe(top_students, use_container_width=True)
-            
-            with col_rank2:
-                st.markdown("### ⚠️ **Questões Problemáticas**")
-                
-                problematic_items = item_results[
-                    (item_results['Discriminacao (a)'] < 0.3) | 
-                    (item_results['% Acerto'] < 20) | 
-                    (item_results['% Acerto'] > 90)
-                ]
-                
-                if len(problematic_items) > 0:
-                    for _, item in problematic_items.head(3).iterrows():
-                        issues = []
-                        if item['Discriminacao (a)'] < 0.3:
-                            issues.append("📉 Baixa discriminação")
-                        if item['% Acerto'] < 20:
-                            issues.append("🔴 Muito difícil")
-                        if item['% Acerto'] > 90:
-                            issues.append("🟢 Muito fácil")
-                        
-                        st.warning(f"**{item['Questao']}**: {', '.join(issues)}")
-                else:
-                    st.success("✅ **Todas as questões estão dentro dos parâmetros adequados!**")
+            render_dashboard_tab(analysis)
         
         with tab2:
-            st.markdown('<h2 class="sub-header">👨‍🎓 Análise Individual</h2>', unsafe_allow_html=True)
-            
-            # Seletor de aluno
-            aluno_selecionado = st.selectbox(
-                "**Selecione um aluno para análise detalhada:**",
-                student_results['Aluno'].tolist(),
-                help="Clique no nome do aluno para ver seu desempenho completo",
-                key="aluno_selecionado_tab2"
-            )
-            
-            if aluno_selecionado:
-                aluno_data = student_results[student_results['Aluno'] == aluno_selecionado].iloc[0]
-                
-                # Cartões de métricas
-                col_a1, col_a2, col_a3, col_a4 = st.columns(4)
-                
-                with col_a1:
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    theta = aluno_data['Proficiencia (θ)']
-                    status = "⏫ Acima" if theta > 0 else "⏬ Abaixo"
-                    st.metric("🎓 **Proficiência (θ)**", f"{theta:.2f}", delta=status)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with col_a2:
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    score = int(aluno_data['Pontuacao Total'])
-                    total = num_questoes
-                    st.metric("📝 **Pontuação**", f"{score}/{total}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with col_a3:
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    percent = aluno_data['Percentual de Acerto']
-                    st.metric("✅ **% Acerto**", f"{percent:.1f}%")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with col_a4:
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    rank = list(student_results.sort_values('Proficiencia (θ)', ascending=False)['Aluno']).index(aluno_selecionado) + 1
-                    total = len(student_results)
-                    st.metric("🏅 **Posição**", f"{rank}º/{total}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Gráfico de desempenho
-                st.plotly_chart(plot_student_progress_dark(detailed_df, aluno_selecionado), use_container_width=True)
-                
-                # Verificar se é tutor potencial
-                top_tutors = get_top_tutors(student_results, 10)
-                if len(top_tutors) > 0 and aluno_selecionado in top_tutors['Aluno'].values:
-                    tutor_info = top_tutors[top_tutors['Aluno'] == aluno_selecionado].iloc[0]
-                    st.markdown('<div class="info-box">', unsafe_allow_html=True)
-                    st.markdown(f"### 👨‍🏫 **Potencial Tutor de Colegas**")
-                    st.markdown(f"**Score como tutor:** {tutor_info['Score_Tutor']:.2f}")
-                    st.markdown(f"**Posição entre tutores:** {tutor_info['Posicao']}º")
-                    st.markdown("**Sugestão:** Este aluno pode auxiliar 2-3 colegas com dificuldades")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Dicas pedagógicas
-                st.markdown("### 👨‍🏫 **Recomendações Pedagógicas**")
-                
-                if aluno_data['Proficiencia (θ)'] < -1:
-                    st.markdown('<div class="warning-box">', unsafe_allow_html=True)
-                    st.markdown("""
-                    ### 🔴 **Atenção Especial Necessária**
-                    - **Proficiência significativamente abaixo** da média
-                    - **Recomenda-se:** Atividades de reforço intensivo
-                    - **Sugestão:** Tutoria individualizada com aluno-tutor
-                    - **Acompanhamento:** Monitoramento constante
-                    """)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                elif aluno_data['Proficiencia (θ)'] < 0:
-                    st.markdown('<div class="warning-box">', unsafe_allow_html=True)
-                    st.markdown("""
-                    ### 🟡 **Acompanhamento Recomendado**
-                    - **Proficiência abaixo** da média
-                    - **Recomenda-se:** Reforço nos tópicos com dificuldade
-                    - **Sugestão:** Grupo de estudos com tutores
-                    - **Acompanhamento:** Avaliação periódica
-                    """)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                elif aluno_data['Proficiencia (θ)'] > 1:
-                    st.markdown('<div class="info-box">', unsafe_allow_html=True)
-                    st.markdown("""
-                    ### 🟢 **Excelente Desempenho**
-                    - **Proficiência significativamente acima** da média
-                    - **Recomenda-se:** Desafios adicionais
-                    - **Sugestão:** Atuação como tutor de colegas
-                    - **Potencial:** Desenvolvimento avançado
-                    """)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="info-box">', unsafe_allow_html=True)
-                    st.markdown("""
-                    ### 🔵 **Desempenho Adequado**
-                    - **Proficiência dentro** da média esperada
-                    - **Manter:** Ritmo atual de estudos
-                    - **Sugestão:** Aprimoramento contínuo
-                    - **Acompanhamento:** Regular
-                    """)
-                    st.markdown('</div>', unsafe_allow_html=True)
+            render_individual_tab(analysis)
         
         with tab3:
-            st.markdown('<h2 class="sub-header">👨‍🏫 Tutores de Colegas</h2>', unsafe_allow_html=True)
-            
-            # Identificar os melhores tutores
-            top_tutors = get_top_tutors(student_results, 10)
-            
-            if len(top_tutors) > 0:
-                st.markdown("### 🏆 **Top 10 Alunos com Potencial para Tutoria**")
-                st.markdown("""
-                **Critérios para seleção de tutores:**
-                - Proficiência (θ) > 1.0
-                - Taxa de acerto > 70%
-                - Score combinado de desempenho
-                """)
-                
-                # Mostrar tabela de tutores
-                display_tutors = top_tutors[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto', 'Score_Tutor']].copy()
-                display_tutors['Proficiencia (θ)'] = display_tutors['Proficiencia (θ)'].round(2)
-                display_tutors['Percentual de Acerto'] = display_tutors['Percentual de Acerto'].round(1)
-                display_tutors['Score_Tutor'] = display_tutors['Score_Tutor'].round(3)
-                
-                st.dataframe(display_tutors, use_container_width=True)
-                
-                # Sugestões para formação de grupos
-                st.markdown("### 👥 **Sugestões para Formação de Grupos**")
-                
-                col_g1, col_g2 = st.columns(2)
-                
-                with col_g1:
-                    st.markdown("#### **Grupos Heterogêneos**")
-                    st.markdown("""
-                    **Estratégia:** 1 tutor + 2-3 alunos com dificuldades
-                    
-                    **Vantagens:**
-                    - Aprendizagem colaborativa
-                    - Desenvolvimento de liderança
-                    - Redução da carga do professor
-                    - Personalização do ensino
-                    """)
-                
-                with col_g2:
-                    st.markdown("#### **Plano de Ação**")
-                    st.markdown("""
-                    **1. Organização:**
-                    - Formar grupos semanais
-                    - Definir horários fixos
-                    
-                    **2. Monitoramento:**
-                    - Avaliações quinzenais
-                    - Feedback dos tutores
-                    - Ajuste de grupos
-                    
-                    **3. Reconhecimento:**
-                    - Certificados de mérito
-                    - Menções honrosas
-                    - Incentivos pedagógicos
-                    """)
-                
-                # Botão para exportar lista de tutores
-                st.markdown("### 📋 **Exportar Lista de Tutores**")
-                tutors_csv = top_tutors[['Posicao', 'Aluno', 'Proficiencia (θ)', 'Percentual de Acerto', 'Score_Tutor']].to_csv(index=False)
-                
-                st.download_button(
-                    label="⬇️ **Baixar Lista de Tutores (CSV)**",
-                    data=tutors_csv,
-                    file_name=f"tutores_colega_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                    type="primary"
-                )
-                
-                # Visualização gráfica alternativa (sem usar Score_Tutor no size)
-                st.markdown("### 📈 **Distribuição dos Potenciais Tutores**")
-                
-                # Criar gráfico de barras em vez de scatter com size
-                fig_tutors = px.bar(
-                    top_tutors,
-                    x='Aluno',
-                    y='Proficiencia (θ)',
-                    color='Percentual de Acerto',
-                    title='📊 Perfil dos Tutores Identificados',
-                    color_continuous_scale='Viridis',
-                    hover_data=['Percentual de Acerto', 'Score_Tutor', 'Posicao']
-                )
-                
-                fig_tutors.update_layout(
-                    height=500,
-                    plot_bgcolor='rgba(30, 41, 59, 0.5)',
-                    paper_bgcolor='rgba(15, 23, 42, 0)',
-                    font_color='#F1F5F9',
-                    xaxis_tickangle=45
-                )
-                
-                st.plotly_chart(fig_tutors, use_container_width=True)
-                
-            else:
-                st.warning("""
-                ### ⚠️ **Nenhum aluno atende aos critérios para tutoria no momento**
-                
-                **Sugestões:**
-                1. Considere reduzir os critérios (ex: θ > 0.5)
-                2. Realize atividades de nivelamento
-                3. Considere os top 5 alunos por proficiência como tutores provisórios
-                """)
-                
-                # Mostrar top 5 alunos mesmo que não atendam aos critérios
-                top_5 = student_results.nlargest(5, 'Proficiencia (θ)')
-                st.markdown("#### **Top 5 Alunos por Proficiência**")
-                st.dataframe(top_5[['Aluno', 'Proficiencia (θ)', 'Percentual de Acerto']], use_container_width=True)
+            render_tutors_tab(analysis)
         
         with tab4:
-            st.markdown('<h2 class="sub-header">📝 Exportar Dados e Relatórios</h2>', unsafe_allow_html=True)
-            
-            col_r1, col_r2 = st.columns([2, 1])
-            
-            with col_r1:
-                st.markdown("### 📄 **Gerar Relatórios**")
-                
-                report_type = st.radio(
-                    "**Tipo de relatório:**",
-                    ["📋 **Relatório Geral da Turma**", "👤 **Relatório Individual**"],
-                    key="report_type"
-                )
-                
-                if report_type == "👤 **Relatório Individual**":
-                    aluno_relatorio = st.selectbox(
-                        "**Selecione o aluno:**",
-                        student_results['Aluno'].tolist(),
-                        key="aluno_relatorio"
-                    )
-                
-                # Container para os botões de exportação
-                st.markdown("### 📤 **Exportar em Diferentes Formatos**")
-                
-                # Botão para gerar relatório em texto (TXT)
-                if st.button("📝 **Gerar Relatório (TXT)**", type="primary", use_container_width=True):
-                    with st.spinner("📊 Gerando relatório TXT..."):
-                        try:
-                            if report_type == "📋 **Relatório Geral da Turma**":
-                                text_report = create_text_report(student_results, item_results, detailed_df)
-                                filename = f"Relatorio_Turma_TRI_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
-                            else:
-                                text_report = create_text_report(student_results, item_results, detailed_df, aluno_relatorio)
-                                filename = f"Relatorio_{aluno_relatorio}_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
-                            
-                            # Botão de download TXT
-                            st.download_button(
-                                label="⬇️ **Baixar Relatório TXT**",
-                                data=text_report,
-                                file_name=filename,
-                                mime="text/plain",
-                                type="primary"
-                            )
-                            
-                            st.success("✅ **Relatório TXT gerado com sucesso!**")
-                        except Exception as e:
-                            st.error(f"❌ **Erro ao gerar relatório TXT:** {str(e)}")
-                
-                # Botão para gerar relatório em CSV formatado
-                if st.button("📊 **Gerar Relatório (CSV)**", type="secondary", use_container_width=True):
-                    with st.spinner("📊 Gerando relatório CSV..."):
-                        try:
-                            if report_type == "📋 **Relatório Geral da Turma**":
-                                csv_report = create_csv_report(student_results, item_results, detailed_df)
-                                filename = f"Relatorio_Turma_TRI_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-                            else:
-                                csv_report = create_csv_report(student_results, item_results, detailed_df, aluno_relatorio)
-                                filename = f"Relatorio_{aluno_relatorio}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-                            
-                            # Botão de download CSV
-                            st.download_button(
-                                label="⬇️ **Baixar Relatório CSV**",
-                                data=csv_report,
-                                file_name=filename,
-                                mime="text/csv",
-                                type="secondary"
-                            )
-                            
-                            st.success("✅ **Relatório CSV gerado com sucesso!**")
-                        except Exception as e:
-                            st.error(f"❌ **Erro ao gerar relatório CSV:** {str(e)}")
-                
-                # Exportar dados completos
-                st.markdown("### 💾 **Exportar Dados Completos**")
-                
-                # Botão para exportar CSV básico
-                csv_data = df_binary.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="⬇️ **Exportar CSV Simples**",
-                    data=csv_data,
-                    file_name=f"dados_alunos_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
-                    type="secondary",
-                    use_container_width=True
-                )
-                
-                # Botão para exportar Excel completo ou ZIP
-                if st.button("📗 **Exportar Dados Completos**", use_container_width=True):
-                    with st.spinner("Preparando dados para exportação..."):
-                        try:
-                            excel_data, mime_type = export_to_excel(df_binary, student_results, item_results, detailed_df)
-                            
-                            if excel_data:
-                                filename = f"dados_completos_tri_{datetime.now().strftime('%Y%m%d')}"
-                                
-                                if mime_type == 'application/zip':
-                                    filename += ".zip"
-                                    label = "📦 **Baixar ZIP (múltiplos CSVs)**"
-                                else:
-                                    filename += ".xlsx"
-                                    label = "📗 **Baixar Excel Completo**"
-                                
-                                st.download_button(
-                                    label=label,
-                                    data=excel_data,
-                                    file_name=filename,
-                                    mime=mime_type,
-                                    use_container_width=True
-                                )
-                                st.success("✅ **Dados exportados com sucesso!**")
-                            else:
-                                st.error("❌ **Não foi possível criar o arquivo de exportação.**")
-                        except Exception as e:
-                            st.error(f"❌ **Erro ao exportar dados:** {str(e)}")
-                
-                # Exportar JSON
-                top_tutors = get_top_tutors(student_results, 10)
-                json_data = {
-                    'metadata': {
-                        'data_analise': datetime.now().isoformat(),
-                        'total_alunos': len(student_results),
-                        'total_questoes': num_questoes,
-                        'proficiencia_media': float(student_results['Proficiencia (θ)'].mean()),
-                        'desvio_padrao_proficiencia': float(student_results['Proficiencia (θ)'].std()),
-                        'taxa_acerto_media': float(student_results['Percentual de Acerto'].mean()),
-                        'confiabilidade': float(calculate_reliability(item_results))
-                    },
-                    'gabarito': gabarito,
-                    'resumo_alunos': student_results.to_dict('records'),
-                    'resumo_questoes': item_results.to_dict('records')
-                }
-                
-                if len(top_tutors) > 0:
-                    json_data['top_tutores'] = top_tutors.to_dict('records')
-                
-                st.download_button(
-                    label="📄 **Exportar JSON Estruturado**",
-                    data=json.dumps(json_data, indent=2, ensure_ascii=False),
-                    file_name=f"dados_tri_{datetime.now().strftime('%Y%m%d')}.json",
-                    mime="application/json",
-                    type="secondary",
-                    use_container_width=True
-                )
-            
-            with col_r2:
-                st.markdown("### 📈 **Informações**")
-                st.info("""
-                **Formatos disponíveis:**
-                
-                **📝 TXT:**
-                - Relatório formatado em texto
-                - Fácil de ler e compartilhar
-                - Inclui análise completa
-                
-                **📊 CSV:**
-                - Dados estruturados
-                - Ideal para análise em planilhas
-                - Múltiplas seções organizadas
-                
-                **📗 Excel/ZIP:**
-                - Múltiplas abas/arquivos
-                - Dados completos organizados
-                - Inclui lista de tutores
-                
-                **📄 JSON:**
-                - Dados estruturados
-                - Ideal para integração com outros sistemas
-                - Formato universal
-                """)
-                
-                # Explicação dos parâmetros TRI
-                with st.expander("📚 **Explicação dos Parâmetros TRI**", expanded=False):
-                    st.markdown("""
-                    ### 📊 **Parâmetros da Teoria de Resposta ao Item (TRI)**
-                    
-                    **1. Dificuldade (b)**
-                    - **Valores negativos**: Questão fácil (alunos com baixa proficiência conseguem responder)
-                    - **Valores próximos a 0**: Dificuldade média (alunos com proficiência média)
-                    - **Valores positivos**: Questão difícil (apenas alunos com alta proficiência)
-                    - **Faixa típica**: -3 (muito fácil) a +3 (muito difícil)
-                    
-                    **2. Discriminação (a)**
-                    - **< 0.3**: Discriminação baixa (questão problemática, não diferencia bem os alunos)
-                    - **0.3-0.6**: Discriminação moderada (questão aceitável)
-                    - **> 0.6**: Discriminação alta (questão excelente, diferencia bem alunos bons e ruins)
-                    - **Valores negativos**: Questão funciona inversamente (deve ser revisada)
-                    
-                    **3. Proficiência (θ)**
-                    - **< -1.5**: Proficiência muito baixa (intervenção necessária)
-                    - **-1.5 a -0.5**: Proficiência baixa (necessita reforço)
-                    - **-0.5 a 0.5**: Proficiência média (desempenho adequado)
-                    - **0.5 a 1.5**: Proficiência alta (bom desempenho)
-                    - **> 1.5**: Proficiência muito alta (excelente desempenho)
-                    - **Escala**: média = 0, desvio padrão = 1
-                    """)
+            render_export_tab(analysis)
+
 
 else:
     # Tela inicial
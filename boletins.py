@@ -0,0 +1,243 @@
+"""Boletins individuais de todos os alunos em um único ZIP.
+
+Os dados compartilhados (ranking, tutores, respostas e parâmetros das
+questões) são montados uma vez pelo Main.py e enviados a cada processo do
+pool apenas na inicialização; os boletins são gerados em lotes e gravados no
+ZIP à medida que ficam prontos.
+"""
+import csv
+import html
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+FORMATOS = ('txt', 'csv', 'html')
+
+# Alunos por tarefa do pool (lotes grandes diluem o custo de comunicação)
+TAMANHO_LOTE = 100
+# Abaixo disso os boletins são gerados no próprio processo
+MIN_ALUNOS_PROCESSOS = 300
+
+# Recomendações por classificação de θ (coluna Classificacao de student_results)
+INTERPRETACOES = {
+    "MUITO BAIXA": ("Necessita de intervencao pedagogica imediata",
+                    "Sugestao: Acompanhamento individual com tutor"),
+    "BAIXA": ("Necessita de reforco escolar",
+              "Sugestao: Participar de grupos de estudo com tutores"),
+    "MEDIA": ("Desempenho adequado para o nivel escolar",
+              "Sugestao: Praticar questoes de maior dificuldade"),
+    "ALTA": ("Bom desempenho academico",
+             "Sugestao: Desafios adicionais e aprofundamento"),
+    "MUITO ALTA": ("Excelente desempenho",
+                   "Sugestao: Atuar como tutor principal em grupos de estudo"),
+}
+
+_dados_processo = None
+
+
+def preparar_dados(student_results, item_results, detailed_df, ranking, top_tutors):
+    """Reúne em arrays compactos tudo o que os boletins usam (montado uma única vez)."""
+    num_alunos = len(student_results)
+    num_questoes = len(item_results)
+    tutores = {
+        str(aluno): (int(posicao), float(score))
+        for aluno, posicao, score in zip(top_tutors['Aluno'], top_tutors['Posicao'], top_tutors['Score_Tutor'])
+    } if len(top_tutors) > 0 else {}
+
+    return {
+        'alunos': student_results['Aluno'].astype(str).tolist(),
+        'ids': (student_results['ID Aluno'].astype('string').fillna('').tolist()
+                if 'ID Aluno' in student_results.columns else None),
+        'theta': student_results['Proficiencia (θ)'].to_numpy(dtype=float),
+        'pontuacao': student_results['Pontuacao Total'].to_numpy(dtype=int),
+        'percentual': student_results['Percentual de Acerto'].to_numpy(dtype=float),
+        'classificacao': student_results['Classificacao'].tolist(),
+        'pontos_fracos': student_results['Pontos Fracos'].tolist(),
+        'posicao': ranking['posicao'],
+        'percentil': ranking['percentil'],
+        'tutores': tutores,
+        'questoes': item_results['Questao'].astype(str).tolist(),
+        'dificuldade': item_results['Dificuldade (b)'].to_numpy(dtype=float),
+        # detailed_df tem as questões de cada aluno em linhas contíguas
+        'respostas': detailed_df['Resposta_Aluno'].astype(str).to_numpy().reshape(num_alunos, num_questoes),
+        'gabarito': detailed_df['Resposta_Correta'].astype(str).to_numpy()[:num_questoes].tolist(),
+        'acertos': detailed_df['Acerto'].to_numpy(dtype=np.int8).reshape(num_alunos, num_questoes),
+    }
+
+
+def _interpretacao(dados, linha):
+    classificacao = dados['classificacao'][linha]
+    return classificacao, INTERPRETACOES[classificacao]
+
+
+def _nome_arquivo(dados, linha, formato):
+    nome = re.sub(r'[^\w\-]+', '_', dados['alunos'][linha]).strip('_') or 'aluno'
+    return f"{formato}/{dados['posicao'][linha]:04d}_{nome}.{formato}"
+
+
+def _linhas_questoes(dados, linha):
+    for j, questao in enumerate(dados['questoes']):
+        yield (questao, dados['respostas'][linha, j], dados['gabarito'][j],
+               int(dados['acertos'][linha, j]), dados['dificuldade'][j])
+
+
+def boletim_txt(dados, linha):
+    aluno = dados['alunos'][linha]
+    classificacao, recomendacoes = _interpretacao(dados, linha)
+    total = len(dados['alunos'])
+
+    texto = ["=" * 70, f"BOLETIM INDIVIDUAL - {aluno}", "=" * 70]
+    if dados['ids'] is not None and dados['ids'][linha]:
+        texto.append(f"ID: {dados['ids'][linha]}")
+    texto += [
+        f"Proficiencia (θ): {dados['theta'][linha]:.3f}",
+        f"Pontuacao: {dados['pontuacao'][linha]}/{len(dados['questoes'])}",
+        f"Percentual de acerto: {dados['percentual'][linha]:.1f}%",
+        f"Posicao no ranking: {dados['posicao'][linha]}º de {total}",
+        f"Percentil: {dados['percentil'][linha]:.1f}",
+        "",
+    ]
+    if aluno in dados['tutores']:
+        posicao, score = dados['tutores'][aluno]
+        texto += ["ESTE ALUNO PODE SER TUTOR DE COLEGAS",
+                  f"   - Score como tutor: {score:.2f}",
+                  f"   - Posicao entre tutores: {posicao}º", ""]
+    texto.append(f"INTERPRETACAO: Proficiencia {classificacao}")
+    texto += [f"   * {rec}" for rec in recomendacoes]
+    if dados['pontos_fracos'][linha]:
+        texto.append(f"   * Questoes a reforcar: {dados['pontos_fracos'][linha]}")
+    texto += ["", "DETALHAMENTO POR QUESTAO", "-" * 40, "Questao | Resposta | Gabarito | Resultado | Dificuldade"]
+    for questao, resposta, correta, acerto, dificuldade in _linhas_questoes(dados, linha):
+        resultado = "Acertou" if acerto == 1 else "Errou"
+        texto.append(f"{questao:7s} | {resposta:8s} | {correta:8s} | {resultado:9s} | {dificuldade:6.2f}")
+    return "\n".join(texto)
+
+
+def boletim_csv(dados, linha):
+    aluno = dados['alunos'][linha]
+    classificacao, _ = _interpretacao(dados, linha)
+
+    # csv.writer cuida das aspas: nomes com vírgula, ';' ou '"' não quebram o arquivo
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerows([["=== BOLETIM INDIVIDUAL ==="], ["Metrica", "Valor"], ["Aluno", aluno]])
+    if dados['ids'] is not None and dados['ids'][linha]:
+        escritor.writerow(["ID", dados['ids'][linha]])
+    escritor.writerows([
+        ["Proficiencia (θ)", f"{dados['theta'][linha]:.3f}"],
+        ["Pontuacao", f"{dados['pontuacao'][linha]}/{len(dados['questoes'])}"],
+        ["Percentual de acerto", f"{dados['percentual'][linha]:.1f}%"],
+        ["Posicao no ranking", f"{dados['posicao'][linha]}º de {len(dados['alunos'])}"],
+        ["Percentil", f"{dados['percentil'][linha]:.1f}"],
+        ["Classificacao", classificacao],
+        ["Questoes a reforcar", dados['pontos_fracos'][linha]],
+    ])
+    if aluno in dados['tutores']:
+        escritor.writerow(["Score como tutor", f"{dados['tutores'][aluno][1]:.3f}"])
+    escritor.writerows([[], ["=== DETALHAMENTO POR QUESTAO ==="],
+                        ["Questao", "Resposta_Aluno", "Resposta_Correta", "Acerto", "Dificuldade_Questao"]])
+    escritor.writerows(
+        [questao, resposta, correta, acerto, f"{dificuldade:.3f}"]
+        for questao, resposta, correta, acerto, dificuldade in _linhas_questoes(dados, linha)
+    )
+    return buffer.getvalue()
+
+
+def boletim_html(dados, linha):
+    aluno = html.escape(dados['alunos'][linha])
+    classificacao, recomendacoes = _interpretacao(dados, linha)
+    metricas = [
+        ("Proficiência (θ)", f"{dados['theta'][linha]:.3f}"),
+        ("Pontuação", f"{dados['pontuacao'][linha]}/{len(dados['questoes'])}"),
+        ("% Acerto", f"{dados['percentual'][linha]:.1f}%"),
+        ("Posição", f"{dados['posicao'][linha]}º de {len(dados['alunos'])}"),
+        ("Percentil", f"{dados['percentil'][linha]:.1f}"),
+    ]
+    if dados['ids'] is not None and dados['ids'][linha]:
+        metricas.insert(0, ("ID", html.escape(dados['ids'][linha])))
+    if dados['alunos'][linha] in dados['tutores']:
+        metricas.append(("Score como tutor", f"{dados['tutores'][dados['alunos'][linha]][1]:.2f}"))
+
+    linhas_questoes = "".join(
+        f"<tr class=\"{'ok' if acerto == 1 else 'erro'}\"><td>{html.escape(questao)}</td>"
+        f"<td>{html.escape(resposta)}</td><td>{html.escape(correta)}</td>"
+        f"<td>{'✓' if acerto == 1 else '✗'}</td><td>{dificuldade:.2f}</td></tr>"
+        for questao, resposta, correta, acerto, dificuldade in _linhas_questoes(dados, linha)
+    )
+    return (
+        "<!DOCTYPE html><html lang=\"pt-BR\"><head><meta charset=\"utf-8\">"
+        f"<title>Boletim - {aluno}</title><style>"
+        "body{font-family:sans-serif;color:#2D3748;margin:2em}"
+        "table{border-collapse:collapse;margin-bottom:1.5em}"
+        "td,th{border:1px solid #CBD5E0;padding:4px 10px}"
+        "tr.ok td{background:#F0FFF4}tr.erro td{background:#FFF5F5}"
+        "</style></head><body>"
+        f"<h1>Boletim Individual - {aluno}</h1><table>"
+        + "".join(f"<tr><th>{rotulo}</th><td>{valor}</td></tr>" for rotulo, valor in metricas)
+        + f"</table><h2>Proficiência {classificacao}</h2><ul>"
+        + "".join(f"<li>{html.escape(rec)}</li>" for rec in recomendacoes)
+        + (f"<li>Questões a reforçar: {html.escape(dados['pontos_fracos'][linha])}</li>"
+           if dados['pontos_fracos'][linha] else "")
+        + "</ul><h2>Detalhamento por questão</h2><table>"
+        "<tr><th>Questão</th><th>Resposta</th><th>Gabarito</th><th>Resultado</th><th>Dificuldade</th></tr>"
+        + linhas_questoes + "</table></body></html>"
+    )
+
+
+GERADORES = {'txt': boletim_txt, 'csv': boletim_csv, 'html': boletim_html}
+
+
+def gerar_lote(dados, linhas, formatos):
+    """Boletins de um lote de alunos: lista de (nome do arquivo, bytes)."""
+    return [
+        (_nome_arquivo(dados, linha, formato), GERADORES[formato](dados, linha).encode('utf-8'))
+        for linha in linhas for formato in formatos
+    ]
+
+
+def _iniciar_processo(dados):
+    global _dados_processo
+    _dados_processo = dados
+
+
+def _gerar_lote_processo(linhas, formatos):
+    return gerar_lote(_dados_processo, linhas, formatos)
+
+
+def gravar_zip(output, dados, formatos, progresso=None, processos=None):
+    """Grava os boletins de todos os alunos em `output` (ZIP), lote a lote.
+
+    Turmas a partir de MIN_ALUNOS_PROCESSOS usam um pool de processos; os
+    lotes são gravados na ordem do ranking assim que cada um fica pronto.
+    """
+    num_alunos = len(dados['alunos'])
+    ordem = np.argsort(dados['posicao'])
+    lotes = [ordem[inicio:inicio + TAMANHO_LOTE] for inicio in range(0, num_alunos, TAMANHO_LOTE)]
+    processos = processos or os.cpu_count() or 1
+
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        def gravar(arquivos, feitos):
+            for nome, conteudo in arquivos:
+                zf.writestr(nome, conteudo)
+            if progresso is not None:
+                progresso(feitos / num_alunos, f"Gerando boletins ({feitos:,}/{num_alunos:,} alunos)...")
+
+        feitos = 0
+        if num_alunos < MIN_ALUNOS_PROCESSOS or processos == 1:
+            for lote in lotes:
+                feitos += len(lote)
+                gravar(gerar_lote(dados, lote, formatos), feitos)
+        else:
+            # 'spawn' em vez do 'fork' padrão do Linux: um fork do servidor Streamlit
+            # (multithread) pode herdar locks presos por outras threads e travar
+            with ProcessPoolExecutor(max_workers=min(processos, len(lotes)),
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_iniciar_processo, initargs=(dados,)) as pool:
+                for lote, arquivos in zip(lotes, pool.map(_gerar_lote_processo, lotes, [formatos] * len(lotes))):
+                    feitos += len(lote)
+                    gravar(arquivos, feitos)
@@ -0,0 +1,133 @@
+"""Calibração concorrente 2PL (máxima verossimilhança marginal via EM).
+
+Todas as avaliações são ajustadas juntas em uma única matriz esparsa
+alunos × itens (dados ausentes por delineamento): cada avaliação é um grupo
+com distribuição de proficiência própria, e os itens comuns (mesmo código)
+ligam as escalas. Usado pela página de Análise Trimestral.
+"""
+import numpy as np
+from scipy import sparse
+
+# Limites e regularização dos parâmetros dos itens (evitam divergência em itens extremos)
+LIMITES_A = (0.05, 4.0)
+LIMITES_B = (-6.0, 6.0)
+PENALIDADE = 0.01
+
+
+def montar_matriz(blocos, num_itens):
+    """Empilha os blocos de respostas em matrizes esparsas.
+
+    `blocos` é uma lista de (colunas, matriz): `colunas` são os índices globais
+    dos itens e `matriz` tem 1/0 para acerto/erro e -1 para não respondido.
+    Retorna (acertos, observados, grupos), com uma linha por aluno de cada bloco.
+    """
+    linhas, colunas_obs, valores, grupos = [], [], [], []
+    deslocamento = 0
+    for grupo, (colunas, matriz) in enumerate(blocos):
+        matriz = np.asarray(matriz)
+        i, j = np.nonzero(matriz >= 0)
+        linhas.append(i + deslocamento)
+        colunas_obs.append(np.asarray(colunas)[j])
+        valores.append(matriz[i, j])
+        grupos.append(np.full(matriz.shape[0], grupo))
+        deslocamento += matriz.shape[0]
+
+    linhas = np.concatenate(linhas)
+    colunas_obs = np.concatenate(colunas_obs)
+    valores = np.concatenate(valores).astype(float)
+    formato = (deslocamento, num_itens)
+
+    observados = sparse.csr_matrix((np.ones_like(valores), (linhas, colunas_obs)), shape=formato)
+    acertos = sparse.csr_matrix((valores, (linhas, colunas_obs)), shape=formato)
+    acertos.eliminate_zeros()
+    return acertos, observados, np.concatenate(grupos)
+
+
+def _passo_newton(a, b, nos, r, n, livres):
+    """Um passo de Newton (em lote, todos os itens livres) na parametrização z = aθ + c."""
+    c = -a * b
+    P = 1 / (1 + np.exp(-(nos[:, None] * a + c)))
+    resid = r - n * P
+    peso = n * P * (1 - P)
+
+    g_a = (resid * nos[:, None]).sum(axis=0) - PENALIDADE * (a - 1)
+    g_c = resid.sum(axis=0) - PENALIDADE * c
+    h_aa = (peso * nos[:, None] ** 2).sum(axis=0) + PENALIDADE
+    h_ac = (peso * nos[:, None]).sum(axis=0)
+    h_cc = peso.sum(axis=0) + PENALIDADE
+
+    det = h_aa * h_cc - h_ac ** 2
+    delta_a = (h_cc * g_a - h_ac * g_c) / det
+    delta_c = (h_aa * g_c - h_ac * g_a) / det
+
+    a_novo = np.clip(a + delta_a, *LIMITES_A)
+    b_novo = np.clip(-(c + delta_c) / a_novo, *LIMITES_B)
+    return np.where(livres, a_novo, a), np.where(livres, b_novo, b)
+
+
+def calibrar_2pl(acertos, observados, grupos, a_inicial, b_inicial, fixos=None,
+                 medias_iniciais=None, desvios_iniciais=None,
+                 grupo_referencia=0, max_iter=200, tol=1e-4, num_pontos=41):
+    """Ajusta os parâmetros 2PL de todos os itens e a distribuição de cada grupo.
+
+    O grupo de referência fica em N(0, 1); itens em `fixos` (âncoras) mantêm os
+    valores iniciais, e os demais partem dos valores iniciais (início a quente),
+    assim como as distribuições dos grupos, quando informadas.
+    Retorna um dict com a, b, médias e desvios dos grupos, θ (EAP) e erro
+    padrão de cada aluno, número de iterações e se houve convergência.
+    """
+    num_itens = acertos.shape[1]
+    num_grupos = int(grupos.max()) + 1
+    livres = np.ones(num_itens, dtype=bool) if fixos is None else ~np.asarray(fixos, dtype=bool)
+
+    a = np.clip(np.asarray(a_inicial, dtype=float), *LIMITES_A)
+    b = np.clip(np.asarray(b_inicial, dtype=float), *LIMITES_B)
+    medias = np.zeros(num_grupos) if medias_iniciais is None else np.asarray(medias_iniciais, dtype=float)
+    desvios = np.ones(num_grupos) if desvios_iniciais is None else np.asarray(desvios_iniciais, dtype=float)
+    nos = np.linspace(-5, 5, num_pontos)
+    erros = observados - acertos
+
+    convergiu = False
+    for iteracao in range(1, max_iter + 1):
+        # Passo E: posterior de cada aluno nos pontos de quadratura
+        P = np.clip(1 / (1 + np.exp(-a * (nos[:, None] - b))), 1e-9, 1 - 1e-9)
+        log_vero = acertos @ np.log(P).T + erros @ np.log(1 - P).T
+        log_priori = -0.5 * ((nos[None, :] - medias[:, None]) / desvios[:, None]) ** 2
+        log_priori -= np.log(np.exp(log_priori).sum(axis=1, keepdims=True))
+        log_post = log_vero + log_priori[grupos]
+        log_post -= log_post.max(axis=1, keepdims=True)
+        posterior = np.exp(log_post)
+        posterior /= posterior.sum(axis=1, keepdims=True)
+
+        # Contagens esperadas de acertos e de respostas por ponto × item
+        r = np.asarray((acertos.T @ posterior).T)
+        n = np.asarray((observados.T @ posterior).T)
+
+        # Passo M: itens (Newton em lote) e distribuições dos grupos
+        a_ant, b_ant, medias_ant = a, b, medias
+        for _ in range(2):
+            a, b = _passo_newton(a, b, nos, r, n, livres)
+
+        theta = posterior @ nos
+        theta2 = posterior @ nos ** 2
+        contagem = np.bincount(grupos, minlength=num_grupos)
+        media_grupo = np.bincount(grupos, weights=theta, minlength=num_grupos) / np.maximum(contagem, 1)
+        segundo = np.bincount(grupos, weights=theta2, minlength=num_grupos) / np.maximum(contagem, 1)
+        outros = np.arange(num_grupos) != grupo_referencia
+        medias = np.where(outros, media_grupo, 0.0)
+        desvios = np.where(outros, np.sqrt(np.maximum(segundo - media_grupo ** 2, 1e-4)), 1.0)
+
+        if max(np.abs(a - a_ant).max(), np.abs(b - b_ant).max(), np.abs(medias - medias_ant).max()) < tol:
+            convergiu = True
+            break
+
+    return {
+        'a': a,
+        'b': b,
+        'medias': medias,
+        'desvios': desvios,
+        'theta': theta,
+        'erro_padrao': np.sqrt(np.maximum(theta2 - theta ** 2, 0.0)),
+        'iteracoes': iteracao,
+        'convergiu': convergiu
+    }
@@ -0,0 +1,104 @@
+"""Formação de grupos de estudo heterogêneos (um tutor por grupo).
+
+Os alunos são distribuídos em serpentina pela proficiência e depois
+refinados por busca local: trocas de membros entre grupos são avaliadas em
+lote e aceitas quando aumentam a cobertura das questões (questões que pelo
+menos um integrante acertou, ou seja, fraquezas complementares) sem
+desequilibrar a proficiência média dos grupos. Usado pelo Main.py.
+"""
+import numpy as np
+
+# Trocas avaliadas por grupo em cada rodada da busca local
+CANDIDATOS_POR_GRUPO = 4
+# Rodadas seguidas sem melhora antes de encerrar a busca
+PACIENCIA = 10
+
+
+def distribuir_serpentina(theta, tutores):
+    """Grupo inicial de cada aluno: tutor i no grupo i e demais em serpentina por θ."""
+    num_grupos = len(tutores)
+    grupo = np.full(len(theta), -1)
+    grupo[tutores] = np.arange(num_grupos)
+
+    membros = np.argsort(-theta, kind='stable')
+    membros = membros[grupo[membros] < 0]
+    rodada, posicao = np.divmod(np.arange(len(membros)), num_grupos)
+    grupo[membros] = np.where(rodada % 2 == 0, posicao, num_grupos - 1 - posicao)
+    return grupo
+
+
+def formar_grupos(theta, acertos, tutores, peso_equilibrio=1.0, max_rodadas=300, semente=0):
+    """Distribui os alunos em len(tutores) grupos; retorna o grupo de cada aluno.
+
+    `acertos` é a matriz alunos × questões (1/0). O objetivo é a soma da
+    cobertura de questões dos grupos menos `peso_equilibrio` × nº de questões ×
+    Σ (θ médio do grupo - θ médio geral)². Tutores ficam fixos; as trocas
+    preservam o tamanho dos grupos.
+    """
+    theta = np.asarray(theta, dtype=float)
+    acertos = np.asarray(acertos, dtype=np.int32)
+    num_grupos = len(tutores)
+    grupo = distribuir_serpentina(theta, tutores)
+    livres = np.flatnonzero(np.isin(np.arange(len(theta)), tutores, invert=True))
+    if num_grupos < 2 or len(livres) < 2:
+        return grupo
+
+    contagem = np.zeros((num_grupos, acertos.shape[1]), dtype=np.int32)
+    np.add.at(contagem, grupo, acertos)
+    soma_theta = np.bincount(grupo, weights=theta, minlength=num_grupos)
+    tamanho = np.bincount(grupo, minlength=num_grupos)
+    media_geral = theta.mean()
+    peso = peso_equilibrio * acertos.shape[1]
+
+    def desvio(soma, g):
+        return (soma / tamanho[g] - media_geral) ** 2
+
+    rng = np.random.default_rng(semente)
+    sem_melhora = 0
+    for _ in range(max_rodadas):
+        # Pares de membros candidatos à troca (de grupos diferentes)
+        k = CANDIDATOS_POR_GRUPO * num_grupos
+        s, t = rng.choice(livres, k), rng.choice(livres, k)
+        gs, gt = grupo[s], grupo[t]
+        validos = gs != gt
+        s, t, gs, gt = s[validos], t[validos], gs[validos], gt[validos]
+
+        # Variação da cobertura e do equilíbrio de cada troca, todas de uma vez
+        diferenca = acertos[t] - acertos[s]
+        cobertura = (((contagem[gs] + diferenca) > 0).sum(axis=1) - (contagem[gs] > 0).sum(axis=1)
+                     + ((contagem[gt] - diferenca) > 0).sum(axis=1) - (contagem[gt] > 0).sum(axis=1))
+        delta_theta = theta[t] - theta[s]
+        equilibrio = (desvio(soma_theta[gs] + delta_theta, gs) - desvio(soma_theta[gs], gs)
+                      + desvio(soma_theta[gt] - delta_theta, gt) - desvio(soma_theta[gt], gt))
+        ganho = cobertura - peso * equilibrio
+
+        # Trocas com ganho, da melhor para a pior; cada grupo entra em no máximo uma
+        ordem = np.argsort(-ganho, kind='stable')
+        ordem = ordem[ganho[ordem] > 1e-9]
+        if len(ordem) == 0:
+            sem_melhora += 1
+            if sem_melhora >= PACIENCIA:
+                break
+            continue
+        sem_melhora = 0
+        grupos_trocas = np.column_stack([gs[ordem], gt[ordem]]).ravel()
+        _, primeira = np.unique(grupos_trocas, return_index=True)
+        livre = np.zeros(len(grupos_trocas), dtype=bool)
+        livre[primeira] = True
+        aceitas = ordem[livre.reshape(-1, 2).all(axis=1)]
+
+        s, t, gs, gt = s[aceitas], t[aceitas], gs[aceitas], gt[aceitas]
+        grupo[s], grupo[t] = gt, gs
+        contagem[gs] += acertos[t] - acertos[s]
+        contagem[gt] += acertos[s] - acertos[t]
+        soma_theta[gs] += theta[t] - theta[s]
+        soma_theta[gt] += theta[s] - theta[t]
+
+    return grupo
+
+
+def cobertura_dos_grupos(grupo, acertos, num_grupos):
+    """% das questões que pelo menos um integrante de cada grupo acertou."""
+    contagem = np.zeros((num_grupos, np.shape(acertos)[1]), dtype=np.int32)
+    np.add.at(contagem, grupo, np.asarray(acertos, dtype=np.int32))
+    return (contagem > 0).mean(axis=1) * 100
@@ -0,0 +1,260 @@
+"""Histórico local de avaliações (SQLite).
+
+Usado pelo Main.py para gravar análises e pela página de Análise Trimestral
+para consultá-las, com os filtros aplicados diretamente no SQL.
+"""
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+CAMINHO_PADRAO = os.environ.get(
+    'KAIROS_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kairos_historico.db')
+)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS avaliacoes (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL UNIQUE,
+    data_analise TEXT NOT NULL,
+    total_alunos INTEGER,
+    total_questoes INTEGER,
+    proficiencia_media REAL,
+    desvio_padrao_proficiencia REAL,
+    taxa_acerto_media REAL,
+    confiabilidade REAL
+);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_data ON avaliacoes (data_analise);
+
+CREATE TABLE IF NOT EXISTS alunos (
+    avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id) ON DELETE CASCADE,
+    aluno TEXT NOT NULL,
+    proficiencia REAL,
+    pontuacao_total INTEGER,
+    percentual_acerto REAL,
+    z_score REAL,
+    id_aluno TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alunos_avaliacao ON alunos (avaliacao_id);
+CREATE INDEX IF NOT EXISTS idx_alunos_aluno ON alunos (aluno, avaliacao_id);
+
+CREATE TABLE IF NOT EXISTS questoes (
+    avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id) ON DELETE CASCADE,
+    questao TEXT NOT NULL,
+    dificuldade REAL,
+    discriminacao REAL,
+    percentual_acerto REAL,
+    correlacao_bisserial REAL,
+    id_questao TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_questoes_avaliacao ON questoes (avaliacao_id, questao);
+
+CREATE TABLE IF NOT EXISTS tutores (
+    avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id) ON DELETE CASCADE,
+    aluno TEXT NOT NULL,
+    proficiencia REAL,
+    pontuacao_total INTEGER,
+    percentual_acerto REAL,
+    score_tutor REAL,
+    posicao INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tutores_avaliacao ON tutores (avaliacao_id);
+
+CREATE TABLE IF NOT EXISTS respostas (
+    avaliacao_id INTEGER NOT NULL REFERENCES avaliacoes (id) ON DELETE CASCADE,
+    aluno TEXT NOT NULL,
+    questao TEXT NOT NULL,
+    acerto INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_aluno ON respostas (aluno, avaliacao_id);
+CREATE INDEX IF NOT EXISTS idx_respostas_questao ON respostas (questao, avaliacao_id);
+"""
+
+
+def conectar(caminho=None):
+    """Abre o banco (criando as tabelas na primeira vez)."""
+    conn = sqlite3.connect(caminho or CAMINHO_PADRAO)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(ESQUEMA)
+    
+    # Bancos criados antes das colunas de ID do aluno e da questão
+    for tabela, coluna in (('alunos', 'id_aluno'), ('questoes', 'id_questao')):
+        colunas = {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+        if coluna not in colunas:
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_questoes_id ON questoes (id_questao)")
+    return conn
+
+
+def versao(caminho=None):
+    """Marca de modificação do banco (muda a cada gravação); usada como chave de cache."""
+    caminho = caminho or CAMINHO_PADRAO
+    marcas = []
+    for arquivo in (caminho, caminho + '-wal'):
+        if os.path.exists(arquivo):
+            info = os.stat(arquivo)
+            marcas.append(f"{info.st_mtime_ns}:{info.st_size}")
+    return '|'.join(marcas)
+
+
+def salvar_avaliacao(nome, digest, metadata, student_results, item_results, detailed_df, top_tutors, caminho=None):
+    """Grava uma análise do Main.py, substituindo a de mesmo nome ou mesmo digest."""
+    with closing(conectar(caminho)) as conn, conn:
+        conn.execute("DELETE FROM avaliacoes WHERE nome = ? OR digest = ?", (nome, digest))
+        cursor = conn.execute(
+            """INSERT INTO avaliacoes (nome, digest, data_analise, total_alunos, total_questoes,
+                                       proficiencia_media, desvio_padrao_proficiencia,
+                                       taxa_acerto_media, confiabilidade)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (nome, digest, metadata['data_analise'], metadata['total_alunos'], metadata['total_questoes'],
+             metadata['proficiencia_media'], metadata['desvio_padrao_proficiencia'],
+             metadata['taxa_acerto_media'], metadata['confiabilidade'])
+        )
+        avaliacao_id = cursor.lastrowid
+
+        if 'ID Aluno' in student_results.columns:
+            ids = student_results['ID Aluno'].astype(object).where(student_results['ID Aluno'].notna(), None)
+        else:
+            ids = [None] * len(student_results)
+        conn.executemany(
+            """INSERT INTO alunos (avaliacao_id, aluno, proficiencia, pontuacao_total,
+                                   percentual_acerto, z_score, id_aluno)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            zip([avaliacao_id] * len(student_results),
+                student_results['Aluno'].astype(str),
+                student_results['Proficiencia (θ)'].astype(float),
+                student_results['Pontuacao Total'].astype(int).tolist(),
+                student_results['Percentual de Acerto'].astype(float),
+                student_results['Z-Score'].astype(float),
+                ids)
+        )
+        if 'ID Questao' in item_results.columns:
+            ids_questoes = item_results['ID Questao'].astype(str).tolist()
+        else:
+            ids_questoes = [None] * len(item_results)
+        conn.executemany(
+            """INSERT INTO questoes (avaliacao_id, questao, dificuldade, discriminacao,
+                                     percentual_acerto, correlacao_bisserial, id_questao)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            zip([avaliacao_id] * len(item_results),
+                item_results['Questao'].astype(str),
+                item_results['Dificuldade (b)'].astype(float),
+                item_results['Discriminacao (a)'].astype(float),
+                item_results['% Acerto'].astype(float),
+                item_results['Correlacao Bisserial'].astype(float),
+                ids_questoes)
+        )
+        if len(top_tutors) > 0:
+            conn.executemany(
+                "INSERT INTO tutores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip([avaliacao_id] * len(top_tutors),
+                    top_tutors['Aluno'].astype(str),
+                    top_tutors['Proficiencia (θ)'].astype(float),
+                    top_tutors['Pontuacao Total'].astype(int).tolist(),
+                    top_tutors['Percentual de Acerto'].astype(float),
+                    top_tutors['Score_Tutor'].astype(float),
+                    top_tutors['Posicao'].astype(int).tolist())
+            )
+        conn.executemany(
+            "INSERT INTO respostas VALUES (?, ?, ?, ?)",
+            zip([avaliacao_id] * len(detailed_df),
+                detailed_df['Aluno'].astype(str),
+                detailed_df['Questao'].astype(str),
+                detailed_df['Acerto'].astype(int).tolist())
+        )
+
+    return avaliacao_id
+
+
+def listar_avaliacoes(caminho=None):
+    """Nome e data de todas as avaliações gravadas, em ordem cronológica."""
+    with closing(conectar(caminho)) as conn:
+        return pd.read_sql_query(
+            "SELECT nome, data_analise FROM avaliacoes ORDER BY data_analise, nome", conn
+        )
+
+
+def _filtros(avaliacoes=None, data_inicio=None, data_fim=None):
+    """Cláusula WHERE (sobre a tabela de avaliações `av`) e seus parâmetros."""
+    condicoes, parametros = [], []
+    if avaliacoes:
+        condicoes.append(f"av.nome IN ({', '.join('?' * len(avaliacoes))})")
+        parametros.extend(avaliacoes)
+    if data_inicio:
+        condicoes.append("av.data_analise >= ?")
+        parametros.append(str(data_inicio))
+    if data_fim:
+        # Datas ISO: tudo o que começa com a data final ainda está no intervalo
+        condicoes.append("av.data_analise < ?")
+        parametros.append(f"{data_fim}~")
+    return (' WHERE ' + ' AND '.join(condicoes)) if condicoes else '', parametros
+
+
+def consultar_tabelas(avaliacoes=None, data_inicio=None, data_fim=None, aluno=None, caminho=None):
+    """Lê as tabelas do dashboard já filtradas no banco.
+
+    Retorna (df_avaliacoes, df_alunos, df_questoes, df_tutores) com as mesmas
+    colunas que a página monta a partir dos arquivos JSON; `aluno` filtra
+    (por trecho do nome) as tabelas de alunos e tutores.
+    """
+    where, parametros = _filtros(avaliacoes, data_inicio, data_fim)
+    filtro_aluno, parametros_aluno = '', []
+    if aluno:
+        filtro_aluno = (" AND " if where else " WHERE ") + "t.aluno LIKE ?"
+        parametros_aluno = [f"%{aluno}%"]
+
+    with closing(conectar(caminho)) as conn:
+        df_avaliacoes = pd.read_sql_query(
+            f"""SELECT av.nome AS "Avaliação", av.data_analise AS "Data Análise",
+                       av.total_alunos AS "Total Alunos", av.total_questoes AS "Total Questões",
+                       av.proficiencia_media AS "Proficiência Média",
+                       av.desvio_padrao_proficiencia AS "Desvio Padrão",
+                       av.taxa_acerto_media AS "Taxa Acerto Média",
+                       av.confiabilidade AS "Confiabilidade"
+                FROM avaliacoes av{where}
+                ORDER BY av.data_analise, av.nome""",
+            conn, params=parametros
+        )
+        df_alunos = pd.read_sql_query(
+            f"""SELECT av.nome AS "Avaliação", t.aluno AS "Aluno", t.proficiencia AS "Proficiência",
+                       t.pontuacao_total AS "Pontuação Total", t.percentual_acerto AS "% Acerto",
+                       t.z_score AS "Z-Score", t.id_aluno AS "ID"
+                FROM alunos t JOIN avaliacoes av ON av.id = t.avaliacao_id{where}{filtro_aluno}
+                ORDER BY av.data_analise, av.nome, t.rowid""",
+            conn, params=parametros + parametros_aluno
+        )
+        df_questoes = pd.read_sql_query(
+            f"""SELECT av.nome AS "Avaliação", t.questao AS "Questão", t.dificuldade AS "Dificuldade",
+                       t.discriminacao AS "Discriminação", t.percentual_acerto AS "% Acerto",
+                       t.correlacao_bisserial AS "Correlação Bisserial", t.id_questao AS "ID"
+                FROM questoes t JOIN avaliacoes av ON av.id = t.avaliacao_id{where}
+                ORDER BY av.data_analise, av.nome, t.rowid""",
+            conn, params=parametros
+        )
+        df_tutores = pd.read_sql_query(
+            f"""SELECT av.nome AS "Avaliação", t.aluno AS "Aluno", t.proficiencia AS "Proficiência",
+                       t.pontuacao_total AS "Pontuação Total", t.percentual_acerto AS "% Acerto",
+                       t.score_tutor AS "Score_Tutor", t.posicao AS "Posição"
+                FROM tutores t JOIN avaliacoes av ON av.id = t.avaliacao_id{where}{filtro_aluno}
+                ORDER BY av.data_analise, av.nome, t.posicao""",
+            conn, params=parametros + parametros_aluno
+        )
+
+    return df_avaliacoes, df_alunos, df_questoes, df_tutores
+
+
+def consultar_respostas(avaliacoes=None, data_inicio=None, data_fim=None, caminho=None):
+    """Tabela longa de acertos (avaliação, aluno, questão) das avaliações filtradas, na ordem de gravação."""
+    where, parametros = _filtros(avaliacoes, data_inicio, data_fim)
+    with closing(conectar(caminho)) as conn:
+        return pd.read_sql_query(
+            f"""SELECT av.nome AS "Avaliação", r.aluno AS "Aluno", r.questao AS "Questão",
+                       r.acerto AS "Acerto"
+                FROM respostas r JOIN avaliacoes av ON av.id = r.avaliacao_id{where}
+                ORDER BY av.data_analise, av.nome, r.rowid""",
+            conn, params=parametros
+        )
@@ -2,13 +2,23 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import json
+import pyarrow.parquet as pq
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+from scipy.optimize import minimize
+from scipy.stats import norm, t as dist_t
 from datetime import datetime
 import zipfile
+import hashlib
+import threading
+from collections import OrderedDict
 from io import BytesIO
 
+import calibracao
+import historico_db
+import tabelas
+
 # Configuração da página
 st.set_page_config(
     page_title="Análise de Avaliações Educacionais",
@@ -124,196 +134,663 @@ st.markdown("""
 # Título principal
 st.markdown('<h1 class="main-header">📈 Dashboard de Análise de Avaliações Educacionais</h1>', unsafe_allow_html=True)
 
-# Upload de múltiplos arquivos
-st.sidebar.header("📂 Upload de Arquivos")
-uploaded_files = st.sidebar.file_uploader(
-    "Selecione os arquivos JSON de avaliação",
-    type=['json'],
-    accept_multiple_files=True,
-    help="Selecione um ou mais arquivos JSON gerados pelo sistema de avaliação"
+# Fonte dos dados: upload de múltiplos arquivos ou histórico local (SQLite)
+FONTE_ARQUIVOS = "📂 Arquivos enviados"
+FONTE_HISTORICO = "🗄️ Histórico local"
+
+st.sidebar.header("📂 Fonte dos Dados")
+fonte_dados = st.sidebar.radio(
+    "Carregar avaliações de",
+    [FONTE_ARQUIVOS, FONTE_HISTORICO],
+    help="O histórico local reúne as análises salvas pela aba Exportar da página principal"
 )
 
-@st.cache_data
-def carregar_arquivos(uploaded_files):
-    """Carrega e processa os arquivos JSON."""
-    dados = {}
+uploaded_files = None
+if fonte_dados == FONTE_ARQUIVOS:
+    uploaded_files = st.sidebar.file_uploader(
+        "Selecione os arquivos JSON (ou Parquet .zip) de avaliação",
+        type=['json', 'zip'],
+        accept_multiple_files=True,
+        help="Selecione um ou mais arquivos JSON ou Parquet (.parquet.zip) gerados pelo sistema de avaliação"
+    )
+
+# Colunas lidas de cada tabela Parquet (apenas as usadas pelo dashboard)
+COLUNAS_PARQUET = {
+    'resumo_alunos': ['Aluno', 'Proficiencia (θ)', 'Pontuacao Total', 'Percentual de Acerto', 'Z-Score', 'ID Aluno'],
+    'resumo_questoes': ['Questao', 'Dificuldade (b)', 'Discriminacao (a)', '% Acerto', 'Correlacao Bisserial', 'ID Questao'],
+    'top_tutores': ['Aluno', 'Proficiencia (θ)', 'Pontuacao Total', 'Percentual de Acerto', 'Score_Tutor', 'Posicao'],
+    'detalhado': ['Aluno', 'Questao', 'Acerto']
+}
+
+def ler_parquet_zip(conteudo_bytes):
+    """Lê a exportação colunar (ZIP com tabelas Parquet) na mesma estrutura do JSON."""
+    with zipfile.ZipFile(BytesIO(conteudo_bytes)) as zip_file:
+        conteudo = json.loads(zip_file.read('metadata.json'))
+        membros = set(zip_file.namelist())
+        
+        for secao, colunas in COLUNAS_PARQUET.items():
+            if f'{secao}.parquet' not in membros:
+                continue
+            tabela = pq.ParquetFile(BytesIO(zip_file.read(f'{secao}.parquet')))
+            disponiveis = [c for c in colunas if c in tabela.schema_arrow.names]
+            conteudo[secao] = tabela.read(columns=disponiveis).to_pandas()
     
-    if uploaded_files:
-        for uploaded_file in uploaded_files:
-            try:
-                content = json.loads(uploaded_file.getvalue().decode())
-                nome_avaliacao = uploaded_file.name.replace('.json', '')
-                dados[nome_avaliacao] = content
-            except Exception as e:
-                st.error(f"Erro ao carregar {uploaded_file.name}: {e}")
+    return conteudo
+
+# Mapeamento das seções do arquivo para as colunas usadas no dashboard
+COLUNAS_ALUNOS = {
+    'Aluno': 'Aluno',
+    'Proficiencia (θ)': 'Proficiência',
+    'Pontuacao Total': 'Pontuação Total',
+    'Percentual de Acerto': '% Acerto',
+    'Z-Score': 'Z-Score',
+    'ID Aluno': 'ID'
+}
+COLUNAS_QUESTOES = {
+    'Questao': 'Questão',
+    'Dificuldade (b)': 'Dificuldade',
+    'Discriminacao (a)': 'Discriminação',
+    '% Acerto': '% Acerto',
+    'Correlacao Bisserial': 'Correlação Bisserial',
+    'ID Questao': 'ID'
+}
+COLUNAS_TUTORES = {
+    'Aluno': 'Aluno',
+    'Proficiencia (θ)': 'Proficiência',
+    'Pontuacao Total': 'Pontuação Total',
+    'Percentual de Acerto': '% Acerto',
+    'Score_Tutor': 'Score_Tutor',
+    'Posicao': 'Posição'
+}
+TIPOS_COLUNAS = {
+    'Aluno': str,
+    'ID': 'string',
+    'Questão': str,
+    'Pontuação Total': 'int64',
+    'Posição': 'int64'
+}
+
+def normalizar_secao(secao, colunas, opcionais=()):
+    """Converte uma seção (lista de dicts do JSON ou DataFrame do Parquet) em um DataFrame tipado."""
+    tabela = pd.DataFrame(secao)
+    if tabela.empty:
+        return pd.DataFrame(columns=list(colunas.values()))
     
-    return dados
+    for coluna in opcionais:
+        if coluna not in tabela.columns:
+            tabela[coluna] = np.nan
+    
+    tabela = tabela[list(colunas)].rename(columns=colunas).reset_index(drop=True)
+    tipos = {c: TIPOS_COLUNAS.get(c, 'float64') for c in tabela.columns}
+    return tabela.astype(tipos)
 
-# Carregar dados
-dados = carregar_arquivos(uploaded_files)
+def normalizar_nomes(nomes):
+    """Forma canônica dos nomes: sem acentos, sem diferença de maiúsculas e com espaços simples."""
+    return (
+        pd.Series(nomes, dtype='string')
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.casefold().str.split().str.join(' ')
+    )
 
-if not dados:
-    st.warning("📁 Nenhum arquivo JSON carregado.")
+def identidades_dos_alunos(alunos):
+    """Identidade de cada linha de alunos: o ID informado ou, na falta dele, o nome normalizado.
     
-    st.markdown("""
-    <div class="info-box">
-    <h3>📋 Como usar:</h3>
-    <ol>
-        <li>No menu lateral à esquerda, clique em <strong>"Browse files"</strong></li>
-        <li>Selecione um ou mais arquivos JSON das avaliações</li>
-        <li>Os dados serão automaticamente carregados e analisados</li>
-        <li>Explore as diferentes visualizações abaixo</li>
-    </ol>
-    <p><strong>Nota:</strong> Os arquivos devem estar no formato JSON gerado pelo sistema de avaliação.</p>
-    </div>
-    """, unsafe_allow_html=True)
+    Assim "Joao" e "João " são o mesmo aluno, e alunos homônimos com IDs
+    diferentes permanecem separados.
+    """
+    nomes = alunos['Aluno']
+    if isinstance(nomes.dtype, pd.CategoricalDtype):
+        # Normalizar apenas os nomes distintos
+        canonicos = ('nome:' + normalizar_nomes(nomes.cat.categories.astype(str))).to_numpy(dtype=object)
+        identidades = canonicos[nomes.cat.codes.to_numpy()]
+    else:
+        identidades = ('nome:' + normalizar_nomes(nomes.astype(str))).to_numpy(dtype=object)
     
-    # Exemplo da estrutura esperada
-    with st.expander("📄 Exemplo da estrutura do arquivo JSON esperada"):
-        st.json({
-            "metadata": {
-                "data_analise": "2025-12-26T22:32:13.514421",
-                "total_alunos": 5,
-                "total_questoes": 4,
-                "proficiencia_media": 0.8738110418683684,
-                "desvio_padrao_proficiencia": 0.588300615910456,
-                "taxa_acerto_media": 85.0,
-                "confiabilidade": 0.7621947100625063
-            },
-            "gabarito": {"Q1": "A", "Q2": "B", "Q3": "C", "Q4": "C"},
-            "resumo_alunos": [
-                {
-                    "Aluno": "Aluno 1",
-                    "Proficiencia (θ)": 1.2815515655446004,
-                    "Pontuacao Total": 4,
-                    "Percentual de Acerto": 100.0,
-                    "Z-Score": 0.7748891497507717
-                }
-            ]
-        })
-    st.stop()
+    if 'ID' in alunos.columns:
+        ids = alunos['ID'].astype('string').str.strip()
+        informado = (ids.notna() & (ids != '')).to_numpy()
+        identidades = np.where(informado, ('id:' + ids.fillna('')).to_numpy(dtype=object), identidades)
+    
+    return identidades
 
-# Exibir estatísticas básicas
-st.markdown('<h2 class="sub-header">📋 Resumo das Avaliações</h2>', unsafe_allow_html=True)
+# Métricas por avaliação acumuladas nos cards e no relatório consolidado
+METRICAS_AGREGADAS = ['Proficiência Média', 'Taxa Acerto Média', 'Confiabilidade']
+
+def agregados_da_avaliacao(info, alunos):
+    """Contribuição de uma avaliação para os agregados acumulados (calculada uma única vez).
+    
+    Guarda soma e contagem de cada métrica da avaliação e, por identidade de
+    aluno, contagem, soma e soma dos quadrados da proficiência. θ ausente não
+    entra nos acumuladores; alunos sem nenhum θ válido ficam de fora, assim
+    como identidades repetidas na avaliação (ver montar_registro_alunos).
+    """
+    proficiencia = alunos['Proficiência'].astype(float).to_numpy()
+    identidades = identidades_dos_alunos(alunos)
+    valido = np.isfinite(proficiencia) & ~pd.Series(identidades).duplicated(keep=False).to_numpy()
+    proficiencia = np.where(valido, proficiencia, 0.0)
+    por_aluno = pd.DataFrame({
+        'contagem': valido.astype(float),
+        'soma': proficiencia,
+        'soma_quad': proficiencia ** 2
+    }).groupby(identidades).sum()
+    por_aluno = por_aluno[por_aluno['contagem'] > 0]
+    nomes = pd.Series(alunos['Aluno'].astype(str).to_numpy(), index=identidades)
+    
+    metricas = {}
+    for metrica in METRICAS_AGREGADAS:
+        valor = info.get(metrica)
+        metricas[metrica] = (0.0, 0) if valor is None or pd.isna(valor) else (float(valor), 1)
+    
+    return {
+        'metricas': metricas,
+        'por_aluno': por_aluno,
+        'nomes': nomes[~nomes.index.duplicated() & nomes.index.isin(por_aluno.index)].to_dict()
+    }
+
+def bloco_de_respostas(alunos, questoes, acertos):
+    """Matriz de acertos (alunos × questões, -1 = não respondido) a partir da tabela longa.
+    
+    A tabela longa vem em blocos de um aluno por vez (como a detalhada do
+    Main.py); alunos homônimos permanecem em linhas separadas.
+    """
+    codigos_questoes, questoes_unicas = pd.factorize(np.asarray(questoes, dtype=str))
+    num_questoes = max(len(questoes_unicas), 1)
+    linhas = np.arange(len(codigos_questoes)) // num_questoes
+    
+    matriz = np.full((len(codigos_questoes) // num_questoes, len(questoes_unicas)), -1, dtype=np.int8)
+    matriz[linhas, codigos_questoes] = np.asarray(acertos, dtype=np.int8)
+    return {
+        'alunos': np.asarray(alunos, dtype=str)[::num_questoes],
+        'questoes': np.asarray(questoes_unicas, dtype=str),
+        'matriz': matriz
+    }
 
-# Criar DataFrames para análise
-avaliacoes_info = []
-alunos_data = []
-questoes_data = []
-tutores_data = []
+def normalizar_respostas(conteudo):
+    """Respostas do arquivo (seção 'respostas' do JSON ou tabela 'detalhado' do Parquet), se houver."""
+    if 'respostas' in conteudo:
+        respostas = conteudo['respostas']
+        acertos = ''.join(respostas['acertos']).encode('ascii')
+        matriz = np.frombuffer(acertos, dtype=np.uint8).reshape(len(respostas['acertos']), len(respostas['questoes']))
+        return {
+            'alunos': np.asarray(respostas['alunos'], dtype=str),
+            'questoes': np.asarray(respostas['questoes'], dtype=str),
+            'matriz': (matriz - ord('0')).astype(np.int8)
+        }
+    if 'detalhado' in conteudo:
+        detalhado = conteudo['detalhado']
+        return bloco_de_respostas(detalhado['Aluno'], detalhado['Questao'], detalhado['Acerto'])
+    return None
 
-for avaliacao_nome, conteudo in dados.items():
-    # Metadata
+def normalizar_conteudo(conteudo):
+    """Transforma o conteúdo de um arquivo em tabelas colunares (feito uma única vez por arquivo)."""
     meta = conteudo['metadata']
-    avaliacoes_info.append({
-        'Avaliação': avaliacao_nome,
-        'Data Análise': meta['data_analise'],
-        'Total Alunos': meta['total_alunos'],
-        'Total Questões': meta['total_questoes'],
-        'Proficiência Média': meta['proficiencia_media'],
-        'Desvio Padrão': meta['desvio_padrao_proficiencia'],
-        'Taxa Acerto Média': meta['taxa_acerto_media'],
-        'Confiabilidade': meta['confiabilidade']
+    tutores = conteudo.get('top_tutores')
+    
+    normalizado = {
+        'info': {
+            'Data Análise': meta['data_analise'],
+            'Total Alunos': meta['total_alunos'],
+            'Total Questões': meta['total_questoes'],
+            'Proficiência Média': meta['proficiencia_media'],
+            'Desvio Padrão': meta['desvio_padrao_proficiencia'],
+            'Taxa Acerto Média': meta['taxa_acerto_media'],
+            'Confiabilidade': meta['confiabilidade']
+        },
+        'alunos': normalizar_secao(conteudo['resumo_alunos'], COLUNAS_ALUNOS, opcionais=['ID Aluno']),
+        'questoes': normalizar_secao(conteudo['resumo_questoes'], COLUNAS_QUESTOES, opcionais=['Correlacao Bisserial', 'ID Questao']),
+        'tutores': normalizar_secao(tutores, COLUNAS_TUTORES) if tutores is not None else None,
+        'respostas': normalizar_respostas(conteudo)
+    }
+    normalizado['agregados'] = agregados_da_avaliacao(normalizado['info'], normalizado['alunos'])
+    return normalizado
+
+@st.cache_resource(max_entries=8)
+def montar_tabelas(digest_dados, _dados):
+    """Empilha as tabelas de todas as avaliações em um único concat (cache pelo digest do conjunto).
+    
+    'Avaliação' e 'Aluno' viram colunas categóricas. Os DataFrames retornados
+    são compartilhados pelo cache e não devem ser modificados.
+    """
+    nomes = list(_dados.keys())
+    
+    def empilhar(secao, colunas):
+        partes = [_dados[nome][secao] for nome in nomes if _dados[nome][secao] is not None]
+        if not partes:
+            partes = [pd.DataFrame(columns=list(colunas.values()))]
+        tamanhos = [len(_dados[nome][secao]) if _dados[nome][secao] is not None else 0 for nome in nomes]
+        
+        tabela = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0].copy()
+        codigos = np.repeat(np.arange(len(nomes)), tamanhos)
+        tabela.insert(0, 'Avaliação', pd.Categorical.from_codes(codigos, categories=nomes))
+        if 'Aluno' in tabela.columns:
+            tabela['Aluno'] = tabela['Aluno'].astype('category')
+        return tabela
+    
+    avaliacoes_info = [{'Avaliação': nome, **_dados[nome]['info']} for nome in nomes]
+    df_avaliacoes = pd.DataFrame(avaliacoes_info)
+    df_alunos = empilhar('alunos', COLUNAS_ALUNOS)
+    df_questoes = empilhar('questoes', COLUNAS_QUESTOES)
+    df_tutores = empilhar('tutores', COLUNAS_TUTORES)
+    if df_tutores.empty:
+        df_tutores = None
+    
+    return avaliacoes_info, df_avaliacoes, df_alunos, df_questoes, df_tutores
+
+@st.cache_resource(max_entries=8)
+def montar_tabelas_historico(versao_db, avaliacoes, data_inicio, data_fim, aluno):
+    """Consulta o histórico local com os filtros aplicados no SQL.
+    
+    Retorna as tabelas no mesmo formato de montar_tabelas; `versao_db` invalida
+    o cache sempre que uma nova análise é gravada.
+    """
+    df_avaliacoes, df_alunos, df_questoes, df_tutores = historico_db.consultar_tabelas(
+        list(avaliacoes), data_inicio, data_fim, aluno
+    )
+    nomes = df_avaliacoes['Avaliação'].tolist()
+    
+    for tabela in (df_alunos, df_questoes, df_tutores):
+        tabela['Avaliação'] = pd.Categorical(tabela['Avaliação'], categories=nomes)
+        if 'Aluno' in tabela.columns:
+            tabela['Aluno'] = tabela['Aluno'].astype('category')
+    df_alunos['ID'] = df_alunos['ID'].astype('string')
+    df_questoes['ID'] = df_questoes['ID'].astype('string')
+    
+    avaliacoes_info = df_avaliacoes.to_dict('records')
+    if df_tutores.empty:
+        df_tutores = None
+    
+    return avaliacoes_info, df_avaliacoes, df_alunos, df_questoes, df_tutores
+
+@st.cache_resource(max_entries=8)
+def montar_registro_alunos(digest_dados, _df_alunos):
+    """Registro de alunos: cada identidade recebe uma chave inteira compacta.
+    
+    Retorna o registro (uma linha por aluno, indexado pela chave, com nome de
+    exibição e ID) e as matrizes densas aluno × avaliação de proficiência e
+    % de acerto, de modo que consultar um aluno é a leitura de uma linha.
+    
+    Uma identidade repetida na mesma avaliação (homônimos sem ID, ou ID
+    duplicado) não indica qual linha é qual aluno: essas linhas ficam fora das
+    matrizes e são listadas em 'ambiguos' (Avaliação, Aluno) para aviso.
+    """
+    identidades = identidades_dos_alunos(_df_alunos)
+    chaves, unicas = pd.factorize(identidades)
+    primeiras = np.unique(chaves, return_index=True)[1]
+    
+    registro = pd.DataFrame({
+        'Identidade': unicas,
+        'Aluno': _df_alunos['Aluno'].astype(str).to_numpy()[primeiras],
+        'ID': (_df_alunos['ID'].astype('string').to_numpy()[primeiras]
+               if 'ID' in _df_alunos.columns else pd.NA)
     })
     
-    # Alunos
-    for aluno in conteudo['resumo_alunos']:
-        alunos_data.append({
-            'Avaliação': avaliacao_nome,
-            'Aluno': aluno['Aluno'],
-            'Proficiência': aluno['Proficiencia (θ)'],
-            'Pontuação Total': aluno['Pontuacao Total'],
-            '% Acerto': aluno['Percentual de Acerto'],
-            'Z-Score': aluno['Z-Score']
-        })
+    colunas = _df_alunos['Avaliação'].cat.codes.to_numpy()
+    ambiguas = pd.DataFrame({'chave': chaves, 'coluna': colunas}).duplicated(keep=False).to_numpy()
+    validas = ~ambiguas
+    
+    formato = (len(unicas), len(_df_alunos['Avaliação'].cat.categories))
+    proficiencia = np.full(formato, np.nan)
+    proficiencia[chaves[validas], colunas[validas]] = _df_alunos['Proficiência'].to_numpy(dtype=float)[validas]
+    acerto = np.full(formato, np.nan)
+    acerto[chaves[validas], colunas[validas]] = _df_alunos['% Acerto'].to_numpy(dtype=float)[validas]
+    
+    ambiguos = pd.DataFrame({
+        'Avaliação': _df_alunos['Avaliação'].astype(str).to_numpy()[ambiguas],
+        'Aluno': _df_alunos['Aluno'].astype(str).to_numpy()[ambiguas]
+    }).drop_duplicates()
+    
+    return {'registro': registro, 'proficiencia': proficiencia, 'acerto': acerto, 'ambiguos': ambiguos}
+
+# Inclinação (θ por avaliação) a partir da qual o aluno é sinalizado como em queda
+LIMIAR_QUEDA = -0.1
+# Faixas de proficiência anterior usadas no percentil de crescimento condicional
+FAIXAS_CRESCIMENTO = 10
+
+@st.cache_resource(max_entries=8)
+def calcular_crescimento(digest_dados, _indice_alunos):
+    """Crescimento de todos os alunos de uma vez, a partir da matriz aluno × avaliação.
+    
+    - Inclinação: mínimos quadrados de θ contra a ordem das avaliações, resolvido
+      para todas as linhas simultaneamente (ignorando avaliações ausentes).
+    - Percentil de crescimento: posição do último θ entre os alunos com o mesmo
+      par (avaliação anterior, última avaliação) e θ anterior na mesma faixa
+      (decis do θ anterior dentro do par), para não comparar provas diferentes.
+    - Em queda: inclinação <= LIMIAR_QUEDA e queda na última avaliação.
+    """
+    theta = _indice_alunos['proficiencia']
+    num_alunos, num_avaliacoes = theta.shape
+    observado = ~np.isnan(theta)
+    contagem = observado.sum(axis=1)
+    
+    # Mínimos quadrados em lote: b = Σ(x - x̄)(y - ȳ) / Σ(x - x̄)², por linha
+    x = np.arange(num_avaliacoes, dtype=float)
+    y = np.where(observado, theta, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_medio = (observado @ x) / contagem
+        y_medio = y.sum(axis=1) / contagem
+        dx = np.where(observado, x - x_medio[:, None], 0.0)
+        dy = np.where(observado, y - y_medio[:, None], 0.0)
+        inclinacao = (dx * dy).sum(axis=1) / (dx ** 2).sum(axis=1)
+    inclinacao[contagem < 2] = np.nan
     
-    # Questões
-    for questao in conteudo['resumo_questoes']:
-        questoes_data.append({
-            'Avaliação': avaliacao_nome,
-            'Questão': questao['Questao'],
-            'Dificuldade': questao['Dificuldade (b)'],
-            'Discriminação': questao['Discriminacao (a)'],
-            '% Acerto': questao['% Acerto'],
-            'Correlação Bisserial': questao.get('Correlacao Bisserial', np.nan)
+    # Primeira, penúltima e última avaliação observada de cada aluno
+    linhas = np.arange(num_alunos)
+    posicoes = np.where(observado, x.astype(int), -1)
+    ultima = posicoes.max(axis=1)
+    anterior = np.where(posicoes == ultima[:, None], -1, posicoes).max(axis=1)
+    primeira = np.where(observado, x.astype(int), num_avaliacoes).min(axis=1)
+    
+    theta_final = np.where(ultima >= 0, theta[linhas, np.maximum(ultima, 0)], np.nan)
+    theta_anterior = np.where(anterior >= 0, theta[linhas, np.maximum(anterior, 0)], np.nan)
+    theta_inicial = np.where(primeira < num_avaliacoes, theta[linhas, np.minimum(primeira, num_avaliacoes - 1)], np.nan)
+    variacao = theta_final - theta_anterior
+    
+    percentil = np.full(num_alunos, np.nan)
+    com_anterior = anterior >= 0
+    if com_anterior.any():
+        pares = pd.DataFrame({
+            'anterior': anterior[com_anterior],
+            'ultima': ultima[com_anterior],
+            'theta_anterior': theta_anterior[com_anterior],
+            'theta_final': theta_final[com_anterior]
         })
+        # Decis calculados dentro de cada par; um par com um único valor vira uma só faixa
+        pares['faixa'] = pares.groupby(['anterior', 'ultima'])['theta_anterior'].transform(
+            lambda valores: pd.qcut(valores, q=FAIXAS_CRESCIMENTO, labels=False, duplicates='drop')
+        ).fillna(0)
+        percentil[com_anterior] = (
+            pares.groupby(['anterior', 'ultima', 'faixa'])['theta_final'].rank(pct=True).to_numpy() * 100
+        )
     
-    # Tutores
-    if 'top_tutores' in conteudo:
-        for tutor in conteudo['top_tutores']:
-            tutores_data.append({
-                'Avaliação': avaliacao_nome,
-                'Aluno': tutor['Aluno'],
-                'Proficiência': tutor['Proficiencia (θ)'],
-                'Pontuação Total': tutor['Pontuacao Total'],
-                '% Acerto': tutor['Percentual de Acerto'],
-                'Score_Tutor': tutor['Score_Tutor'],
-                'Posição': tutor['Posicao']
-            })
-
-# Criar DataFrames
-df_avaliacoes = pd.DataFrame(avaliacoes_info)
-df_alunos = pd.DataFrame(alunos_data)
-df_questoes = pd.DataFrame(questoes_data)
-df_tutores = pd.DataFrame(tutores_data) if tutores_data else None
+    registro = _indice_alunos['registro']
+    return pd.DataFrame({
+        'Aluno': registro['Aluno'],
+        'ID': registro['ID'],
+        'Avaliações': contagem,
+        'θ Inicial': theta_inicial,
+        'θ Final': theta_final,
+        'Variação Última': variacao,
+        'Inclinação': inclinacao,
+        'Percentil de Crescimento': percentil,
+        'Em Queda': (inclinacao <= LIMIAR_QUEDA) & (variacao < 0)
+    })
 
-# Layout de métricas
-st.markdown('<h2 class="sub-header">📊 Métricas Gerais</h2>', unsafe_allow_html=True)
+@st.cache_resource(max_entries=8)
+def agregados_das_tabelas(digest_dados, _df_avaliacoes, _df_alunos):
+    """Contribuições de cada avaliação a partir das tabelas empilhadas (histórico local ou escala ligada)."""
+    grupos = dict(tuple(_df_alunos.groupby('Avaliação', observed=False)))
+    return {
+        (digest_dados, info['Avaliação']): agregados_da_avaliacao(info, grupos[info['Avaliação']])
+        for info in _df_avaliacoes.to_dict('records')
+    }
 
-col1, col2, col3, col4 = st.columns(4)
+# --- Linking de escalas entre avaliações (itens comuns identificados pelo código da questão) ---
+METODOS_LINKING = {
+    "Original (escala de cada avaliação)": None,
+    "Linking média-sigma": 'media_sigma',
+    "Linking Stocking-Lord": 'stocking_lord'
+}
+PONTOS_THETA_LINKING = np.linspace(-4, 4, 41)
 
-with col1:
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3>📚 Avaliações</h3>
-        <h2>{len(dados)}</h2>
-    </div>
-    """, unsafe_allow_html=True)
+def constantes_media_sigma(b_base, b_nova):
+    """Constantes A e B (θ* = Aθ + B) pela média e desvio das dificuldades dos itens comuns."""
+    A = np.std(b_base, ddof=1) / np.std(b_nova, ddof=1)
+    return A, np.mean(b_base) - A * np.mean(b_nova)
 
-with col2:
-    alunos_unicos = df_alunos['Aluno'].nunique()
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3>👥 Alunos Únicos</h3>
-        <h2>{alunos_unicos}</h2>
-    </div>
-    """, unsafe_allow_html=True)
+def constantes_stocking_lord(a_base, b_base, a_nova, b_nova):
+    """Constantes A e B que aproximam as curvas características dos itens comuns (2PL).
+    
+    A curva de todos os itens é avaliada de uma vez em uma grade de θ; a
+    solução média-sigma é o ponto de partida da otimização.
+    """
+    A0, B0 = constantes_media_sigma(b_base, b_nova)
+    theta = PONTOS_THETA_LINKING[:, None]
+    curva_base = (1 / (1 + np.exp(-a_base * (theta - b_base)))).sum(axis=1)
+    
+    def perda(parametros):
+        A, B = parametros
+        curva_nova = (1 / (1 + np.exp(-(a_nova / A) * (theta - (A * b_nova + B))))).sum(axis=1)
+        return ((curva_base - curva_nova) ** 2).sum()
+    
+    resultado = minimize(perda, x0=[A0, B0], method='Nelder-Mead')
+    if not resultado.success or resultado.x[0] <= 0:
+        return A0, B0
+    return tuple(resultado.x)
 
-with col3:
-    proficiencia_media = df_avaliacoes['Proficiência Média'].mean()
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3>🎯 Proficiência Média</h3>
-        <h2>{proficiencia_media:.2f}</h2>
-    </div>
-    """, unsafe_allow_html=True)
+def constantes_de_ligacao(metodo, comuns, base):
+    """A e B a partir dos itens comuns com a base; None se a ligação não for possível."""
+    if len(comuns) < 2:
+        return None
+    a_base = np.array([base[i][0] for i in comuns['ID']])
+    b_base = np.array([base[i][1] for i in comuns['ID']])
+    a_nova = comuns['Discriminação'].to_numpy(dtype=float)
+    b_nova = comuns['Dificuldade'].to_numpy(dtype=float)
+    # Média-sigma (e o ponto de partida do Stocking-Lord) exige dispersão nos dois lados
+    if not (np.std(b_base, ddof=1) > 0 and np.std(b_nova, ddof=1) > 0):
+        return None
+    if metodo == 'stocking_lord':
+        A, B = constantes_stocking_lord(a_base, b_base, a_nova, b_nova)
+    else:
+        A, B = constantes_media_sigma(b_base, b_nova)
+    if not (np.isfinite(A) and A > 0 and np.isfinite(B)):
+        return None
+    return A, B
 
-with col4:
-    taxa_acerto_media = df_avaliacoes['Taxa Acerto Média'].mean()
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3>✅ Taxa de Acerto</h3>
-        <h2>{taxa_acerto_media:.1f}%</h2>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_resource(max_entries=8)
+def ligar_escalas(digest_dados, metodo, _df_avaliacoes, _df_alunos, _df_questoes, _df_tutores):
+    """Coloca θ e os parâmetros dos itens de todas as avaliações na escala da primeira.
+    
+    As avaliações são ligadas em cadeia: os itens comuns (mesmo código) com
+    qualquer avaliação já ligada definem A e B. Só avaliações ligadas (ou a
+    referência) entram na base de itens; uma avaliação pendente é tentada de
+    novo sempre que outra é ligada. As que não têm ao menos dois itens comuns
+    com a base permanecem na escala original. Retorna as tabelas
+    transformadas e a tabela de constantes.
+    """
+    nomes = _df_avaliacoes['Avaliação'].tolist()
+    itens_por_avaliacao = dict(tuple(_df_questoes[_df_questoes['ID'].notna()].groupby('Avaliação', observed=False)))
+    base = {}
+    constantes = {}
+    pendentes = []
+    
+    def incluir_na_base(itens, A, B):
+        for codigo, a, b in zip(itens['ID'], itens['Discriminação'], itens['Dificuldade']):
+            base.setdefault(codigo, (a / A, A * b + B))
+    
+    for posicao, nome in enumerate(nomes):
+        itens = itens_por_avaliacao.get(nome, _df_questoes.iloc[:0])
+        if posicao == 0:
+            constantes[nome] = (1.0, 0.0, 0, "Referência")
+            incluir_na_base(itens, 1.0, 0.0)
+            continue
+        
+        # Cada nova ligação amplia a base e pode ligar avaliações que estavam pendentes
+        pendentes.append(nome)
+        ligou = True
+        while ligou:
+            ligou = False
+            for pendente in list(pendentes):
+                itens = itens_por_avaliacao.get(pendente, _df_questoes.iloc[:0])
+                comuns = itens[itens['ID'].isin(base)]
+                resultado = constantes_de_ligacao(metodo, comuns, base)
+                if resultado is None:
+                    constantes[pendente] = (1.0, 0.0, len(comuns), "Sem itens comuns suficientes")
+                    continue
+                A, B = resultado
+                constantes[pendente] = (A, B, len(comuns), f"Ligada ({len(comuns)} itens comuns)")
+                incluir_na_base(itens, A, B)
+                pendentes.remove(pendente)
+                ligou = True
+    
+    constantes = [
+        {'Avaliação': nome, 'A': A, 'B': B, 'Itens Comuns': comuns, 'Situação': situacao}
+        for nome, (A, B, comuns, situacao) in ((nome, constantes[nome]) for nome in nomes)
+    ]
+    df_constantes = pd.DataFrame(constantes)
+    A = df_constantes['A'].to_numpy()
+    B = df_constantes['B'].to_numpy()
+    
+    def transformar(tabela, colunas_theta=(), coluna_a=None):
+        if tabela is None:
+            return None
+        tabela = tabela.copy()
+        codigos = tabela['Avaliação'].cat.codes.to_numpy()
+        for coluna in colunas_theta:
+            tabela[coluna] = A[codigos] * tabela[coluna].to_numpy(dtype=float) + B[codigos]
+        if coluna_a is not None:
+            tabela[coluna_a] = tabela[coluna_a].to_numpy(dtype=float) / A[codigos]
+        return tabela
+    
+    # Uma linha por avaliação, na mesma ordem das constantes
+    df_avaliacoes = _df_avaliacoes.copy()
+    df_avaliacoes['Proficiência Média'] = A * df_avaliacoes['Proficiência Média'].to_numpy(dtype=float) + B
+    df_avaliacoes['Desvio Padrão'] = A * df_avaliacoes['Desvio Padrão'].to_numpy(dtype=float)
+    
+    return (
+        df_avaliacoes,
+        transformar(_df_alunos, ['Proficiência']),
+        transformar(_df_questoes, ['Dificuldade'], coluna_a='Discriminação'),
+        transformar(_df_tutores, ['Proficiência']),
+        df_constantes
+    )
 
-# Tabela de avaliações
-st.markdown('<h2 class="sub-header">📋 Tabela de Avaliações</h2>', unsafe_allow_html=True)
-st.dataframe(df_avaliacoes.style.format({
-    'Proficiência Média': '{:.3f}',
-    'Desvio Padrão': '{:.3f}',
-    'Taxa Acerto Média': '{:.1f}%',
-    'Confiabilidade': '{:.3f}'
-}), use_container_width=True)
+# Nível de significância (após correção de Holm) para sinalizar deriva de um parâmetro
+NIVEL_DERIVA = 0.05
+
+def ajuste_holm(p_valores):
+    """P-valores ajustados pelo método de Holm (controle do erro para todas as comparações)."""
+    p_valores = np.asarray(p_valores, dtype=float)
+    ordem = np.argsort(p_valores, axis=None)
+    m = p_valores.size
+    ajustados = np.empty(m)
+    ajustados[ordem] = np.minimum(np.maximum.accumulate((m - np.arange(m)) * p_valores.ravel()[ordem]), 1.0)
+    return ajustados.reshape(p_valores.shape)
 
-# Gráfico 1: Comparação entre avaliações COM BARRAS SEPARADAS
-st.markdown('<h2 class="sub-header">📈 Comparação entre Avaliações</h2>', unsafe_allow_html=True)
+@st.cache_resource(max_entries=8)
+def detectar_deriva(digest_dados, _df_avaliacoes, _df_questoes, _escala=None):
+    """Compara cada item comum (mesmo código) com a sua aplicação anterior, em uma passada vetorizada.
+    
+    Erros padrão por aplicação: dificuldade pelo logit da taxa de acerto
+    (1/√(n·p·(1-p))), discriminação pelo erro da correlação item-total que a
+    origina e correlação bisserial pela transformação de Fisher. Os p-valores
+    de todas as comparações são corrigidos por Holm. `_escala` traz o fator A
+    do linking de cada avaliação, quando aplicado.
+    """
+    itens = _df_questoes[_df_questoes['ID'].notna()]
+    avaliacao = itens['Avaliação'].cat.codes.to_numpy()
+    ordem = np.lexsort((avaliacao, itens['ID'].to_numpy(dtype=str)))
+    itens, avaliacao = itens.iloc[ordem], avaliacao[ordem]
+    
+    codigos = itens['ID'].to_numpy(dtype=str)
+    atual = np.flatnonzero(codigos[1:] == codigos[:-1]) + 1
+    anterior = atual - 1
+    
+    n = _df_avaliacoes['Total Alunos'].to_numpy(dtype=float)[avaliacao]
+    escala = np.ones(len(_df_avaliacoes)) if _escala is None else np.abs(np.asarray(_escala, dtype=float))
+    escala = escala[avaliacao]
+    
+    p = np.clip(itens['% Acerto'].to_numpy(dtype=float) / 100, 0.001, 0.999)
+    b = itens['Dificuldade'].to_numpy(dtype=float)
+    erro_b = escala / np.sqrt(n * p * (1 - p))
+    a = itens['Discriminação'].to_numpy(dtype=float)
+    correlacao_a = np.clip(a * escala / 2.5, -0.99, 0.99)
+    erro_a = 2.5 * (1 - correlacao_a ** 2) / np.sqrt(np.maximum(n - 1, 1)) / escala
+    r = np.clip(itens['Correlação Bisserial'].to_numpy(dtype=float), -0.999, 0.999)
+    z_fisher = np.arctanh(r)
+    erro_fisher = 1 / np.sqrt(np.maximum(n - 3, 1))
+    
+    def comparar(valores, erros):
+        diferenca = valores[atual] - valores[anterior]
+        return diferenca, diferenca / np.sqrt(erros[atual] ** 2 + erros[anterior] ** 2)
+    
+    delta_b, z_b = comparar(b, erro_b)
+    delta_a, z_a = comparar(a, erro_a)
+    delta_r = r[atual] - r[anterior]
+    _, z_r = comparar(z_fisher, np.broadcast_to(erro_fisher, z_fisher.shape))
+    
+    nomes = np.asarray(_df_avaliacoes['Avaliação'].tolist(), dtype=object)
+    p_ajustado = ajuste_holm(2 * norm.sf(np.abs(np.column_stack([z_b, z_a, z_r]))))
+    sinalizados = p_ajustado < NIVEL_DERIVA
+    rotulos = np.array(['Dificuldade', 'Discriminação', 'Bisserial'])
+    
+    return pd.DataFrame({
+        'Item': codigos[atual],
+        'De': nomes[avaliacao[anterior]],
+        'Para': nomes[avaliacao[atual]],
+        'Δ Dificuldade': delta_b,
+        'z Dificuldade': z_b,
+        'Δ Discriminação': delta_a,
+        'z Discriminação': z_a,
+        'Δ Bisserial': delta_r,
+        'z Bisserial': z_r,
+        'p Ajustado': p_ajustado.min(axis=1, initial=1.0),
+        'Deriva': sinalizados.any(axis=1),
+        'Parâmetros': [', '.join(rotulos[linha]) for linha in sinalizados]
+    })
 
-# Criar gráficos separados para melhor controle das barras
-col1, col2 = st.columns(2)
+# Métricas disponíveis para a comparação pareada (chave na matriz aluno × avaliação)
+METRICAS_PAREADAS = {"Proficiência (θ)": 'proficiencia', "% de Acerto": 'acerto'}
+NIVEL_SIGNIFICANCIA = 0.05
+
+@st.cache_resource(max_entries=8)
+def comparar_pares(digest_dados, metrica, _indice_alunos, _nomes):
+    """Teste t pareado entre todos os pares de avaliações, sem laço por par.
+    
+    Com X (valores, 0 onde ausente) e O (máscara de observados), os produtos
+    matriciais Xᵀ·O, (X²)ᵀ·O, Xᵀ·X e Oᵀ·O dão, para todos os pares ao mesmo
+    tempo, as somas e somas de quadrados das diferenças entre os alunos
+    presentes nas duas avaliações. Retorna as matrizes de diferença média e
+    d de Cohen (dz) e a tabela dos pares com p-valores corrigidos por Holm.
+    """
+    valores = _indice_alunos[metrica]
+    observado = ~np.isnan(valores)
+    X = np.where(observado, valores, 0.0)
+    O = observado.astype(float)
+    
+    n = O.T @ O
+    soma = X.T @ O                       # soma[i, j]: Σ x_i entre os alunos presentes em i e j
+    soma_quad = (X ** 2).T @ O
+    cruzado = X.T @ X
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diferenca = (soma - soma.T) / n                      # média de (x_i - x_j)
+        ss = soma_quad + soma_quad.T - 2 * cruzado           # Σ (x_i - x_j)²
+        desvio = np.sqrt(np.maximum(ss - n * diferenca ** 2, 0.0) / (n - 1))
+        efeito = diferenca / desvio
+        estatistica = efeito * np.sqrt(n)
+    
+    i, j = np.triu_indices(len(_nomes), k=1)
+    validos = (n[i, j] >= 3) & (desvio[i, j] > 0)
+    p_valor = np.full(len(i), np.nan)
+    p_valor[validos] = 2 * dist_t.sf(np.abs(estatistica[i, j][validos]), n[i, j][validos] - 1)
+    p_ajustado = np.full(len(i), np.nan)
+    p_ajustado[validos] = ajuste_holm(p_valor[validos])
+    
+    pares = pd.DataFrame({
+        'Avaliação A': np.asarray(_nomes)[i],
+        'Avaliação B': np.asarray(_nomes)[j],
+        'Alunos Pareados': n[i, j].astype(int),
+        'Diferença Média (B - A)': -diferenca[i, j],
+        'd de Cohen': -efeito[i, j],
+        't': -estatistica[i, j],
+        'p': p_valor,
+        'p Ajustado': p_ajustado,
+        'Significativo': p_ajustado < NIVEL_SIGNIFICANCIA
+    })
+    
+    # Matrizes completas para o mapa de calor (linha - coluna; diagonal vazia)
+    np.fill_diagonal(diferenca, np.nan)
+    np.fill_diagonal(efeito, np.nan)
+    ajustada = np.full(n.shape, np.nan)
+    ajustada[i, j] = ajustada[j, i] = p_ajustado
+    return {'diferenca': diferenca, 'efeito': efeito, 'p_ajustado': ajustada, 'pares': pares}
+
+# Figuras das seções com gráficos: montadas só com a seção aberta e guardadas por digest
+@st.cache_resource(max_entries=8)
+def figuras_comparacao(digest_dados, _df_avaliacoes):
+    """Barras de proficiência, acerto, desvio padrão e confiabilidade por avaliação."""
+    df_avaliacoes = _df_avaliacoes
 
-with col1:
-    # Gráfico de Proficiência Média
     fig_proficiencia = go.Figure()
     
     fig_proficiencia.add_trace(go.Bar(
@@ -357,9 +834,7 @@ with col1:
         ),
         font=dict(color='#2D3748')
     )
-    st.plotly_chart(fig_proficiencia, use_container_width=True)
-
-with col2:
+    
     # Gráfico de Taxa de Acerto Média
     fig_acerto = go.Figure()
     
@@ -405,11 +880,7 @@ with col2:
         ),
         font=dict(color='#2D3748')
     )
-    st.plotly_chart(fig_acerto, use_container_width=True)
-
-col3, col4 = st.columns(2)
-
-with col3:
+    
     # Gráfico de Desvio Padrão
     fig_desvio = go.Figure()
     
@@ -454,9 +925,7 @@ with col3:
         ),
         font=dict(color='#2D3748')
     )
-    st.plotly_chart(fig_desvio, use_container_width=True)
-
-with col4:
+    
     # Gráfico de Confiabilidade
     fig_confiabilidade = go.Figure()
     
@@ -502,149 +971,90 @@ with col4:
         ),
         font=dict(color='#2D3748')
     )
-    st.plotly_chart(fig_confiabilidade, use_container_width=True)
+    return {
+        'proficiencia': fig_proficiencia,
+        'acerto': fig_acerto,
+        'desvio': fig_desvio,
+        'confiabilidade': fig_confiabilidade
+    }
 
-# Gráfico 2: Desempenho dos Alunos
-st.markdown('<h2 class="sub-header">📊 Desempenho dos Alunos</h2>', unsafe_allow_html=True)
+@st.cache_resource(max_entries=16)
+def figura_pares(digest_dados, metrica_pareada, medida_mapa, _comparacao, _nomes_matriz):
+    """Mapa de calor das comparações pareadas (linha − coluna), com * nos pares significativos."""
+    comparacao, nomes_matriz = _comparacao, _nomes_matriz
+    matriz_mapa = comparacao['diferenca'] if medida_mapa == "Diferença média" else comparacao['efeito']
+    marcas = np.where(comparacao['p_ajustado'] < NIVEL_SIGNIFICANCIA, "*", "")
+    textos = np.where(np.isnan(matriz_mapa), "", np.char.add(np.round(matriz_mapa, 2).astype(str), marcas))
+    limite = np.nanmax(np.abs(matriz_mapa)) if np.isfinite(matriz_mapa).any() else 1.0
+    
+    fig_pares = go.Figure(go.Heatmap(
+        z=matriz_mapa,
+        x=nomes_matriz,
+        y=nomes_matriz,
+        text=textos,
+        texttemplate="%{text}",
+        colorscale='RdBu',
+        zmid=0,
+        zmin=-limite,
+        zmax=limite,
+        colorbar=dict(title=medida_mapa),
+        hovertemplate="%{y} − %{x}: %{z:.3f}<extra></extra>"
+    ))
+    fig_pares.update_layout(
+        title=dict(
+            text=f'{medida_mapa} ({metrica_pareada}): linha − coluna',
+            font=dict(color='#2D3748', size=18)
+        ),
+        height=max(400, 40 * len(nomes_matriz) + 150),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(tickfont=dict(color='#2D3748')),
+        yaxis=dict(tickfont=dict(color='#2D3748'), autorange='reversed'),
+        font=dict(color='#2D3748')
+    )
+    return fig_pares
 
-# Selecionar avaliação para análise detalhada
-avaliacao_selecionada = st.selectbox(
-    "Selecione uma avaliação para análise detalhada:",
-    options=list(dados.keys()),
-    key="select_avaliacao"
-)
+# Barras no gráfico de ranking de uma avaliação
+RANKING_MAX_BARRAS = 30
 
-if avaliacao_selecionada:
-    # Filtrar dados da avaliação selecionada
-    alunos_avaliacao = df_alunos[df_alunos['Avaliação'] == avaliacao_selecionada]
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Gráfico de distribuição de proficiência
-        fig2 = go.Figure()
-        
-        fig2.add_trace(go.Histogram(
-            x=alunos_avaliacao['Proficiência'],
-            nbinsx=10,
-            name='Proficiência',
-            marker_color='#3b82f6',
-            opacity=0.7,
-            marker=dict(
-                line=dict(width=1, color='darkblue')
-            )
-        ))
-        
-        # Adicionar linha da média
-        media_proficiencia = alunos_avaliacao['Proficiência'].mean()
-        fig2.add_vline(
-            x=media_proficiencia,
-            line_dash="dash",
-            line_color="red",
-            annotation_text=f"Média: {media_proficiencia:.2f}",
-            annotation_position="top right"
-        )
-        
-        fig2.update_layout(
-            title=dict(
-                text=f'Distribuição de Proficiência - {avaliacao_selecionada}',
-                font=dict(color='#2D3748', size=18)
-            ),
-            xaxis_title='Proficiência (θ)',
-            yaxis_title='Número de Alunos',
-            height=400,
-            bargap=0.1,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            font=dict(color='#2D3748')
-        )
-        st.plotly_chart(fig2, use_container_width=True)
-    
-    with col2:
-        # Gráfico de relação entre proficiência e % de acerto
-        fig3 = px.scatter(
-            alunos_avaliacao,
-            x='Proficiência',
-            y='% Acerto',
-            hover_data=['Aluno', 'Pontuação Total'],
-            title=f'Relação Proficiência vs % Acerto - {avaliacao_selecionada}',
-            color='Pontuação Total',
-            size='Pontuação Total',
-            color_continuous_scale='Viridis',
-            height=400
-        )
-        
-        fig3.update_traces(
-            marker=dict(
-                line=dict(width=1, color='DarkSlateGrey'),
-                size=12
-            )
-        )
-        
-        fig3.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            title_font=dict(color='#2D3748', size=18),
-            font=dict(color='#2D3748')
-        )
-        
-        st.plotly_chart(fig3, use_container_width=True)
-    
-    # Ranking de alunos
-    st.markdown(f"<h3 class='sub-header'>🏆 Ranking de Alunos - {avaliacao_selecionada}</h3>", unsafe_allow_html=True)
+@st.cache_resource(max_entries=32)
+def figuras_desempenho(digest_dados, avaliacao_selecionada, _df_alunos):
+    """Distribuição de θ, θ vs % de acerto e ranking dos alunos de uma avaliação."""
+    alunos_avaliacao = _df_alunos[_df_alunos['Avaliação'] == avaliacao_selecionada]
     
-    # Ordenar por proficiência
-    ranking_alunos = alunos_avaliacao.sort_values('Proficiência', ascending=False)
-    
-    # Criar gráfico de ranking
-    fig4 = go.Figure()
+    # Gráfico de distribuição de proficiência
+    fig2 = go.Figure()
     
-    fig4.add_trace(go.Bar(
-        y=ranking_alunos['Aluno'],
-        x=ranking_alunos['Proficiência'],
-        orientation='h',
+    fig2.add_trace(go.Histogram(
+        x=alunos_avaliacao['Proficiência'],
+        nbinsx=10,
+        name='Proficiência',
         marker_color='#3b82f6',
-        text=ranking_alunos['Proficiência'].round(3),
-        textposition='outside',
-        textfont=dict(color='#2D3748', size=11),
+        opacity=0.7,
         marker=dict(
             line=dict(width=1, color='darkblue')
         )
     ))
     
-    fig4.update_layout(
+    # Adicionar linha da média
+    media_proficiencia = alunos_avaliacao['Proficiência'].mean()
+    fig2.add_vline(
+        x=media_proficiencia,
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Média: {media_proficiencia:.2f}",
+        annotation_position="top right"
+    )
+    
+    fig2.update_layout(
         title=dict(
-            text=f'Ranking por Proficiência - {avaliacao_selecionada}',
+            text=f'Distribuição de Proficiência - {avaliacao_selecionada}',
             font=dict(color='#2D3748', size=18)
         ),
         xaxis_title='Proficiência (θ)',
-        yaxis=dict(autorange="reversed"),
-        height=max(400, len(ranking_alunos) * 40),
-        bargap=0.3,
+        yaxis_title='Número de Alunos',
+        height=400,
+        bargap=0.1,
         plot_bgcolor='white',
         paper_bgcolor='white',
         xaxis=dict(
@@ -653,127 +1063,454 @@ if avaliacao_selecionada:
             gridcolor='lightgray',
             tickfont=dict(color='#2D3748')
         ),
-        yaxis_title='Aluno',
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
         font=dict(color='#2D3748')
     )
     
-    st.plotly_chart(fig4, use_container_width=True)
-
-# Gráfico 3: Análise de Questões
-st.markdown('<h2 class="sub-header">❓ Análise de Questões</h2>', unsafe_allow_html=True)
-
-if not df_questoes.empty:
-    # Filtrar questões da avaliação selecionada
-    questoes_avaliacao = df_questoes[df_questoes['Avaliação'] == avaliacao_selecionada]
-    
-    col1, col2 = st.columns(2)
+    # Gráfico de relação entre proficiência e % de acerto
+    fig3 = px.scatter(
+        alunos_avaliacao,
+        x='Proficiência',
+        y='% Acerto',
+        hover_data=['Aluno', 'Pontuação Total'],
+        title=f'Relação Proficiência vs % Acerto - {avaliacao_selecionada}',
+        color='Pontuação Total',
+        size='Pontuação Total',
+        color_continuous_scale='Viridis',
+        height=400
+    )
     
-    with col1:
-        # Gráfico de dificuldade vs discriminação
-        fig5 = px.scatter(
-            questoes_avaliacao,
-            x='Dificuldade',
-            y='Discriminação',
-            size='% Acerto',
-            color='% Acerto',
-            hover_name='Questão',
-            title=f'Dificuldade vs Discriminação - {avaliacao_selecionada}',
-            labels={'Dificuldade': 'Dificuldade (b)', 'Discriminação': 'Discriminação (a)'},
-            color_continuous_scale='RdYlGn_r',
-            size_max=40,
-            height=400
-        )
-        
-        # Adicionar quadrantes
-        fig5.add_hline(y=1, line_dash="dash", line_color="gray")
-        fig5.add_vline(x=0, line_dash="dash", line_color="gray")
-        
-        # Anotar quadrantes
-        fig5.add_annotation(x=2, y=2, text="Boa questão", showarrow=False, font=dict(color='#2D3748'))
-        fig5.add_annotation(x=2, y=0.5, text="Fácil e pouco discriminativa", showarrow=False, font=dict(color='#2D3748'))
-        fig5.add_annotation(x=-2, y=2, text="Difícil e muito discriminativa", showarrow=False, font=dict(color='#2D3748'))
-        fig5.add_annotation(x=-2, y=0.5, text="Questão problemática", showarrow=False, font=dict(color='#2D3748'))
-        
-        fig5.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            title_font=dict(color='#2D3748', size=18),
-            font=dict(color='#2D3748')
+    fig3.update_traces(
+        marker=dict(
+            line=dict(width=1, color='DarkSlateGrey'),
+            size=12
         )
-        
-        st.plotly_chart(fig5, use_container_width=True)
+    )
+    
+    fig3.update_layout(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        title_font=dict(color='#2D3748', size=18),
+        font=dict(color='#2D3748')
+    )
+    
+    # Ordenar por proficiência (o gráfico mostra o topo; o ranking completo fica na tabela paginada)
+    ranking_alunos = alunos_avaliacao.sort_values('Proficiência', ascending=False).head(RANKING_MAX_BARRAS)
+    
+    # Criar gráfico de ranking
+    fig4 = go.Figure()
+    
+    fig4.add_trace(go.Bar(
+        y=ranking_alunos['Aluno'],
+        x=ranking_alunos['Proficiência'],
+        orientation='h',
+        marker_color='#3b82f6',
+        text=ranking_alunos['Proficiência'].round(3),
+        textposition='outside',
+        textfont=dict(color='#2D3748', size=11),
+        marker=dict(
+            line=dict(width=1, color='darkblue')
+        )
+    ))
+    
+    fig4.update_layout(
+        title=dict(
+            text=(f'Ranking por Proficiência - {avaliacao_selecionada}' if len(alunos_avaliacao) <= RANKING_MAX_BARRAS
+                  else f'Top {RANKING_MAX_BARRAS} por Proficiência - {avaliacao_selecionada}'),
+            font=dict(color='#2D3748', size=18)
+        ),
+        xaxis_title='Proficiência (θ)',
+        yaxis=dict(autorange="reversed"),
+        height=max(400, len(ranking_alunos) * 40),
+        bargap=0.3,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        yaxis_title='Aluno',
+        font=dict(color='#2D3748')
+    )
+    return fig2, fig3, fig4
+
+@st.cache_resource(max_entries=32)
+def figuras_questoes(digest_dados, avaliacao_selecionada, _df_questoes):
+    """Dificuldade vs discriminação e taxa de acerto das questões de uma avaliação."""
+    questoes_avaliacao = _df_questoes[_df_questoes['Avaliação'] == avaliacao_selecionada]
+    
+    # Gráfico de dificuldade vs discriminação
+    fig5 = px.scatter(
+        questoes_avaliacao,
+        x='Dificuldade',
+        y='Discriminação',
+        size='% Acerto',
+        color='% Acerto',
+        hover_name='Questão',
+        title=f'Dificuldade vs Discriminação - {avaliacao_selecionada}',
+        labels={'Dificuldade': 'Dificuldade (b)', 'Discriminação': 'Discriminação (a)'},
+        color_continuous_scale='RdYlGn_r',
+        size_max=40,
+        height=400
+    )
+    
+    # Adicionar quadrantes
+    fig5.add_hline(y=1, line_dash="dash", line_color="gray")
+    fig5.add_vline(x=0, line_dash="dash", line_color="gray")
+    
+    # Anotar quadrantes
+    fig5.add_annotation(x=2, y=2, text="Boa questão", showarrow=False, font=dict(color='#2D3748'))
+    fig5.add_annotation(x=2, y=0.5, text="Fácil e pouco discriminativa", showarrow=False, font=dict(color='#2D3748'))
+    fig5.add_annotation(x=-2, y=2, text="Difícil e muito discriminativa", showarrow=False, font=dict(color='#2D3748'))
+    fig5.add_annotation(x=-2, y=0.5, text="Questão problemática", showarrow=False, font=dict(color='#2D3748'))
+    
+    fig5.update_layout(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        title_font=dict(color='#2D3748', size=18),
+        font=dict(color='#2D3748')
+    )
+    
+    # Gráfico de taxa de acerto por questão
+    fig6 = go.Figure()
+    
+    fig6.add_trace(go.Bar(
+        x=questoes_avaliacao['Questão'],
+        y=questoes_avaliacao['% Acerto'],
+        text=questoes_avaliacao['% Acerto'].round(1).astype(str) + '%',
+        textposition='outside',
+        textfont=dict(color='#2D3748', size=12),
+        marker_color='#10b981',
+        marker=dict(
+            line=dict(width=1, color='darkgreen')
+        ),
+        width=0.6
+    ))
+    
+    fig6.update_layout(
+        title=dict(
+            text=f'Taxa de Acerto por Questão - {avaliacao_selecionada}',
+            font=dict(color='#2D3748', size=18)
+        ),
+        xaxis_title='Questão',
+        yaxis_title='% de Acerto',
+        yaxis_range=[0, 105],
+        height=400,
+        bargap=0.4,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        font=dict(color='#2D3748')
+    )
+    
+    # Adicionar linha da média
+    media_acerto = questoes_avaliacao['% Acerto'].mean()
+    fig6.add_hline(
+        y=media_acerto,
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Média: {media_acerto:.1f}%",
+        annotation_position="top right"
+    )
+    return fig5, fig6
+
+@st.cache_resource(max_entries=32)
+def figura_tutores(digest_dados, avaliacao_selecionada, _tutores_avaliacao):
+    """Score dos tutores de uma avaliação."""
+    tutores_avaliacao = _tutores_avaliacao
+    
+    # Gráfico de score dos tutores
+    fig7 = go.Figure()
+    
+    fig7.add_trace(go.Bar(
+        x=tutores_avaliacao['Aluno'],
+        y=tutores_avaliacao['Score_Tutor'],
+        text=tutores_avaliacao['Score_Tutor'].round(3),
+        textposition='outside',
+        textfont=dict(color='#2D3748', size=12),
+        marker_color='#8b5cf6',
+        marker=dict(
+            line=dict(width=1, color='darkviolet')
+        ),
+        width=0.6
+    ))
+    
+    fig7.update_layout(
+        title=dict(
+            text=f'Score dos Tutores - {avaliacao_selecionada}',
+            font=dict(color='#2D3748', size=18)
+        ),
+        xaxis_title='Aluno',
+        yaxis_title='Score Tutor',
+        yaxis_range=[0, 1],
+        height=400,
+        bargap=0.4,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickfont=dict(color='#2D3748')
+        ),
+        font=dict(color='#2D3748')
+    )
+    return fig7
+
+@st.cache_resource(max_entries=64)
+def figura_longitudinal(digest_dados, chave_aluno, _indice_alunos, _nomes_avaliacoes):
+    """Evolução de θ e do % de acerto de um aluno ao longo das avaliações."""
+    indice_alunos, nomes_avaliacoes = _indice_alunos, list(_nomes_avaliacoes)
+    registro_alunos = indice_alunos['registro']
+    # Linha do aluno nas matrizes densas (sem varrer df_alunos)
+    aluno_selecionado = registro_alunos.at[chave_aluno, 'Aluno']
+    dados_aluno = pd.DataFrame({
+        'Avaliação': nomes_avaliacoes,
+        'Proficiência': indice_alunos['proficiencia'][chave_aluno],
+        '% Acerto': indice_alunos['acerto'][chave_aluno]
+    }).dropna(subset=['Proficiência'])
     
+    fig8 = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=('Evolução da Proficiência', 'Evolução do % de Acerto'),
+        shared_xaxes=True
+    )
+    
+    # Gráfico de evolução da proficiência
+    fig8.add_trace(
+        go.Scatter(
+            x=dados_aluno['Avaliação'],
+            y=dados_aluno['Proficiência'],
+            mode='lines+markers+text',
+            name='Proficiência',
+            line=dict(color='#3b82f6', width=3),
+            marker=dict(size=10),
+            text=dados_aluno['Proficiência'].round(3),
+            textposition='top center'
+        ),
+        row=1, col=1
+    )
+    
+    # Gráfico de evolução do % de acerto
+    fig8.add_trace(
+        go.Scatter(
+            x=dados_aluno['Avaliação'],
+            y=dados_aluno['% Acerto'],
+            mode='lines+markers+text',
+            name='% Acerto',
+            line=dict(color='#10b981', width=3),
+            marker=dict(size=10),
+            text=dados_aluno['% Acerto'].round(1).astype(str) + '%',
+            textposition='top center'
+        ),
+        row=1, col=2
+    )
+    
+    fig8.update_layout(
+        height=400,
+        title_text=f'Evolução do Desempenho - {aluno_selecionado}',
+        showlegend=True,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        title_font=dict(color='#2D3748', size=18),
+        font=dict(color='#2D3748')
+    )
+    
+    fig8.update_yaxes(
+        title_text="Proficiência (θ)", 
+        row=1, col=1, 
+        showgrid=True, 
+        gridwidth=1, 
+        gridcolor='lightgray',
+        tickfont=dict(color='#2D3748')
+    )
+    fig8.update_yaxes(
+        title_text="% de Acerto", 
+        row=1, col=2, 
+        showgrid=True, 
+        gridwidth=1, 
+        gridcolor='lightgray',
+        tickfont=dict(color='#2D3748')
+    )
+    fig8.update_xaxes(
+        showgrid=True, 
+        gridwidth=1, 
+        gridcolor='lightgray', 
+        row=1, col=1,
+        tickfont=dict(color='#2D3748')
+    )
+    fig8.update_xaxes(
+        showgrid=True, 
+        gridwidth=1, 
+        gridcolor='lightgray', 
+        row=1, col=2,
+        tickfont=dict(color='#2D3748')
+    )
+    return fig8
+
+@st.cache_resource(max_entries=32)
+def ranking_da_avaliacao(digest_dados, avaliacao, _df_alunos):
+    """Alunos de uma avaliação ordenados por proficiência, com a posição."""
+    alunos = _df_alunos[_df_alunos['Avaliação'] == avaliacao]
+    colunas = [c for c in ('Aluno', 'ID', 'Proficiência', '% Acerto', 'Pontuação Total', 'Z-Score') if c in alunos.columns]
+    ranking = alunos.sort_values('Proficiência', ascending=False, kind='stable')[colunas].reset_index(drop=True)
+    ranking.insert(0, 'Posição', np.arange(1, len(ranking) + 1))
+    return ranking
+
+def secao_aberta(chave, aberta=False):
+    """Interruptor de uma seção com gráficos; as figuras só são montadas com a seção aberta."""
+    return st.toggle("Exibir gráficos", value=aberta, key=f"secao_{chave}")
+
+# Seções com gráficos: cada uma é um fragment, reexecutado sozinho ao interagir com os seus widgets
+@st.fragment
+def secao_comparacao(digest_dados, df_avaliacoes, df_alunos, nomes_avaliacoes):
+    st.markdown('<h2 class="sub-header">📈 Comparação entre Avaliações</h2>', unsafe_allow_html=True)
+    if not secao_aberta('comparacao', aberta=True):
+        return
+    
+    figuras = figuras_comparacao(digest_dados, df_avaliacoes)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(figuras['proficiencia'], use_container_width=True)
     with col2:
-        # Gráfico de taxa de acerto por questão
-        fig6 = go.Figure()
+        st.plotly_chart(figuras['acerto'], use_container_width=True)
+    
+    col3, col4 = st.columns(2)
+    with col3:
+        st.plotly_chart(figuras['desvio'], use_container_width=True)
+    with col4:
+        st.plotly_chart(figuras['confiabilidade'], use_container_width=True)
+    
+    # Comparações pareadas: mesmos alunos nas duas avaliações, todos os pares de uma vez
+    if len(nomes_avaliacoes) > 1:
+        st.markdown("### 🔬 Diferenças Significativas entre Avaliações")
         
-        fig6.add_trace(go.Bar(
-            x=questoes_avaliacao['Questão'],
-            y=questoes_avaliacao['% Acerto'],
-            text=questoes_avaliacao['% Acerto'].round(1).astype(str) + '%',
-            textposition='outside',
-            textfont=dict(color='#2D3748', size=12),
-            marker_color='#10b981',
-            marker=dict(
-                line=dict(width=1, color='darkgreen')
-            ),
-            width=0.6
-        ))
+        col1, col2 = st.columns(2)
+        with col1:
+            metrica_pareada = st.selectbox("Métrica", list(METRICAS_PAREADAS), key="metrica_pareada")
+        with col2:
+            medida_mapa = st.radio(
+                "Valores no mapa", ["Diferença média", "d de Cohen"], horizontal=True, key="medida_pareada"
+            )
         
-        fig6.update_layout(
-            title=dict(
-                text=f'Taxa de Acerto por Questão - {avaliacao_selecionada}',
-                font=dict(color='#2D3748', size=18)
-            ),
-            xaxis_title='Questão',
-            yaxis_title='% de Acerto',
-            yaxis_range=[0, 105],
-            height=400,
-            bargap=0.4,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                tickfont=dict(color='#2D3748')
-            ),
-            font=dict(color='#2D3748')
+        nomes_matriz = list(df_alunos['Avaliação'].cat.categories)
+        comparacao = comparar_pares(digest_dados, METRICAS_PAREADAS[metrica_pareada],
+                                    montar_registro_alunos(digest_dados, df_alunos), tuple(nomes_matriz))
+        st.plotly_chart(
+            figura_pares(digest_dados, metrica_pareada, medida_mapa, comparacao, nomes_matriz),
+            use_container_width=True
         )
         
-        # Adicionar linha da média
-        media_acerto = questoes_avaliacao['% Acerto'].mean()
-        fig6.add_hline(
-            y=media_acerto,
-            line_dash="dash",
-            line_color="red",
-            annotation_text=f"Média: {media_acerto:.1f}%",
-            annotation_position="top right"
+        pares = comparacao['pares']
+        st.caption(
+            f"Teste t pareado com os alunos presentes nas duas avaliações; * indica p ajustado por Holm "
+            f"< {NIVEL_SIGNIFICANCIA} ({int(pares['Significativo'].sum())} de {len(pares)} pares)."
         )
-        
+        with st.expander("📋 Tabela de comparações pareadas"):
+            st.dataframe(
+                pares,
+                column_config={
+                    coluna: st.column_config.NumberColumn(format="%.4f")
+                    for coluna in ['Diferença Média (B - A)', 'd de Cohen', 't', 'p', 'p Ajustado']
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+
+@st.fragment
+def secao_desempenho(digest_dados, avaliacao_selecionada, df_alunos):
+    if not secao_aberta('desempenho'):
+        return
+    
+    fig2, fig3, fig4 = figuras_desempenho(digest_dados, avaliacao_selecionada, df_alunos)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(fig2, use_container_width=True)
+    with col2:
+        st.plotly_chart(fig3, use_container_width=True)
+    
+    # Ranking de alunos
+    st.markdown(f"<h3 class='sub-header'>🏆 Ranking de Alunos - {avaliacao_selecionada}</h3>", unsafe_allow_html=True)
+    st.plotly_chart(fig4, use_container_width=True)
+    
+    ranking = ranking_da_avaliacao(digest_dados, avaliacao_selecionada, df_alunos)
+    tabelas.tabela_paginada(
+        ranking, "tabela_ranking", f"{digest_dados}:{avaliacao_selecionada}",
+        colunas_busca=[c for c in ('Aluno', 'ID') if c in ranking.columns],
+        column_config={
+            'Proficiência': st.column_config.NumberColumn(format="%.3f"),
+            '% Acerto': st.column_config.NumberColumn(format="%.1f%%"),
+            'Z-Score': st.column_config.NumberColumn(format="%.3f")
+        },
+        hide_index=True
+    )
+
+@st.fragment
+def secao_questoes(digest_dados, avaliacao_selecionada, df_questoes):
+    st.markdown('<h2 class="sub-header">❓ Análise de Questões</h2>', unsafe_allow_html=True)
+    if not secao_aberta('questoes'):
+        return
+    
+    fig5, fig6 = figuras_questoes(digest_dados, avaliacao_selecionada, df_questoes)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(fig5, use_container_width=True)
+    with col2:
         st.plotly_chart(fig6, use_container_width=True)
 
-# Análise de Tutores
-if df_tutores is not None and not df_tutores.empty:
+@st.fragment
+def secao_tutores(digest_dados, avaliacao_selecionada, df_tutores):
     st.markdown('<h2 class="sub-header">👨‍🏫 Análise de Tutores</h2>', unsafe_allow_html=True)
+    if not secao_aberta('tutores'):
+        return
     
     # Filtrar tutores da avaliação selecionada
     tutores_avaliacao = df_tutores[df_tutores['Avaliação'] == avaliacao_selecionada]
@@ -794,144 +1531,722 @@ if df_tutores is not None and not df_tutores.empty:
             )
         
         with col2:
-            # Gráfico de score dos tutores
-            fig7 = go.Figure()
-            
-            fig7.add_trace(go.Bar(
-                x=tutores_avaliacao['Aluno'],
-                y=tutores_avaliacao['Score_Tutor'],
-                text=tutores_avaliacao['Score_Tutor'].round(3),
-                textposition='outside',
-                textfont=dict(color='#2D3748', size=12),
-                marker_color='#8b5cf6',
-                marker=dict(
-                    line=dict(width=1, color='darkviolet')
-                ),
-                width=0.6
-            ))
-            
-            fig7.update_layout(
-                title=dict(
-                    text=f'Score dos Tutores - {avaliacao_selecionada}',
-                    font=dict(color='#2D3748', size=18)
-                ),
-                xaxis_title='Aluno',
-                yaxis_title='Score Tutor',
-                yaxis_range=[0, 1],
-                height=400,
-                bargap=0.4,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                xaxis=dict(
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray',
-                    tickfont=dict(color='#2D3748')
-                ),
-                yaxis=dict(
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray',
-                    tickfont=dict(color='#2D3748')
-                ),
-                font=dict(color='#2D3748')
+            st.plotly_chart(
+                figura_tutores(digest_dados, avaliacao_selecionada, tutores_avaliacao),
+                use_container_width=True
             )
-            
-            st.plotly_chart(fig7, use_container_width=True)
 
-# Análise longitudinal (se houver múltiplas avaliações)
-if len(dados) > 1:
+@st.fragment
+def secao_longitudinal(digest_dados, df_alunos, nomes_avaliacoes, agregados):
     st.markdown('<h2 class="sub-header">📈 Análise Longitudinal</h2>', unsafe_allow_html=True)
+    if not secao_aberta('longitudinal'):
+        return
+    
+    # Registro de alunos (nomes normalizados/IDs) e matriz aluno × avaliação
+    indice_alunos = montar_registro_alunos(digest_dados, df_alunos)
+    registro_alunos = indice_alunos['registro']
+    ambiguos = indice_alunos['ambiguos']
+    if len(ambiguos) > 0:
+        exemplos = ", ".join(f"{aluno} ({avaliacao})" for avaliacao, aluno in ambiguos.head(5).itertuples(index=False))
+        st.warning(
+            f"⚠️ {len(ambiguos)} aluno(s) aparecem mais de uma vez na mesma avaliação sem um ID que os "
+            f"diferencie e ficaram fora da análise longitudinal: {exemplos}"
+            + ("..." if len(ambiguos) > 5 else "")
+        )
+    rotulos_alunos = np.where(
+        registro_alunos['ID'].notna(),
+        registro_alunos['Aluno'] + ' (' + registro_alunos['ID'].fillna('') + ')',
+        registro_alunos['Aluno']
+    )
     
     # Selecionar aluno para análise longitudinal
-    aluno_selecionado = st.selectbox(
+    chave_aluno = st.selectbox(
         "Selecione um aluno para análise longitudinal:",
-        options=df_alunos['Aluno'].unique(),
+        options=registro_alunos.index.tolist(),
+        format_func=lambda chave: rotulos_alunos[chave],
         key="select_aluno"
     )
     
-    if aluno_selecionado:
-        # Filtrar dados do aluno
-        dados_aluno = df_alunos[df_alunos['Aluno'] == aluno_selecionado]
+    if chave_aluno is not None:
+        # Resumo do aluno a partir dos acumuladores (contagem, soma e soma dos quadrados)
+        acumulado = acumulado_do_aluno(agregados, registro_alunos.at[chave_aluno, 'Identidade'])
+        if acumulado['contagem'] > 0:
+            media_aluno = acumulado['soma'] / acumulado['contagem']
+            variancia_aluno = max(acumulado['soma_quad'] / acumulado['contagem'] - media_aluno ** 2, 0.0)
+            st.caption(
+                f"Proficiência média em {int(acumulado['contagem'])} avaliação(ões): "
+                f"{media_aluno:.3f} ± {np.sqrt(variancia_aluno):.3f}"
+            )
+        else:
+            st.caption("Proficiência não calculada nas avaliações carregadas.")
         
-        fig8 = make_subplots(
-            rows=1, cols=2,
-            subplot_titles=('Evolução da Proficiência', 'Evolução do % de Acerto'),
-            shared_xaxes=True
+        st.plotly_chart(
+            figura_longitudinal(digest_dados, chave_aluno, indice_alunos, tuple(nomes_avaliacoes)),
+            use_container_width=True
         )
-        
-        # Gráfico de evolução da proficiência
-        fig8.add_trace(
-            go.Scatter(
-                x=dados_aluno['Avaliação'],
-                y=dados_aluno['Proficiência'],
-                mode='lines+markers+text',
-                name='Proficiência',
-                line=dict(color='#3b82f6', width=3),
-                marker=dict(size=10),
-                text=dados_aluno['Proficiência'].round(3),
-                textposition='top center'
-            ),
-            row=1, col=1
+    
+    # Crescimento de toda a turma (calculado em lote sobre a matriz aluno × avaliação)
+    st.markdown("<h3 class='sub-header'>📉 Crescimento da Turma</h3>", unsafe_allow_html=True)
+    
+    crescimento = calcular_crescimento(digest_dados, indice_alunos)
+    em_queda = int(crescimento['Em Queda'].sum())
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Alunos com tendência calculada", int(crescimento['Inclinação'].notna().sum()))
+    col2.metric("Inclinação média (θ/avaliação)", f"{crescimento['Inclinação'].mean():.3f}")
+    col3.metric("⚠️ Alunos em queda", em_queda)
+    
+    apenas_em_queda = st.checkbox("Mostrar apenas alunos em queda", key="apenas_em_queda")
+    tabela_crescimento = crescimento[crescimento['Em Queda']] if apenas_em_queda else crescimento
+    tabelas.tabela_paginada(
+        tabela_crescimento.sort_values('Inclinação'),
+        "tabela_crescimento", f"{digest_dados}:{apenas_em_queda}",
+        colunas_busca=['Aluno', 'ID'],
+        column_config={
+            'θ Inicial': st.column_config.NumberColumn(format="%.3f"),
+            'θ Final': st.column_config.NumberColumn(format="%.3f"),
+            'Variação Última': st.column_config.NumberColumn(format="%.3f"),
+            'Inclinação': st.column_config.NumberColumn(format="%.3f"),
+            'Percentil de Crescimento': st.column_config.ProgressColumn(format="%.0f", min_value=0, max_value=100)
+        },
+        hide_index=True
+    )
+    st.caption(
+        f"Inclinação: tendência de θ por avaliação (mínimos quadrados). Percentil de crescimento: "
+        f"posição do último θ entre alunos com θ anterior semelhante. Em queda: inclinação ≤ {LIMIAR_QUEDA} "
+        f"e queda na última avaliação."
+    )
+    
+    if st.button("⚙️ Preparar CSV de crescimento"):
+        obter_exportacao(digest_dados, 'csv_crescimento', lambda: crescimento.to_csv(index=False).encode('utf-8'))
+    
+    csv_crescimento = obter_exportacao(digest_dados, 'csv_crescimento')
+    if csv_crescimento is not None:
+        st.download_button(
+            label="📈 Baixar Crescimento da Turma (CSV)",
+            data=csv_crescimento,
+            file_name=f"crescimento_turma_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+            mime="text/csv"
         )
+
+@st.cache_resource(max_entries=4)
+def respostas_do_historico(versao_db, avaliacoes, data_inicio, data_fim):
+    """Matrizes de acertos das avaliações filtradas no histórico local, por avaliação."""
+    respostas = historico_db.consultar_respostas(list(avaliacoes), data_inicio, data_fim)
+    return {
+        nome: bloco_de_respostas(grupo['Aluno'], grupo['Questão'], grupo['Acerto'])
+        for nome, grupo in respostas.groupby('Avaliação', sort=False)
+    }
+
+# --- Calibração concorrente (todas as avaliações em uma única matriz esparsa) ---
+MODO_INICIO_QUENTE = "Estimar todos os itens (início a quente)"
+MODO_ANCORAS_FIXAS = "Fixar itens âncora (valores da primeira avaliação)"
+
+def preparar_calibracao(blocos, df_questoes):
+    """Mapeia as questões de cada avaliação para itens globais.
+    
+    Questões com código (ID) são o mesmo item em todas as avaliações; as
+    demais são itens exclusivos da avaliação. Retorna os blocos com índices
+    globais e a tabela de itens com os parâmetros da primeira avaliação em
+    que cada item aparece.
+    """
+    chaves = {}
+    itens = []
+    blocos_indexados = []
+    questoes_por_avaliacao = dict(tuple(df_questoes.groupby('Avaliação', observed=False)))
+    
+    for nome, bloco in blocos.items():
+        questoes = questoes_por_avaliacao[nome].set_index('Questão')
+        colunas = []
+        for questao in bloco['questoes']:
+            linha = questoes.loc[questao] if questao in questoes.index else None
+            codigo = linha['ID'] if linha is not None and pd.notna(linha['ID']) else f"{nome} · {questao}"
+            if codigo not in chaves:
+                chaves[codigo] = len(itens)
+                itens.append({
+                    'Item': codigo,
+                    'a Inicial': linha['Discriminação'] if linha is not None else 1.0,
+                    'b Inicial': linha['Dificuldade'] if linha is not None else 0.0,
+                    'Avaliações': 0
+                })
+            itens[chaves[codigo]]['Avaliações'] += 1
+            colunas.append(chaves[codigo])
+        blocos_indexados.append((np.array(colunas), bloco['matriz']))
+    
+    return blocos_indexados, pd.DataFrame(itens)
+
+def executar_calibracao(blocos, df_questoes, modo, anteriores=None):
+    """Calibra todas as avaliações juntas e devolve as tabelas de itens, grupos e alunos.
+    
+    `anteriores` guarda os parâmetros da calibração anterior (por item e por
+    avaliação), usados como início a quente.
+    """
+    anteriores = anteriores or {'itens': {}, 'grupos': {}}
+    blocos_indexados, itens = preparar_calibracao(blocos, df_questoes)
+    acertos, observados, grupos = calibracao.montar_matriz(blocos_indexados, len(itens))
+    
+    fixos = (itens['Avaliações'] > 1).to_numpy() if modo == MODO_ANCORAS_FIXAS else None
+    a_inicial = itens['a Inicial'].to_numpy(dtype=float, copy=True)
+    b_inicial = itens['b Inicial'].to_numpy(dtype=float, copy=True)
+    for posicao, codigo in enumerate(itens['Item']):
+        if codigo in anteriores['itens'] and (fixos is None or not fixos[posicao]):
+            a_inicial[posicao], b_inicial[posicao] = anteriores['itens'][codigo]
+    
+    nomes = list(blocos)
+    distribuicoes = [anteriores['grupos'].get(nome, (0.0, 1.0)) for nome in nomes]
+    resultado = calibracao.calibrar_2pl(
+        acertos, observados, grupos, a_inicial, b_inicial, fixos=fixos,
+        medias_iniciais=[media for media, _ in distribuicoes],
+        desvios_iniciais=[desvio for _, desvio in distribuicoes]
+    )
+    
+    itens['a'] = resultado['a']
+    itens['b'] = resultado['b']
+    itens['Âncora'] = fixos if fixos is not None else False
+    df_grupos = pd.DataFrame({
+        'Avaliação': nomes,
+        'Alunos': np.bincount(grupos, minlength=len(nomes)),
+        'Média θ': resultado['medias'],
+        'DP θ': resultado['desvios']
+    })
+    df_theta = pd.DataFrame({
+        'Avaliação': np.repeat(nomes, [len(bloco['alunos']) for bloco in blocos.values()]),
+        'Aluno': np.concatenate([bloco['alunos'] for bloco in blocos.values()]),
+        'θ (EAP)': resultado['theta'],
+        'Erro Padrão': resultado['erro_padrao']
+    })
+    
+    return {
+        'itens': itens,
+        'grupos': df_grupos,
+        'alunos': df_theta,
+        'iteracoes': resultado['iteracoes'],
+        'convergiu': resultado['convergiu']
+    }
+
+def ler_conteudo(nome, conteudo_bytes):
+    """Interpreta um arquivo de avaliação (JSON ou Parquet .zip) e o normaliza em tabelas."""
+    if nome.endswith('.zip'):
+        return normalizar_conteudo(ler_parquet_zip(conteudo_bytes))
+    return normalizar_conteudo(json.loads(conteudo_bytes.decode()))
+
+def nome_da_avaliacao(nome):
+    """Nome da avaliação a partir do nome do arquivo."""
+    for extensao in ('.parquet.zip', '.zip', '.json'):
+        if nome.endswith(extensao):
+            return nome[:-len(extensao)]
+    return nome
+
+MAX_ARQUIVOS_EM_CACHE = 500
+
+@st.cache_resource
+def cache_de_arquivos():
+    """Tabelas já normalizadas de cada arquivo, indexadas pelo hash dos seus bytes.
+    
+    O cache é compartilhado por todas as sessões: consultas, inclusões e
+    descartes são feitos sob o lock que acompanha o dicionário.
+    """
+    return OrderedDict(), threading.Lock()
+
+def identificar_arquivos(uploaded_files):
+    """Calcula o hash de cada upload e separa os arquivos com conteúdo idêntico."""
+    arquivos, duplicados, vistos = [], [], set()
+    
+    for uploaded_file in uploaded_files or []:
+        conteudo_bytes = uploaded_file.getvalue()
+        digest = hashlib.sha1(conteudo_bytes).hexdigest()
+        if digest in vistos:
+            duplicados.append(uploaded_file.name)
+            continue
+        vistos.add(digest)
+        arquivos.append((uploaded_file.name, digest, conteudo_bytes))
+    
+    return arquivos, duplicados
+
+def carregar_arquivos(arquivos):
+    """Carrega os arquivos de avaliação, interpretando apenas os que ainda não estão em cache.
+    
+    O cache é indexado pelo hash do conteúdo, então incluir mais um arquivo custa
+    uma única leitura.
+    """
+    cache, lock = cache_de_arquivos()
+    
+    dados = {}
+    for nome, digest, conteudo_bytes in arquivos:
+        with lock:
+            conteudo = cache.get(digest)
+            if conteudo is not None:
+                cache.move_to_end(digest)
         
-        # Gráfico de evolução do % de acerto
-        fig8.add_trace(
-            go.Scatter(
-                x=dados_aluno['Avaliação'],
-                y=dados_aluno['% Acerto'],
-                mode='lines+markers+text',
-                name='% Acerto',
-                line=dict(color='#10b981', width=3),
-                marker=dict(size=10),
-                text=dados_aluno['% Acerto'].round(1).astype(str) + '%',
-                textposition='top center'
-            ),
-            row=1, col=2
-        )
+        if conteudo is None:
+            # A leitura fica fora do lock: outras sessões não esperam por ela
+            try:
+                conteudo = ler_conteudo(nome, conteudo_bytes)
+            except Exception as e:
+                st.error(f"Erro ao carregar {nome}: {e}")
+                continue
+            with lock:
+                cache[digest] = conteudo
         
-        fig8.update_layout(
-            height=400,
-            title_text=f'Evolução do Desempenho - {aluno_selecionado}',
-            showlegend=True,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            title_font=dict(color='#2D3748', size=18),
-            font=dict(color='#2D3748')
+        dados[nome_da_avaliacao(nome)] = conteudo
+    
+    # Limitar o cache compartilhado aos arquivos usados mais recentemente
+    with lock:
+        while len(cache) > MAX_ARQUIVOS_EM_CACHE:
+            cache.popitem(last=False)
+    
+    return dados
+
+def calcular_digest(arquivos):
+    """Identificador do conjunto de arquivos carregados (usado como chave de cache das exportações)."""
+    digest = hashlib.sha1()
+    for nome, digest_arquivo, _ in arquivos:
+        digest.update(nome.encode('utf-8'))
+        digest.update(digest_arquivo.encode('ascii'))
+    return digest.hexdigest()
+
+def obter_exportacao(digest, formato, gerar=None):
+    """Retorna a exportação em cache para (digest, formato), gerando-a apenas quando solicitada."""
+    cache = st.session_state.setdefault('exportacoes_trimestral', {})
+    chave = (digest, formato)
+    
+    if chave not in cache and gerar is not None:
+        # Descartar exportações de conjuntos de arquivos anteriores
+        for antiga in [c for c in cache if c[0] != digest]:
+            del cache[antiga]
+        cache[chave] = gerar()
+    
+    return cache.get(chave)
+
+# Colunas dos acumuladores por aluno (mesma ordem de agregados_da_avaliacao)
+COLUNAS_ACUMULADORES = ['contagem', 'soma', 'soma_quad']
+
+def aplicar_contribuicao(agregados, contribuicao, sinal):
+    """Soma (sinal 1) ou subtrai (sinal -1) uma avaliação, tocando só as linhas dos seus alunos.
+    
+    Os acumuladores ficam em uma matriz com linhas livres reaproveitadas;
+    alunos cuja contagem chega a zero saem do índice e dos nomes.
+    """
+    for metrica, (soma, contagem) in contribuicao['metricas'].items():
+        agregados['metricas'][metrica][0] += sinal * soma
+        agregados['metricas'][metrica][1] += sinal * contagem
+    
+    linhas, livres = agregados['linhas'], agregados['livres']
+    por_aluno = contribuicao['por_aluno']
+    identidades = por_aluno.index.tolist()
+    if sinal > 0:
+        novas = [identidade for identidade in identidades if identidade not in linhas]
+        faltam = len(novas) - len(livres)
+        if faltam > 0:
+            # Capacidade dobra para que inclusões sucessivas custem O(alunos novos) amortizado
+            capacidade = len(agregados['acumuladores'])
+            nova_capacidade = max(2 * capacidade, capacidade + faltam)
+            acumuladores = np.zeros((nova_capacidade, len(COLUNAS_ACUMULADORES)))
+            acumuladores[:capacidade] = agregados['acumuladores']
+            agregados['acumuladores'] = acumuladores
+            livres.extend(range(nova_capacidade - 1, capacidade - 1, -1))
+        for identidade in novas:
+            linhas[identidade] = livres.pop()
+        for identidade, nome in contribuicao['nomes'].items():
+            agregados['nomes'].setdefault(identidade, nome)
+    
+    acumuladores = agregados['acumuladores']
+    posicoes = np.fromiter((linhas[identidade] for identidade in identidades), dtype=np.intp, count=len(identidades))
+    acumuladores[posicoes] += sinal * por_aluno[COLUNAS_ACUMULADORES].to_numpy(dtype=float)
+    
+    if sinal < 0:
+        zeradas = acumuladores[posicoes, 0] < 0.5
+        acumuladores[posicoes[zeradas]] = 0.0
+        for identidade, posicao in zip(np.asarray(identidades, dtype=object)[zeradas], posicoes[zeradas]):
+            del linhas[identidade]
+            agregados['nomes'].pop(identidade, None)
+            livres.append(posicao)
+
+def atualizar_agregados(contribuicoes):
+    """Mantém os agregados da sessão, aplicando apenas as avaliações incluídas ou removidas.
+    
+    `contribuicoes` mapeia a chave de cada avaliação carregada (hash do arquivo)
+    para o resultado de agregados_da_avaliacao; o custo acompanha os alunos das
+    avaliações que mudaram e não o histórico inteiro.
+    """
+    agregados = st.session_state.get('agregados_trimestral')
+    if agregados is None:
+        agregados = {
+            'membros': {},
+            'metricas': {metrica: [0.0, 0] for metrica in METRICAS_AGREGADAS},
+            'linhas': {},
+            'acumuladores': np.zeros((0, len(COLUNAS_ACUMULADORES))),
+            'livres': [],
+            'nomes': {}
+        }
+        st.session_state['agregados_trimestral'] = agregados
+    
+    membros = agregados['membros']
+    for chave in [chave for chave in membros if chave not in contribuicoes]:
+        aplicar_contribuicao(agregados, membros.pop(chave), -1)
+    for chave in [chave for chave in contribuicoes if chave not in membros]:
+        membros[chave] = contribuicoes[chave]
+        aplicar_contribuicao(agregados, contribuicoes[chave], 1)
+    return agregados
+
+def alunos_unicos(agregados):
+    return len(agregados['linhas'])
+
+def acumulado_do_aluno(agregados, identidade):
+    """Contagem, soma e soma dos quadrados de θ de um aluno entre as avaliações carregadas.
+    
+    Alunos sem nenhum θ válido não têm linha nos acumuladores e recebem zeros.
+    """
+    linha = agregados['linhas'].get(identidade)
+    if linha is None:
+        return dict.fromkeys(COLUNAS_ACUMULADORES, 0.0)
+    return dict(zip(COLUNAS_ACUMULADORES, agregados['acumuladores'][linha]))
+
+def media_agregada(agregados, metrica):
+    """Média de uma métrica entre as avaliações carregadas (ignora valores ausentes)."""
+    soma, contagem = agregados['metricas'][metrica]
+    return soma / contagem if contagem else float('nan')
+
+def melhores_alunos(agregados, n=5):
+    """Alunos com maior proficiência média entre as avaliações carregadas."""
+    identidades = list(agregados['linhas'])
+    acumuladores = agregados['acumuladores'][list(agregados['linhas'].values())]
+    # Só há linhas para alunos com contagem > 0 (ver agregados_da_avaliacao)
+    medias = pd.Series(acumuladores[:, 1] / acumuladores[:, 0], index=identidades)
+    return medias.nlargest(n).rename(index=agregados['nomes'])
+
+def gerar_zip_csvs(tabelas, barra=None):
+    """Compacta os DataFrames em um ZIP de CSVs, informando o progresso a cada arquivo."""
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for passo, (filename, df) in enumerate(tabelas.items(), 1):
+            zip_file.writestr(filename, df.to_csv(index=False))
+            if barra is not None:
+                barra.progress(passo / len(tabelas), text=f"Compactando {filename} ({passo}/{len(tabelas)})...")
+    
+    return zip_buffer.getvalue()
+
+# Carregar dados
+if fonte_dados == FONTE_HISTORICO:
+    historico = historico_db.listar_avaliacoes()
+    
+    st.sidebar.subheader("🔎 Filtros do Histórico")
+    avaliacoes_filtro = st.sidebar.multiselect(
+        "Avaliações",
+        historico['nome'].tolist(),
+        help="Deixe vazio para incluir todas as avaliações salvas"
+    )
+    data_inicio = data_fim = None
+    if not historico.empty:
+        datas = pd.to_datetime(historico['data_analise'], format='ISO8601').dt.date
+        periodo = st.sidebar.date_input("Período da análise", value=(datas.min(), datas.max()))
+        if len(periodo) > 0:
+            data_inicio = periodo[0]
+        if len(periodo) > 1:
+            data_fim = periodo[1]
+    aluno_filtro = st.sidebar.text_input("Aluno (trecho do nome)").strip()
+    
+    versao_db = historico_db.versao()
+    filtros = (tuple(avaliacoes_filtro), data_inicio, data_fim, aluno_filtro)
+    digest_dados = hashlib.sha1(repr((versao_db, filtros)).encode('utf-8')).hexdigest()
+    
+    avaliacoes_info, df_avaliacoes, df_alunos, df_questoes, df_tutores = montar_tabelas_historico(versao_db, *filtros)
+    nomes_avaliacoes = df_avaliacoes['Avaliação'].tolist()
+    contribuicoes = agregados_das_tabelas(digest_dados, df_avaliacoes, df_alunos)
+    
+    if not nomes_avaliacoes:
+        st.warning("🗄️ Nenhuma avaliação encontrada no histórico local.")
+        st.info("Salve análises pela aba **Exportar** da página principal ou ajuste os filtros no menu lateral.")
+        st.stop()
+else:
+    arquivos, arquivos_duplicados = identificar_arquivos(uploaded_files)
+    dados = carregar_arquivos(arquivos)
+    digest_dados = calcular_digest(arquivos)
+    nomes_avaliacoes = list(dados.keys())
+    contribuicoes = {
+        digest: dados[nome_da_avaliacao(nome)]['agregados']
+        for nome, digest, _ in arquivos if nome_da_avaliacao(nome) in dados
+    }
+    
+    if arquivos_duplicados:
+        st.sidebar.info(f"Arquivos com conteúdo idêntico ignorados: {', '.join(arquivos_duplicados)}")
+
+if not nomes_avaliacoes:
+    st.warning("📁 Nenhum arquivo JSON carregado.")
+    
+    st.markdown("""
+    <div class="info-box">
+    <h3>📋 Como usar:</h3>
+    <ol>
+        <li>No menu lateral à esquerda, clique em <strong>"Browse files"</strong></li>
+        <li>Selecione um ou mais arquivos JSON das avaliações</li>
+        <li>Os dados serão automaticamente carregados e analisados</li>
+        <li>Explore as diferentes visualizações abaixo</li>
+    </ol>
+    <p><strong>Nota:</strong> Os arquivos devem estar no formato JSON gerado pelo sistema de avaliação.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Exemplo da estrutura esperada
+    with st.expander("📄 Exemplo da estrutura do arquivo JSON esperada"):
+        st.json({
+            "metadata": {
+                "data_analise": "2025-12-26T22:32:13.514421",
+                "total_alunos": 5,
+                "total_questoes": 4,
+                "proficiencia_media": 0.8738110418683684,
+                "desvio_padrao_proficiencia": 0.588300615910456,
+                "taxa_acerto_media": 85.0,
+                "confiabilidade": 0.7621947100625063
+            },
+            "gabarito": {"Q1": "A", "Q2": "B", "Q3": "C", "Q4": "C"},
+            "resumo_alunos": [
+                {
+                    "Aluno": "Aluno 1",
+                    "Proficiencia (θ)": 1.2815515655446004,
+                    "Pontuacao Total": 4,
+                    "Percentual de Acerto": 100.0,
+                    "Z-Score": 0.7748891497507717
+                }
+            ]
+        })
+    st.stop()
+
+# Exibir estatísticas básicas
+st.markdown('<h2 class="sub-header">📋 Resumo das Avaliações</h2>', unsafe_allow_html=True)
+
+# Criar DataFrames para análise (tabelas normalizadas por arquivo, empilhadas uma única vez)
+if fonte_dados == FONTE_ARQUIVOS:
+    avaliacoes_info, df_avaliacoes, df_alunos, df_questoes, df_tutores = montar_tabelas(digest_dados, dados)
+
+# Linking de escalas: θ e b de todas as avaliações na escala da primeira avaliação
+metodo_escala = st.sidebar.selectbox(
+    "⚖️ Escala das proficiências",
+    list(METODOS_LINKING),
+    help="O linking usa as questões com o mesmo código (informado na página principal) como itens comuns entre avaliações"
+)
+if METODOS_LINKING[metodo_escala] is not None:
+    metodo = METODOS_LINKING[metodo_escala]
+    digest_dados = hashlib.sha1(f"{digest_dados}:{metodo}".encode('utf-8')).hexdigest()
+    df_avaliacoes, df_alunos, df_questoes, df_tutores, constantes_linking = ligar_escalas(
+        digest_dados, metodo, df_avaliacoes, df_alunos, df_questoes, df_tutores
+    )
+    avaliacoes_info = df_avaliacoes.to_dict('records')
+    contribuicoes = agregados_das_tabelas(digest_dados, df_avaliacoes, df_alunos)
+    
+    nao_ligadas = constantes_linking['Situação'] == "Sem itens comuns suficientes"
+    if nao_ligadas.any():
+        st.warning(
+            "⚖️ Avaliações sem itens comuns suficientes permanecem na escala original: "
+            + ", ".join(constantes_linking.loc[nao_ligadas, 'Avaliação'])
         )
-        
-        fig8.update_yaxes(
-            title_text="Proficiência (θ)", 
-            row=1, col=1, 
-            showgrid=True, 
-            gridwidth=1, 
-            gridcolor='lightgray',
-            tickfont=dict(color='#2D3748')
+    with st.expander("🔗 Constantes de Linking (θ* = A·θ + B)"):
+        st.dataframe(
+            constantes_linking.style.format({'A': '{:.3f}', 'B': '{:.3f}'}),
+            hide_index=True,
+            use_container_width=True
         )
-        fig8.update_yaxes(
-            title_text="% de Acerto", 
-            row=1, col=2, 
-            showgrid=True, 
-            gridwidth=1, 
-            gridcolor='lightgray',
-            tickfont=dict(color='#2D3748')
+
+# Agregados acumulados: atualizados só com as avaliações incluídas ou removidas
+agregados = atualizar_agregados(contribuicoes)
+
+# Layout de métricas
+st.markdown('<h2 class="sub-header">📊 Métricas Gerais</h2>', unsafe_allow_html=True)
+
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.markdown(f"""
+    <div class="metric-card">
+        <h3>📚 Avaliações</h3>
+        <h2>{len(nomes_avaliacoes)}</h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col2:
+    total_alunos_unicos = alunos_unicos(agregados)
+    st.markdown(f"""
+    <div class="metric-card">
+        <h3>👥 Alunos Únicos</h3>
+        <h2>{total_alunos_unicos}</h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col3:
+    proficiencia_media = media_agregada(agregados, 'Proficiência Média')
+    st.markdown(f"""
+    <div class="metric-card">
+        <h3>🎯 Proficiência Média</h3>
+        <h2>{proficiencia_media:.2f}</h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col4:
+    taxa_acerto_media = media_agregada(agregados, 'Taxa Acerto Média')
+    st.markdown(f"""
+    <div class="metric-card">
+        <h3>✅ Taxa de Acerto</h3>
+        <h2>{taxa_acerto_media:.1f}%</h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Tabela de avaliações
+st.markdown('<h2 class="sub-header">📋 Tabela de Avaliações</h2>', unsafe_allow_html=True)
+tabelas.tabela_paginada(df_avaliacoes, "tabela_avaliacoes", digest_dados, colunas_busca=['Avaliação'], formato={
+    'Proficiência Média': '{:.3f}',
+    'Desvio Padrão': '{:.3f}',
+    'Taxa Acerto Média': '{:.1f}%',
+    'Confiabilidade': '{:.3f}'
+})
+
+# Gráficos de comparação e diferenças pareadas entre avaliações
+secao_comparacao(digest_dados, df_avaliacoes, df_alunos, nomes_avaliacoes)
+
+# Gráfico 2: Desempenho dos Alunos
+st.markdown('<h2 class="sub-header">📊 Desempenho dos Alunos</h2>', unsafe_allow_html=True)
+
+# Selecionar avaliação para análise detalhada
+avaliacao_selecionada = st.selectbox(
+    "Selecione uma avaliação para análise detalhada:",
+    options=nomes_avaliacoes,
+    key="select_avaliacao"
+)
+
+if avaliacao_selecionada:
+    secao_desempenho(digest_dados, avaliacao_selecionada, df_alunos)
+
+# Gráfico 3: Análise de Questões
+if not df_questoes.empty:
+    secao_questoes(digest_dados, avaliacao_selecionada, df_questoes)
+
+# Deriva de itens: recalculada automaticamente sempre que o conjunto de avaliações muda
+escala_linking = constantes_linking['A'].to_numpy() if METODOS_LINKING[metodo_escala] is not None else None
+deriva = detectar_deriva(digest_dados, df_avaliacoes, df_questoes, escala_linking)
+
+if not deriva.empty:
+    st.markdown('<h2 class="sub-header">🧭 Deriva de Itens</h2>', unsafe_allow_html=True)
+    
+    itens_com_deriva = deriva.loc[deriva['Deriva'], 'Item'].nunique()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Itens comuns", deriva['Item'].nunique())
+    col2.metric("Comparações", len(deriva))
+    col3.metric("⚠️ Itens com deriva", itens_com_deriva)
+    
+    if itens_com_deriva:
+        st.warning(
+            f"⚠️ {itens_com_deriva} item(ns) mudaram de comportamento entre aplicações "
+            f"(p ajustado < {NIVEL_DERIVA}). Revise-os antes de usá-los como itens comuns."
         )
-        fig8.update_xaxes(
-            showgrid=True, 
-            gridwidth=1, 
-            gridcolor='lightgray', 
-            row=1, col=1,
-            tickfont=dict(color='#2D3748')
+    
+    mostrar_todas = st.checkbox("Mostrar todas as comparações", key="deriva_todas")
+    st.dataframe(
+        deriva if mostrar_todas else deriva[deriva['Deriva']],
+        column_config={
+            coluna: st.column_config.NumberColumn(format="%.3f")
+            for coluna in deriva.columns if coluna.startswith(('Δ', 'z ', 'p '))
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption(
+        "Cada item é comparado com a sua aplicação anterior. z = diferença / erro padrão da diferença; "
+        f"a deriva é sinalizada quando o p-valor corrigido por Holm (todas as comparações) fica abaixo de {NIVEL_DERIVA}."
+    )
+
+# Análise de Tutores
+if df_tutores is not None and not df_tutores.empty:
+    secao_tutores(digest_dados, avaliacao_selecionada, df_tutores)
+
+# Análise longitudinal (se houver múltiplas avaliações)
+if len(nomes_avaliacoes) > 1:
+    secao_longitudinal(digest_dados, df_alunos, nomes_avaliacoes, agregados)
+
+# Calibração concorrente (todas as avaliações ajustadas juntas)
+if len(nomes_avaliacoes) > 1:
+    st.markdown('<h2 class="sub-header">🧮 Calibração Concorrente</h2>', unsafe_allow_html=True)
+    
+    if fonte_dados == FONTE_HISTORICO:
+        blocos_respostas = respostas_do_historico(versao_db, *filtros[:3])
+    else:
+        blocos_respostas = {nome: dados[nome]['respostas'] for nome in nomes_avaliacoes}
+    blocos_respostas = {nome: blocos_respostas[nome] for nome in nomes_avaliacoes if blocos_respostas.get(nome) is not None}
+    sem_respostas = [nome for nome in nomes_avaliacoes if nome not in blocos_respostas]
+    
+    if len(blocos_respostas) < 2:
+        st.info(
+            "A calibração concorrente precisa das respostas de pelo menos duas avaliações. "
+            "Exporte novamente as avaliações (JSON ou Parquet) pela página principal ou salve-as no histórico local."
         )
-        fig8.update_xaxes(
-            showgrid=True, 
-            gridwidth=1, 
-            gridcolor='lightgray', 
-            row=1, col=2,
-            tickfont=dict(color='#2D3748')
+    else:
+        if sem_respostas:
+            st.caption(f"Sem respostas no arquivo (fora da calibração): {', '.join(sem_respostas)}")
+        
+        modo_calibracao = st.radio(
+            "Itens comuns (mesmo código em mais de uma avaliação):",
+            [MODO_INICIO_QUENTE, MODO_ANCORAS_FIXAS],
+            key="modo_calibracao",
+            help="No início a quente, os parâmetros da última calibração desta sessão são o ponto de partida"
         )
+        chave_calibracao = (digest_dados, modo_calibracao)
+        
+        if st.button("▶️ Executar calibração concorrente"):
+            with st.spinner("Calibrando todas as avaliações em conjunto..."):
+                anteriores = st.session_state.get('parametros_calibrados')
+                resultado = executar_calibracao(blocos_respostas, df_questoes, modo_calibracao, anteriores)
+                resultado['csv_itens'] = resultado['itens'].to_csv(index=False).encode('utf-8')
+                resultado['csv_alunos'] = resultado['alunos'].to_csv(index=False).encode('utf-8')
+            
+            st.session_state['calibracao_trimestral'] = {'chave': chave_calibracao, 'resultado': resultado}
+            st.session_state['parametros_calibrados'] = {
+                'itens': dict(zip(resultado['itens']['Item'], zip(resultado['itens']['a'], resultado['itens']['b']))),
+                'grupos': dict(zip(resultado['grupos']['Avaliação'], zip(resultado['grupos']['Média θ'], resultado['grupos']['DP θ'])))
+            }
         
-        st.plotly_chart(fig8, use_container_width=True)
+        calibrado = st.session_state.get('calibracao_trimestral')
+        if calibrado is not None and calibrado['chave'] == chave_calibracao:
+            resultado = calibrado['resultado']
+            itens_calibrados = resultado['itens']
+            
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Itens", len(itens_calibrados))
+            col2.metric("Itens comuns", int((itens_calibrados['Avaliações'] > 1).sum()))
+            col3.metric("Respostas de alunos", len(resultado['alunos']))
+            col4.metric("Iterações", resultado['iteracoes'], "convergiu" if resultado['convergiu'] else "sem convergência")
+            
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                st.markdown("**Distribuição de θ por avaliação** (referência: primeira avaliação)")
+                st.dataframe(
+                    resultado['grupos'].style.format({'Média θ': '{:.3f}', 'DP θ': '{:.3f}'}),
+                    hide_index=True,
+                    use_container_width=True
+                )
+            with col2:
+                st.markdown("**Parâmetros dos itens (2PL)**")
+                st.dataframe(
+                    itens_calibrados[['Item', 'Avaliações', 'Âncora', 'a', 'b']]
+                    .style.format({'a': '{:.3f}', 'b': '{:.3f}'}),
+                    hide_index=True,
+                    use_container_width=True
+                )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "📥 Parâmetros dos itens (CSV)",
+                    data=resultado['csv_itens'],
+                    file_name="calibracao_itens.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            with col2:
+                st.download_button(
+                    "📥 Proficiências calibradas (CSV)",
+                    data=resultado['csv_alunos'],
+                    file_name="calibracao_alunos.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
 
 # Informações adicionais
 st.markdown("---")
@@ -979,23 +2294,28 @@ col_export1, col_export2, col_export3 = st.columns(3)
 
 with col_export1:
     if st.button("📊 Exportar Relatório JSON", use_container_width=True):
-        # Criar relatório consolidado JSON
-        relatorio = {
-            "data_geracao": datetime.now().isoformat(),
-            "total_avaliacoes": len(dados),
-            "total_alunos_unicos": df_alunos['Aluno'].nunique(),
-            "metricas_gerais": {
-                "proficiencia_media_geral": float(df_avaliacoes['Proficiência Média'].mean()),
-                "taxa_acerto_media_geral": float(df_avaliacoes['Taxa Acerto Média'].mean()),
-                "confiabilidade_media": float(df_avaliacoes['Confiabilidade'].mean())
-            },
-            "melhores_alunos": df_alunos.groupby('Aluno')['Proficiência'].mean().nlargest(5).to_dict(),
-            "avaliacoes_detalhadas": avaliacoes_info
-        }
-        
-        # Converter para JSON
-        json_relatorio = json.dumps(relatorio, indent=2, ensure_ascii=False)
+        def gerar_relatorio_json():
+            # Criar relatório consolidado JSON
+            relatorio = {
+                "data_geracao": datetime.now().isoformat(),
+                "total_avaliacoes": len(nomes_avaliacoes),
+                "total_alunos_unicos": alunos_unicos(agregados),
+                "metricas_gerais": {
+                    "proficiencia_media_geral": media_agregada(agregados, 'Proficiência Média'),
+                    "taxa_acerto_media_geral": media_agregada(agregados, 'Taxa Acerto Média'),
+                    "confiabilidade_media": media_agregada(agregados, 'Confiabilidade')
+                },
+                "melhores_alunos": melhores_alunos(agregados, 5).to_dict(),
+                "avaliacoes_detalhadas": avaliacoes_info
+            }
+            
+            # Converter para JSON
+            return json.dumps(relatorio, indent=2, ensure_ascii=False)
         
+        obter_exportacao(digest_dados, 'json', gerar_relatorio_json)
+    
+    json_relatorio = obter_exportacao(digest_dados, 'json')
+    if json_relatorio is not None:
         # Disponibilizar para download
         st.download_button(
             label="📥 Baixar JSON",
@@ -1007,35 +2327,35 @@ with col_export1:
 with col_export2:
     if st.button("📈 Exportar Relatório CSV", use_container_width=True):
         # Criar múltiplos DataFrames para CSV
-        csv_data = {
-            "avaliacoes.csv": df_avaliacoes.to_csv(index=False),
-            "alunos.csv": df_alunos.to_csv(index=False),
-            "questoes.csv": df_questoes.to_csv(index=False)
+        tabelas_csv = {
+            "avaliacoes.csv": df_avaliacoes,
+            "alunos.csv": df_alunos,
+            "questoes.csv": df_questoes
         }
         
         if df_tutores is not None and not df_tutores.empty:
-            csv_data["tutores.csv"] = df_tutores.to_csv(index=False)
-        
-        # Criar um arquivo ZIP com todos os CSVs
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for filename, csv_content in csv_data.items():
-                zip_file.writestr(filename, csv_content)
-        
-        zip_buffer.seek(0)
+            tabelas_csv["tutores.csv"] = df_tutores
         
+        # Criar um arquivo ZIP com todos os CSVs (com indicador de progresso)
+        barra = st.progress(0.0, text="Preparando ZIP...")
+        obter_exportacao(digest_dados, 'zip', lambda: gerar_zip_csvs(tabelas_csv, barra))
+        barra.empty()
+    
+    zip_relatorio = obter_exportacao(digest_dados, 'zip')
+    if zip_relatorio is not None:
         st.download_button(
             label="📥 Baixar ZIP com CSVs",
-            data=zip_buffer,
+            data=zip_relatorio,
             file_name=f"relatorio_avaliacoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
             mime="application/zip"
         )
 
 with col_export3:
     if st.button("📝 Exportar Relatório TXT", use_container_width=True):
-        # Criar relatório em formato texto
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        txt_content = f"""
+        def gerar_relatorio_txt():
+            # Criar relatório em formato texto
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            txt_content = f"""
 {'='*60}
 RELATÓRIO DE ANÁLISE DE AVALIAÇÕES
 Data de geração: {timestamp}
@@ -1043,18 +2363,18 @@ Data de geração: {timestamp}
 
 RESUMO GERAL:
 -------------
-• Total de Avaliações: {len(dados)}
-• Total de Alunos Únicos: {df_alunos['Aluno'].nunique()}
-• Proficiência Média Geral: {df_avaliacoes['Proficiência Média'].mean():.3f}
-• Taxa de Acerto Média: {df_avaliacoes['Taxa Acerto Média'].mean():.1f}%
-• Confiabilidade Média: {df_avaliacoes['Confiabilidade'].mean():.3f}
+• Total de Avaliações: {len(nomes_avaliacoes)}
+• Total de Alunos Únicos: {alunos_unicos(agregados)}
+• Proficiência Média Geral: {media_agregada(agregados, 'Proficiência Média'):.3f}
+• Taxa de Acerto Média: {media_agregada(agregados, 'Taxa Acerto Média'):.1f}%
+• Confiabilidade Média: {media_agregada(agregados, 'Confiabilidade'):.3f}
 
 DETALHES DAS AVALIAÇÕES:
 ------------------------
 """
-        
-        for idx, avaliacao in enumerate(avaliacoes_info, 1):
-            txt_content += f"""
+            
+            for idx, avaliacao in enumerate(avaliacoes_info, 1):
+                txt_content += f"""
 {idx}. {avaliacao['Avaliação']}:
     • Data da Análise: {avaliacao['Data Análise']}
     • Total de Alunos: {avaliacao['Total Alunos']}
@@ -1064,20 +2384,20 @@ DETALHES DAS AVALIAÇÕES:
     • Desvio Padrão: {avaliacao['Desvio Padrão']:.3f}
     • Confiabilidade: {avaliacao['Confiabilidade']:.3f}
 """
-        
-        # Adicionar ranking dos melhores alunos
-        txt_content += f"""
+            
+            # Adicionar ranking dos melhores alunos
+            txt_content += f"""
 
 TOP 5 ALUNOS (PROFICIÊNCIA MÉDIA):
 ---------------------------------
 """
-        top_alunos = df_alunos.groupby('Aluno')['Proficiência'].mean().nlargest(5)
-        for i, (aluno, proficiencia) in enumerate(top_alunos.items(), 1):
-            txt_content += f"{i}. {aluno}: {proficiencia:.3f}\n"
-        
-        # Adicionar estatísticas das questões
-        if not df_questoes.empty:
-            txt_content += f"""
+            top_alunos = melhores_alunos(agregados, 5)
+            for i, (aluno, proficiencia) in enumerate(top_alunos.items(), 1):
+                txt_content += f"{i}. {aluno}: {proficiencia:.3f}\n"
+            
+            # Adicionar estatísticas das questões
+            if not df_questoes.empty:
+                txt_content += f"""
 
 ESTATÍSTICAS DAS QUESTÕES:
 -------------------------
@@ -1086,27 +2406,33 @@ ESTATÍSTICAS DAS QUESTÕES:
 • Média de discriminação: {df_questoes['Discriminação'].mean():.3f}
 • Média de dificuldade: {df_questoes['Dificuldade'].mean():.3f}
 """
-        
-        # Adicionar análise de tutores se disponível
-        if df_tutores is not None and not df_tutores.empty:
-            txt_content += f"""
+            
+            # Adicionar análise de tutores se disponível
+            if df_tutores is not None and not df_tutores.empty:
+                txt_content += f"""
 
 ANÁLISE DE TUTORES:
 ------------------
 • Total de tutores identificados: {df_tutores['Aluno'].nunique()}
 • Score médio dos tutores: {df_tutores['Score_Tutor'].mean():.3f}
 """
-        
-        txt_content += f"""
+            
+            txt_content += f"""
 
 {'='*60}
 Relatório gerado automaticamente pelo Dashboard de Análise
 {'='*60}
 """
+            
+            return txt_content
         
+        obter_exportacao(digest_dados, 'txt', gerar_relatorio_txt)
+    
+    txt_relatorio = obter_exportacao(digest_dados, 'txt')
+    if txt_relatorio is not None:
         st.download_button(
             label="📥 Baixar TXT",
-            data=txt_content,
+            data=txt_relatorio,
             file_name=f"relatorio_avaliacoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
             mime="text/plain"
         )
@@ -1114,54 +2440,37 @@ Relatório gerado automaticamente pelo Dashboard de Análise
 # Exportação individual de DataFrames
 st.markdown("### 📋 Exportar DataFrames Individuais")
 
-col_df1, col_df2, col_df3, col_df4 = st.columns(4)
-
-with col_df1:
-    # Exportar DataFrame de avaliações
-    csv_avaliacoes = df_avaliacoes.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📊 Avaliações (CSV)",
-        data=csv_avaliacoes,
-        file_name="avaliacoes.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+tabelas_individuais = {
+    'avaliacoes': ("📊 Avaliações (CSV)", "avaliacoes.csv", df_avaliacoes),
+    'alunos': ("👥 Alunos (CSV)", "alunos.csv", df_alunos),
+    'questoes': ("❓ Questões (CSV)", "questoes.csv", df_questoes)
+}
+if df_tutores is not None and not df_tutores.empty:
+    tabelas_individuais['tutores'] = ("👨‍🏫 Tutores (CSV)", "tutores.csv", df_tutores)
 
-with col_df2:
-    # Exportar DataFrame de alunos
-    csv_alunos = df_alunos.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="👥 Alunos (CSV)",
-        data=csv_alunos,
-        file_name="alunos.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+# Os CSVs só são serializados quando solicitados (e ficam em cache para este conjunto de arquivos)
+if st.button("⚙️ Preparar CSVs individuais"):
+    for formato, (_, _, df) in tabelas_individuais.items():
+        obter_exportacao(digest_dados, f'csv_{formato}', lambda df=df: df.to_csv(index=False).encode('utf-8'))
 
-with col_df3:
-    # Exportar DataFrame de questões
-    csv_questoes = df_questoes.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="❓ Questões (CSV)",
-        data=csv_questoes,
-        file_name="questoes.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+col_df1, col_df2, col_df3, col_df4 = st.columns(4)
 
-with col_df4:
-    # Exportar DataFrame de tutores (se existir)
-    if df_tutores is not None and not df_tutores.empty:
-        csv_tutores = df_tutores.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="👨‍🏫 Tutores (CSV)",
-            data=csv_tutores,
-            file_name="tutores.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-    else:
-        st.info("Sem dados de tutores")
+for coluna, formato in zip([col_df1, col_df2, col_df3, col_df4], ['avaliacoes', 'alunos', 'questoes', 'tutores']):
+    with coluna:
+        if formato not in tabelas_individuais:
+            st.info("Sem dados de tutores")
+            continue
+        
+        label, filename, _ = tabelas_individuais[formato]
+        csv_tabela = obter_exportacao(digest_dados, f'csv_{formato}')
+        if csv_tabela is not None:
+            st.download_button(
+                label=label,
+                data=csv_tabela,
+                file_name=filename,
+                mime="text/csv",
+                use_container_width=True
+            )
 
 # Rodapé
 st.markdown("---")
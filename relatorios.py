@@ -0,0 +1,322 @@
+"""Relatórios da turma em TXT e CSV a partir de modelos pré-compilados.
+
+As seções fixas (explicação dos parâmetros TRI, sugestões, recomendações)
+são montadas uma única vez na importação; as seções com dados usam modelos
+de linha aplicados coluna a coluna, sem iterar linhas de DataFrame. Tudo é
+escrito diretamente em um stream. Usado por create_text_report e
+create_csv_report do Main.py.
+"""
+from itertools import starmap
+
+import numpy as np
+
+SEPARADOR = "=" * 70
+TRACO = "-" * 40
+
+# Critérios de questão problemática: (coluna, condição, rótulo TXT, rótulo CSV)
+CRITERIOS_QUESTOES = (
+    ('Discriminacao (a)', lambda v: v < 0.3, "baixa discriminacao", "Baixa discriminacao"),
+    ('Correlacao Bisserial', lambda v: v < 0.1, "baixa correlacao", "Baixa correlacao"),
+    ('% Acerto', lambda v: v < 20, "muito dificil", "Muito dificil"),
+    ('% Acerto', lambda v: v > 90, "muito facil", "Muito facil"),
+)
+
+
+def _linhas(*linhas):
+    return "".join(f"{linha}\n" for linha in linhas)
+
+
+# --- Modelos TXT ---
+CABECALHO_TXT = _linhas(
+    SEPARADOR,
+    "RELATORIO DE ANALISE - KAIROS",
+    SEPARADOR,
+    "Data de geracao: {data}",
+    "Total de alunos: {total_alunos}",
+    "Total de questoes: {total_questoes}",
+    "",
+)
+
+EXPLICACAO_TRI_TXT = _linhas(
+    "EXPLICACAO DOS PARAMETROS TRI",
+    TRACO,
+    "1. DIFICULDADE (b):",
+    "   - Valores negativos: Questao facil",
+    "   - Valores proximos a 0: Dificuldade media",
+    "   - Valores positivos: Questao dificil",
+    "   - Faixa tipica: -3 a +3",
+    "",
+    "2. DISCRIMINACAO (a):",
+    "   - Valores abaixo de 0.3: Discriminacao baixa (questao problematica)",
+    "   - Valores 0.3-0.6: Discriminacao moderada",
+    "   - Valores acima de 0.6: Discriminacao alta (questao excelente)",
+    "   - Valores negativos: Questao funciona inversamente (erro grave)",
+    "",
+    "3. PROFICIENCIA (θ):",
+    "   - Valores abaixo de -1: Proficiencia baixa",
+    "   - Valores entre -1 e +1: Proficiencia media",
+    "   - Valores acima de +1: Proficiencia alta",
+    "   - Escala tipica: -4 a +4 (media 0, desvio padrao 1)",
+    "",
+)
+
+PANORAMA_TXT = _linhas(
+    "PANORAMA GERAL DA TURMA",
+    TRACO,
+    "Proficiencia media (θ): {theta_media:.3f}",
+    "Desvio padrao da proficiencia: {theta_dp:.3f}",
+    "Taxa media de acerto: {acerto_medio:.1f}%",
+    "Dificuldade media das questoes (b): {dificuldade_media:.3f}",
+    "Confiabilidade do teste: {confiabilidade:.3f}",
+    "",
+)
+
+TUTORES_TXT = _linhas(
+    "TOP 10 TUTORES DE COLEGAS",
+    TRACO,
+    "Pos | Aluno | Proficiencia (θ) | % Acerto | Score Tutor",
+    SEPARADOR.replace("=", "-"),
+)
+LINHA_TUTOR_TXT = "{:3d} | {:20.20s} | {:7.2f} | {:7.1f}% | {:6.2f}\n"
+SUGESTOES_TUTORIA_TXT = _linhas(
+    "",
+    "SUGESTOES PARA GRUPOS DE TUTORIA:",
+    "1. Formar grupos de 3-4 alunos com 1 tutor",
+    "2. Atribuir tutores para temas especificos de dificuldade",
+    "3. Realizar sessoes semanais de reforco",
+    "",
+)
+
+INDIVIDUAL_TXT = _linhas(
+    "ANALISE INDIVIDUAL - {nome}",
+    TRACO,
+    "Proficiencia (θ): {theta:.3f}",
+    "Pontuacao: {pontuacao}/{total_questoes}",
+    "Percentual de acerto: {percentual:.1f}%",
+    "Posicao no ranking: {posicao}º de {total_alunos}",
+    "Percentil: {percentil:.1f}",
+    "Questoes a reforcar: {pontos_fracos}",
+    "",
+)
+TUTOR_INDIVIDUAL_TXT = _linhas(
+    "🎓 **ESTE ALUNO PODE SER TUTOR DE COLEGAS**",
+    "   - Score como tutor: {score:.2f}",
+    "   - Posicao entre tutores: {posicao}º",
+    "   - Sugestao: Atribuir para auxiliar 2-3 colegas com dificuldades",
+    "",
+)
+# Interpretação por classificação de θ (coluna Classificacao de student_results)
+INTERPRETACOES_TXT = {
+    classificacao: _linhas(f"INTERPRETACAO: Proficiencia {classificacao}", *(f"   * {item}" for item in itens), "")
+    for classificacao, itens in (
+        ("MUITO BAIXA", ("Necessita de intervencao pedagogica imediata",
+                         "Dificuldades significativas na aprendizagem",
+                         "Sugestao: Acompanhamento individual com tutor")),
+        ("BAIXA", ("Necessita de reforco escolar",
+                   "Recomenda-se atendimento individualizado",
+                   "Sugestao: Participar de grupos de estudo com tutores")),
+        ("MEDIA", ("Desempenho adequado para o nivel escolar",
+                   "Manter ritmo de estudos atual",
+                   "Sugestao: Praticar questoes de maior dificuldade")),
+        ("ALTA", ("Bom desempenho academico",
+                  "Pode atuar como tutor de colegas",
+                  "Sugestao: Desafios adicionais e aprofundamento")),
+        ("MUITO ALTA", ("Excelente desempenho",
+                        "Recomenda-se atividades desafiadoras",
+                        "Sugestao: Atuar como tutor principal em grupos de estudo")),
+    )
+}
+
+QUESTOES_TXT = _linhas("ANALISE DAS QUESTOES", TRACO)
+PROBLEMAS_TXT = "Questoes que requerem atencao ({total}):\n"
+LINHA_PROBLEMA_TXT = "   * {}: {} (Dificuldade: {:.2f}, Acerto: {:.1f}%)\n"
+SEM_PROBLEMAS_TXT = "Todas as questoes apresentam caracteristicas adequadas.\n"
+
+RECOMENDACOES_TXT = _linhas(
+    "",
+    "RECOMENDACOES PEDAGOGICAS",
+    TRACO,
+    "1. Revise questoes com discriminacao abaixo de 0.3",
+    "2. Considere reformular questoes muito faceis (>90%) ou dificeis (<20%)",
+    "3. Use questoes com alta discriminacao (>0.6) em futuras avaliacoes",
+    "4. Organize grupos de tutoria com os 10 melhores alunos identificados",
+    "5. Planeje atividades de reforco para alunos com θ < -0.5",
+    "6. Proponha desafios adicionais para alunos com θ > 1.0",
+    "7. Implemente monitoramento continuo com relatorios mensais",
+    "8. Use os dados para personalizacao do ensino",
+    "",
+    SEPARADOR,
+    "Fim do relatorio",
+) + SEPARADOR
+
+# --- Modelos CSV ---
+METADADOS_CSV = _linhas(
+    "=== METADADOS ===",
+    "Metrica,Valor",
+    "Data de geracao,{data}",
+    "Total de alunos,{total_alunos}",
+    "Total de questoes,{total_questoes}",
+    "Proficiencia media,{theta_media:.3f}",
+    "Desvio padrao da proficiencia,{theta_dp:.3f}",
+    "Dificuldade media das questoes,{dificuldade_media:.3f}",
+    "Taxa media de acerto,{acerto_medio:.1f}%",
+    "Confiabilidade,{confiabilidade:.3f}",
+    "",
+)
+
+EXPLICACAO_TRI_CSV = _linhas(
+    "=== EXPLICACAO DOS PARAMETROS TRI ===",
+    "Parametro,Descricao,Interpretacao",
+    'Dificuldade (b),"Mede o nivel de dificuldade da questao",'
+    '"Negativo: facil; Proximo a 0: media; Positivo: dificil"',
+    'Discriminacao (a),"Capacidade de diferenciar alunos",'
+    '"<0.3: baixa; 0.3-0.6: moderada; >0.6: alta; Negativo: problema grave"',
+    'Proficiencia (θ),"Habilidade do aluno na escala TRI",'
+    '"<-1.5: muito baixa; -1.5 a -0.5: baixa; -0.5 a 0.5: media; 0.5 a 1.5: alta; >1.5: muito alta"',
+    "",
+)
+
+TUTORES_CSV = _linhas(
+    "=== TOP 10 TUTORES DE COLEGAS ===",
+    "Posicao,Aluno,Proficiencia (θ),% Acerto,Score Tutor,Sugestao",
+)
+LINHA_TUTOR_CSV = "{},{},{:.3f},{:.1f}%,{:.3f},{}\n"
+
+COLUNAS_RANKING_CSV = ['Posicao', 'Posicao Densa', 'Aluno', 'Proficiencia (θ)',
+                       'Percentual de Acerto', 'Pontuacao Total', 'Percentil', 'Classificacao', 'Pontos Fracos']
+COLUNAS_QUESTOES_CSV = ['Questao', 'Dificuldade (b)', 'Discriminacao (a)', '% Acerto', 'Correlacao Bisserial']
+
+PROBLEMAS_CSV = _linhas(
+    "=== QUESTOES PROBLEMATICAS ===",
+    "Questao,Problemas,Dificuldade,Discriminacao,% Acerto,Acão Recomendada",
+)
+LINHA_PROBLEMA_CSV = "{},{},{:.3f},{:.3f},{:.1f}%,{}\n"
+
+INDIVIDUAL_CSV = _linhas(
+    "=== ANALISE INDIVIDUAL: {nome} ===",
+    "Metrica,Valor",
+    "Proficiencia (θ),{theta:.3f}",
+    "Pontuacao,{pontuacao}/{total_questoes}",
+    "Percentual de acerto,{percentual:.1f}%",
+    "Posicao no ranking,{posicao}º de {total_alunos}",
+    "Percentil,{percentil:.1f}",
+    'Questoes a reforcar,"{pontos_fracos}"',
+)
+TUTOR_INDIVIDUAL_CSV = _linhas(
+    "E tutor potencial?,Sim",
+    "Score como tutor,{score:.3f}",
+    "Posicao entre tutores,{posicao}º",
+)
+NAO_TUTOR_CSV = _linhas("E tutor potencial?,Nao")
+INTERPRETACOES_CSV = {
+    classificacao: _linhas("", "=== INTERPRETACAO DA PROFICIENCIA ===", f"Classificacao,{classificacao}",
+            f"Recomendacao,{recomendacao}", f"Sugestao,{sugestao}", "")
+    for classificacao, recomendacao, sugestao in (
+        ("MUITO BAIXA", "Intervencao pedagogica imediata", "Acompanhamento individual com tutor"),
+        ("BAIXA", "Reforco escolar", "Participar de grupos de estudo"),
+        ("MEDIA", "Manter ritmo atual", "Praticar questoes dificeis"),
+        ("ALTA", "Atuar como tutor", "Desafios adicionais"),
+        ("MUITO ALTA", "Tutor principal", "Atividades avancadas"),
+    )
+}
+DETALHAMENTO_CSV = "=== DETALHAMENTO POR QUESTAO ===\n"
+COLUNAS_DETALHAMENTO_CSV = ['Questao', 'Resposta_Aluno', 'Resposta_Correta', 'Acerto', 'Dificuldade_Questao']
+
+
+def _questoes_problematicas(item_results, rotulo, separador):
+    """Questões problemáticas e a lista de problemas de cada uma (rótulo 2 = TXT, 3 = CSV)."""
+    marcas = np.column_stack([
+        condicao(item_results[coluna].to_numpy(dtype=float)) for coluna, condicao, *_ in CRITERIOS_QUESTOES
+    ])
+    problematicas = marcas.any(axis=1)
+    rotulos = [criterio[rotulo] for criterio in CRITERIOS_QUESTOES]
+    problemas = [separador.join(r for r, marcado in zip(rotulos, linha) if marcado) for linha in marcas[problematicas]]
+    return item_results[problematicas], problemas
+
+
+def _colunas_tutores(top_tutors):
+    return (
+        top_tutors['Posicao'].tolist(),
+        top_tutors['Aluno'].astype(str).tolist(),
+        top_tutors['Proficiencia (θ)'].tolist(),
+        top_tutors['Percentual de Acerto'].tolist(),
+        top_tutors['Score_Tutor'].tolist(),
+    )
+
+
+def escrever_txt(saida, resumo, item_results, top_tutors, aluno=None):
+    """Escreve o relatório TXT em `saida`.
+
+    `resumo` traz data, totais e médias da turma; `aluno` (opcional) traz os
+    dados do aluno selecionado (nome, θ, pontuação, posição, percentil, tutor).
+    """
+    saida.write(CABECALHO_TXT.format_map(resumo))
+    saida.write(EXPLICACAO_TRI_TXT)
+    saida.write(PANORAMA_TXT.format_map(resumo))
+
+    if len(top_tutors) > 0:
+        saida.write(TUTORES_TXT)
+        saida.writelines(starmap(LINHA_TUTOR_TXT.format, zip(*_colunas_tutores(top_tutors))))
+        saida.write(SUGESTOES_TUTORIA_TXT)
+
+    if aluno is not None:
+        saida.write(INDIVIDUAL_TXT.format_map({**resumo, **aluno}))
+        if aluno['tutor'] is not None:
+            saida.write(TUTOR_INDIVIDUAL_TXT.format_map(aluno['tutor']))
+        saida.write(INTERPRETACOES_TXT[aluno['classificacao']])
+
+    saida.write(QUESTOES_TXT)
+    problematicas, problemas = _questoes_problematicas(item_results, 2, ', ')
+    if len(problematicas) > 0:
+        saida.write(PROBLEMAS_TXT.format(total=len(problematicas)))
+        saida.writelines(starmap(LINHA_PROBLEMA_TXT.format, zip(
+            problematicas['Questao'].tolist(), problemas,
+            problematicas['Dificuldade (b)'].tolist(), problematicas['% Acerto'].tolist()
+        )))
+    else:
+        saida.write(SEM_PROBLEMAS_TXT)
+    saida.write(RECOMENDACOES_TXT)
+
+
+def escrever_csv(saida, resumo, item_results, top_tutors, ranking_df, aluno=None):
+    """Escreve o relatório CSV (várias seções) em `saida`.
+
+    `ranking_df` já vem ordenado, com as colunas de COLUNAS_RANKING_CSV; em
+    `aluno`, 'detalhado' traz as linhas do aluno na tabela detalhada.
+    """
+    saida.write(METADADOS_CSV.format_map(resumo))
+    saida.write(EXPLICACAO_TRI_CSV)
+
+    if len(top_tutors) > 0:
+        sugestao = f"Tutor para {min(3, resumo['total_alunos'] // 10)} alunos"
+        saida.write(TUTORES_CSV)
+        saida.writelines(
+            LINHA_TUTOR_CSV.format(*linha, sugestao) for linha in zip(*_colunas_tutores(top_tutors))
+        )
+        saida.write("\n")
+
+    saida.write("=== RANKING DE ALUNOS ===\n")
+    ranking_df[COLUNAS_RANKING_CSV].to_csv(saida, index=False)
+    saida.write("\n=== ANALISE DE QUESTOES ===\n")
+    item_results[COLUNAS_QUESTOES_CSV].to_csv(saida, index=False)
+    saida.write("\n")
+
+    problematicas, problemas = _questoes_problematicas(item_results, 3, ';')
+    if len(problematicas) > 0:
+        saida.write(PROBLEMAS_CSV)
+        saida.writelines(starmap(LINHA_PROBLEMA_CSV.format, zip(
+            problematicas['Questao'].tolist(), problemas,
+            problematicas['Dificuldade (b)'].tolist(), problematicas['Discriminacao (a)'].tolist(),
+            problematicas['% Acerto'].tolist(), ["Revisar questao"] * len(problemas)
+        )))
+        saida.write("\n")
+
+    if aluno is not None:
+        saida.write(INDIVIDUAL_CSV.format_map({**resumo, **aluno}))
+        if aluno['tutor'] is not None:
+            saida.write(TUTOR_INDIVIDUAL_CSV.format_map(aluno['tutor']))
+        else:
+            saida.write(NAO_TUTOR_CSV)
+        saida.write(INTERPRETACOES_CSV[aluno['classificacao']])
+        saida.write(DETALHAMENTO_CSV)
+        aluno['detalhado'][COLUNAS_DETALHAMENTO_CSV].to_csv(saida, index=False)
@@ -0,0 +1,105 @@
+"""Tabelas paginadas: busca, ordenação e fatiamento feitos no servidor.
+
+A ordem de cada coluna e o texto pesquisável são montados uma vez por tabela
+(em cache, pelo digest do conteúdo); a cada interação só as posições da página
+visível são selecionadas e apenas essas linhas vão ao navegador. Usado pelo
+Main.py e pela página trimestral.
+"""
+import numpy as np
+import streamlit as st
+
+TAMANHOS_PAGINA = (25, 50, 100, 500)
+SEM_ORDENACAO = "(ordem original)"
+CRESCENTE = "Crescente"
+DECRESCENTE = "Decrescente"
+
+
+def texto_de_busca(df, colunas):
+    """Texto pesquisável de cada linha (colunas unidas, em minúsculas)."""
+    texto = df[colunas[0]].astype('string').fillna('')
+    for coluna in colunas[1:]:
+        texto = texto + ' | ' + df[coluna].astype('string').fillna('')
+    return texto.str.lower().reset_index(drop=True)
+
+
+def ordem_da_coluna(df, coluna, crescente=True):
+    """Posições das linhas ordenadas pela coluna (estável; nulos sempre no fim)."""
+    serie = df[coluna].reset_index(drop=True)
+    return serie.sort_values(ascending=crescente, kind='stable', na_position='last').index.to_numpy()
+
+
+def filtrar_posicoes(posicoes, texto, termo):
+    """Mantém, na ordem atual, as posições cujo texto contém o termo."""
+    termo = termo.strip().lower()
+    if not termo:
+        return posicoes
+    encontrados = texto.str.contains(termo, regex=False).to_numpy(dtype=bool)
+    return posicoes[encontrados[posicoes]]
+
+
+def num_paginas(total, tamanho):
+    return max(1, -(-total // tamanho))
+
+
+def fatia(posicoes, pagina, tamanho):
+    """Posições da página pedida (numerada a partir de 1)."""
+    inicio = (pagina - 1) * tamanho
+    return posicoes[inicio:inicio + tamanho]
+
+
+def legenda(encontradas, total, pagina, tamanho):
+    if encontradas == 0:
+        return f"Nenhuma linha encontrada entre {total:,}."
+    inicio = (pagina - 1) * tamanho
+    fim = min(inicio + tamanho, encontradas)
+    filtro = f" (filtradas de {total:,})" if encontradas != total else ""
+    return (f"Linhas {inicio + 1:,}–{fim:,} de {encontradas:,}{filtro} · "
+            f"página {pagina} de {num_paginas(encontradas, tamanho)}")
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def ordem_da_tabela(digest, chave, coluna, crescente, _df):
+    return ordem_da_coluna(_df, coluna, crescente)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def texto_da_tabela(digest, chave, colunas_busca, _df):
+    return texto_de_busca(_df, list(colunas_busca))
+
+
+def tabela_paginada(df, chave, digest, colunas_busca=(), column_config=None, formato=None, hide_index=None):
+    """Exibe só a página visível de `df`; `digest` identifica o conteúdo da tabela nos caches."""
+    col_busca, col_ordem, col_sentido, col_tamanho = st.columns([3, 2, 1, 1])
+    with col_busca:
+        termo = st.text_input(
+            "🔎 Buscar", key=f"{chave}_busca", placeholder=", ".join(colunas_busca)
+        ) if colunas_busca else ""
+    with col_ordem:
+        coluna = st.selectbox("Ordenar por", [SEM_ORDENACAO] + list(df.columns), key=f"{chave}_ordem")
+    with col_sentido:
+        sentido = st.selectbox("Sentido", [CRESCENTE, DECRESCENTE], key=f"{chave}_sentido")
+    with col_tamanho:
+        tamanho = st.selectbox("Linhas", TAMANHOS_PAGINA, key=f"{chave}_tamanho")
+
+    if coluna == SEM_ORDENACAO:
+        posicoes = np.arange(len(df))
+    else:
+        posicoes = ordem_da_tabela(digest, chave, coluna, sentido == CRESCENTE, df)
+    if termo:
+        posicoes = filtrar_posicoes(posicoes, texto_da_tabela(digest, chave, tuple(colunas_busca), df), termo)
+
+    # A página atual pode deixar de existir quando a busca reduz o número de linhas
+    paginas = num_paginas(len(posicoes), tamanho)
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+    pagina = st.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+
+    visiveis = df.iloc[fatia(posicoes, pagina, tamanho)]
+    st.dataframe(
+        visiveis.style.format(formato) if formato else visiveis,
+        column_config=column_config,
+        hide_index=hide_index,
+        use_container_width=True
+    )
+    st.caption(legenda(len(posicoes), len(df), pagina, tamanho))